@@ -20,7 +20,7 @@ import ShareProjectModal from './components/ShareProjectModal'
 import ToastContainer from './components/ToastContainer'
 import { ToastProvider, useToast } from './contexts/ToastContext'
 import { DarkModeProvider } from './contexts/DarkModeContext'
-import { taskAPI, projectAPI, teamAPI, userAPI } from './services/api'
+import { taskAPI, projectAPI, teamAPI, userAPI, eventsAPI } from './services/api'
 import { getFullURL, getFetchOptions } from './utils/apiUrl'
 import './index.css'
 
@@ -762,6 +762,9 @@ function AppContent() {
   const [loadedRanges, setLoadedRanges] = React.useState([])
   const [isLoadingEvents, setIsLoadingEvents] = React.useState(false)
   
+  // Delta-sync cursor for the shared project auto-refresh
+  const taskSyncCursorRef = React.useRef(null)
+
   // Auto-refresh for shared projects
   useEffect(() => {
     // Check if we're viewing a shared project
@@ -779,24 +782,54 @@ function AppContent() {
 
     console.log('🔄 Auto-refresh enabled for shared project:', project.name)
 
-    // Refresh data every 5 seconds
-    const interval = setInterval(async () => {
+    const refresh = async () => {
       try {
         console.log('🔄 Auto-refreshing data for shared project...')
-        const [tasksRes, projectsRes] = await Promise.all([
-          taskAPI.getTasks(),
+        const [changes, projectsRes] = await Promise.all([
+          taskAPI.getTaskChanges(taskSyncCursorRef.current),
           projectAPI.getProjects()
         ])
-        setTasks(Array.isArray(tasksRes) ? tasksRes : [])
+        if (changes.full_sync) {
+          setTasks(Array.isArray(changes.tasks) ? changes.tasks : [])
+        } else if (changes.tasks.length > 0 || changes.deleted.length > 0) {
+          // Merge the delta: replace changed tasks in place, prepend new ones, drop deleted ones
+          setTasks(prevTasks => {
+            const deletedIds = new Set(changes.deleted)
+            const changedById = new Map(changes.tasks.map(task => [task.id, task]))
+            const kept = prevTasks
+              .filter(task => !deletedIds.has(task.id))
+              .map(task => {
+                const changed = changedById.get(task.id)
+                if (changed) {
+                  changedById.delete(task.id)
+                  return changed
+                }
+                return task
+              })
+            return [...changedById.values(), ...kept]
+          })
+        }
+        taskSyncCursorRef.current = changes.cursor
         setProjects(Array.isArray(projectsRes) ? projectsRes : [])
       } catch (error) {
         console.error('Auto-refresh failed:', error)
       }
-    }, 5000) // Refresh every 5 seconds
+    }
+
+    // Refresh when the server pushes a change; poll every 5 seconds only if the server can't stream
+    let interval = null
+    const unsubscribe = eventsAPI.subscribe((event) => {
+      if (event.type === 'tasks_changed' || event.type === 'projects_changed' || event.type === 'stream_open') {
+        refresh()
+      } else if (event.type === 'stream_closed' && !interval) {
+        interval = setInterval(refresh, 5000)
+      }
+    })
 
     return () => {
       console.log('🛑 Auto-refresh disabled')
-      clearInterval(interval)
+      unsubscribe()
+      if (interval) clearInterval(interval)
     }
   }, [currentView, isAuthenticated, projects])
   
@@ -1,16 +1,26 @@
 import { BellIcon } from '@heroicons/react/24/outline'
 import { BellIcon as BellSolidIcon } from '@heroicons/react/24/solid'
 import React, { useState, useEffect } from 'react'
-import { notificationAPI } from '../services/api'
+import { notificationAPI, eventsAPI } from '../services/api'
 
 function NotificationBell({ onClick }) {
   const [unreadCount, setUnreadCount] = useState(0)
 
   useEffect(() => {
     loadUnreadCount()
-    // Poll every 30 seconds
-    const interval = setInterval(loadUnreadCount, 30000)
-    return () => clearInterval(interval)
+    // Reload on pushed notifications; poll every 30 seconds only if the server can't stream
+    let interval = null
+    const unsubscribe = eventsAPI.subscribe((event) => {
+      if (event.type === 'notification' || event.type === 'stream_open') {
+        loadUnreadCount()
+      } else if (event.type === 'stream_closed' && !interval) {
+        interval = setInterval(loadUnreadCount, 30000)
+      }
+    })
+    return () => {
+      unsubscribe()
+      if (interval) clearInterval(interval)
+    }
   }, [])
 
   const loadUnreadCount = async () => {
@@ -6,6 +6,8 @@ import { useToast } from '../contexts/ToastContext'
 function NotificationInbox({ isOpen, onClose, onProjectUpdate }) {
   const [notifications, setNotifications] = useState([])
   const [loading, setLoading] = useState(false)
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const { showSuccess, showError } = useToast()
 
   useEffect(() => {
@@ -18,7 +20,8 @@ function NotificationInbox({ isOpen, onClose, onProjectUpdate }) {
     setLoading(true)
     try {
       const data = await notificationAPI.getNotifications()
-      setNotifications(data)
+      setNotifications(data.results)
+      setNextCursor(data.next_cursor)
     } catch (error) {
       console.error('Failed to load notifications:', error)
       showError('שגיאה בטעינת התראות')
@@ -27,6 +30,21 @@ function NotificationInbox({ isOpen, onClose, onProjectUpdate }) {
     }
   }
 
+  const loadMoreNotifications = async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const data = await notificationAPI.getNotifications(nextCursor)
+      setNotifications(prev => [...prev, ...data.results])
+      setNextCursor(data.next_cursor)
+    } catch (error) {
+      console.error('Failed to load more notifications:', error)
+      showError('שגיאה בטעינת התראות')
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const handleMarkRead = async (notificationId) => {
     try {
       await notificationAPI.markRead(notificationId)
@@ -193,6 +211,15 @@ function NotificationInbox({ isOpen, onClose, onProjectUpdate }) {
                   )}
                 </div>
               ))}
+              {nextCursor && (
+                <button
+                  onClick={loadMoreNotifications}
+                  disabled={loadingMore}
+                  className="w-full py-2 text-sm text-gray-600 hover:text-gray-800 hebrew-text disabled:opacity-50"
+                >
+                  {loadingMore ? 'טוען...' : 'טען התראות נוספות'}
+                </button>
+              )}
             </div>
           )}
         </div>
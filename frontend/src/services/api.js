@@ -132,6 +132,40 @@ export const taskAPI = {
     return response.data
   },
 
+  // Get one page of tasks (keyset pagination); pass the previous next_cursor to continue
+  getTasksPage: async (cursor = null, pageSize = 50) => {
+    const params = { page_size: pageSize }
+    if (cursor) {
+      params.cursor = cursor
+    }
+    const response = await api.get('/tasks/', { params })
+    return response.data
+  },
+
+  // Get tasks changed/deleted since a cursor (full snapshot when cursor is null)
+  getTaskChanges: async (since) => {
+    const response = await api.get('/tasks/changes/', { params: since ? { since } : {} })
+    return response.data
+  },
+
+  // Sidebar counters (today, overdue, upcoming, inbox, projects)
+  getTaskCounts: async () => {
+    const response = await api.get('/tasks/counts/')
+    return response.data
+  },
+
+  // Full-text search (ranked); pass the page number to load more
+  searchTasks: async (query, page = 1, pageSize = 20) => {
+    const response = await api.get('/tasks/search/', { params: { q: query, page, page_size: pageSize } })
+    return response.data
+  },
+
+  // Apply many create/update/toggle/delete operations in one request
+  batchTasks: async (operations) => {
+    const response = await api.post('/tasks/batch/', { operations })
+    return response.data
+  },
+
   // Create new task
   createTask: async (taskData) => {
     try {
@@ -198,6 +232,12 @@ export const taskAPI = {
     await api.delete(`/tasks/${taskId}/`)
   },
 
+  // Move a task between two neighbours of its list (null = start/end)
+  moveTask: async (taskId, previousId = null, nextId = null) => {
+    const response = await api.post(`/tasks/${taskId}/move/`, { previous_id: previousId, next_id: nextId })
+    return response.data
+  },
+
   // Create sub-task
   createSubtask: async (parentTaskId, subtaskData) => {
     const response = await api.post(`/tasks/${parentTaskId}/create_subtask/`, subtaskData)
@@ -375,9 +415,10 @@ export const userAPI = {
 }
 
 export const notificationAPI = {
-  // Get all notifications
-  getNotifications: async () => {
-    const response = await api.get('/notifications/')
+  // Get a page of notifications (newest first): {next_cursor, results}
+  getNotifications: async (cursor = null) => {
+    const params = cursor ? { cursor } : {}
+    const response = await api.get('/notifications/', { params })
     return response.data
   },
 
@@ -412,4 +453,68 @@ export const notificationAPI = {
   }
 }
 
+// Server-sent events: one shared /api/events/ connection for all subscribers.
+// Listeners get the server events ({type: 'notification' | 'tasks_changed' | 'projects_changed', ...})
+// plus 'stream_open' (also after reconnects - refetch what may have been missed)
+// and 'stream_closed' (the server can't stream, e.g. a WSGI deployment - fall back to polling)
+const SERVER_EVENT_TYPES = ['notification', 'tasks_changed', 'projects_changed']
+const eventListeners = new Set()
+let eventSource = null
+// Set once the server refused the stream, so re-subscribing doesn't retry it
+let eventStreamUnavailable = typeof EventSource === 'undefined'
+
+const emitEvent = (event) => {
+  eventListeners.forEach(listener => {
+    try {
+      listener(event)
+    } catch (error) {
+      console.error('Event listener failed:', error)
+    }
+  })
+}
+
+const openEventStream = () => {
+  if (eventSource || eventStreamUnavailable) {
+    return
+  }
+  eventSource = new EventSource(`${API_BASE_URL}/events/`, { withCredentials: true })
+  eventSource.onopen = () => emitEvent({ type: 'stream_open' })
+  eventSource.onerror = () => {
+    // EventSource retries network errors by itself; CLOSED means the server refused the stream
+    if (eventSource && eventSource.readyState === EventSource.CLOSED) {
+      eventSource = null
+      eventStreamUnavailable = true
+      emitEvent({ type: 'stream_closed' })
+    }
+  }
+  SERVER_EVENT_TYPES.forEach(type => {
+    eventSource.addEventListener(type, (message) => {
+      try {
+        emitEvent(JSON.parse(message.data))
+      } catch (error) {
+        console.error('Invalid event payload:', error)
+      }
+    })
+  })
+}
+
+export const eventsAPI = {
+  // Subscribe to the event stream; returns an unsubscribe function
+  subscribe: (listener) => {
+    eventListeners.add(listener)
+    if (eventStreamUnavailable) {
+      listener({ type: 'stream_closed' })
+    } else {
+      openEventStream()
+    }
+    return () => {
+      eventListeners.delete(listener)
+      if (eventListeners.size === 0 && eventSource) {
+        eventSource.close()
+        eventSource = null
+      }
+    }
+  }
+}
+
 export default api
@@ -0,0 +1,39 @@
+#!/bin/bash
+# Start script for Railway deployment
+# The database is SQLite on the web container's disk, so the background
+# workers from the Procfile run here next to the web server instead of as
+# separate Railway services (which would not see the same database file).
+set -e
+
+python manage.py migrate
+
+# Restart a worker whenever it exits, without taking the web server down
+run_worker() {
+    while true; do
+        python manage.py "$@" || echo "⚠️ Worker '$*' exited with status $?, restarting in 5s"
+        sleep 5
+    done
+}
+
+# Run a one-shot maintenance command every N seconds (cron entries in DEPLOYMENT_GUIDE.md)
+run_every() {
+    local interval=$1
+    shift
+    while true; do
+        python manage.py "$@" || echo "⚠️ '$*' failed with status $?"
+        sleep "$interval"
+    done
+}
+
+echo "📧 Starting email outbox worker..."
+run_worker send_outbox_emails &
+
+echo "📅 Starting calendar sync worker..."
+run_worker sync_calendars &
+
+echo "🔁 Scheduling maintenance commands..."
+run_every 3600 materialize_recurring_tasks &
+run_every 86400 cleanup_task_deletions &
+run_every 86400 rebalance_task_ranks &
+
+exec uvicorn todofast.asgi:application --host 0.0.0.0 --port $PORT
@@ -0,0 +1,110 @@
+"""
+Project access resolution shared by views, serializers and models.
+
+ProjectAccess loads a user's accessible project ids and roles ('owner' or
+'shared') from the materialized ProjectMembership table once and memoizes them
+on the request. With a shared cache (Redis, see CACHES) they are also cached
+across requests. Cache entries are versioned: membership changes bump the
+user's version (see todo.signals) and bulk rebuilds bump a global version, so
+stale entries are never read and simply expire. A per-process cache (LocMem)
+is never used: bumps made by another process (workers, management commands)
+would not reach it and revoked access would keep passing checks.
+"""
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from .models import ProjectMembership
+
+GLOBAL_VERSION_KEY = 'project_access_version'
+
+
+def _user_version_key(user_id):
+    return f'project_access_version:{user_id}'
+
+
+def _cache_enabled():
+    """Only a cache shared by every process can be invalidated reliably"""
+    return (
+        getattr(settings, 'PROJECT_ACCESS_CACHE_TIMEOUT', 600) > 0
+        and not isinstance(caches['default'], LocMemCache)
+    )
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Missing key: start a fresh version (any non-default value invalidates)
+        cache.set(key, 1, None)
+
+
+def invalidate_project_access(user_ids=None):
+    """Invalidate cached access of the given users, or of everyone when user_ids is None"""
+    if not _cache_enabled():
+        return
+    if user_ids is None:
+        _bump(GLOBAL_VERSION_KEY)
+        return
+    for user_id in set(user_ids):
+        _bump(_user_version_key(user_id))
+
+
+class ProjectAccess:
+    """Accessible projects of one user; build it with ProjectAccess.for_request() in views"""
+
+    def __init__(self, user):
+        self.user = user
+        self._roles = None
+
+    @classmethod
+    def for_request(cls, request):
+        """One resolver per request, shared by the view and its serializers"""
+        access = getattr(request, '_project_access', None)
+        if access is None or access.user != request.user:
+            access = cls(request.user)
+            request._project_access = access
+        return access
+
+    @property
+    def roles(self):
+        """{project_id: 'owner' | 'shared'}"""
+        if self._roles is None:
+            self._roles = self._load_roles()
+        return self._roles
+
+    def _load_roles(self):
+        if not getattr(self.user, 'is_authenticated', False):
+            return {}
+        if not _cache_enabled():
+            return self._query_roles()
+        versions = cache.get_many([GLOBAL_VERSION_KEY, _user_version_key(self.user.id)])
+        key = 'project_access:{}:{}:{}'.format(
+            self.user.id,
+            versions.get(GLOBAL_VERSION_KEY, 0),
+            versions.get(_user_version_key(self.user.id), 0)
+        )
+        roles = cache.get(key)
+        if roles is None:
+            roles = self._query_roles()
+            cache.set(key, roles, getattr(settings, 'PROJECT_ACCESS_CACHE_TIMEOUT', 600))
+        return roles
+
+    def _query_roles(self):
+        return dict(ProjectMembership.objects.filter(user=self.user).values_list('project_id', 'role'))
+
+    def project_ids(self):
+        return list(self.roles)
+
+    def role(self, project):
+        project_id = getattr(project, 'pk', project)
+        return self.roles.get(project_id)
+
+    def can_access(self, project):
+        return self.role(project) is not None
+
+    def is_owner(self, project):
+        return self.role(project) == 'owner'
+
+    def is_shared(self, project):
+        return self.role(project) == 'shared'
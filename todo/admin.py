@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Project, Task, Label, Comment, UserProfile, Team, GoogleCalendarToken
+from .models import Project, Task, Label, Comment, UserProfile, Team, GoogleCalendarToken, EmailOutbox
 
 
 @admin.register(UserProfile)
@@ -61,7 +61,15 @@ class TeamAdmin(admin.ModelAdmin):
 
 @admin.register(GoogleCalendarToken)
 class GoogleCalendarTokenAdmin(admin.ModelAdmin):
-    list_display = ['user', 'is_active', 'expiry', 'created_at', 'updated_at']
+    list_display = ['user', 'is_active', 'expiry', 'last_sync_time', 'next_sync_at', 'sync_failures', 'updated_at']
     list_filter = ['is_active', 'created_at']
     search_fields = ['user__username', 'user__email']
     readonly_fields = ['created_at', 'updated_at', 'access_token', 'refresh_token']
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ['to_email', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['to_email', 'subject']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
@@ -12,6 +12,7 @@ from .calendar_views import (
     sync_task_to_calendar, sync_all_tasks, get_calendar_events, get_csrf_token,
     sync_calendar_incremental, get_specific_event
 )
+from .event_views import event_stream
 
 router = DefaultRouter()
 router.register(r'tasks', TaskViewSet, basename='task')
@@ -25,6 +26,7 @@ router.register(r'project-shares', ProjectShareViewSet, basename='projectshare')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('events/', event_stream, name='event_stream'),
     path('auth/register/', register_user, name='register'),
     path('auth/login/', login_user, name='login'),
     path('auth/google-login/', google_login, name='google_login'),
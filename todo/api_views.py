@@ -1,12 +1,17 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action, api_view, permission_classes, authentication_classes
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
 from django.utils import timezone
 from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from datetime import datetime, timedelta
-from .models import Task, Project, Label, UserProfile, Team, Friend, FriendInvitation, Notification, ProjectShare
+from .models import (
+    Task, TaskDeletion, Project, Label, UserProfile, Team, Friend, FriendInvitation, Notification, ProjectShare,
+    NotificationCounter, EmailOutbox, ProjectAccessRevocation
+)
 from io import BytesIO
 from django.core.files.base import ContentFile
 from django.views.decorators.csrf import csrf_exempt
@@ -21,9 +26,29 @@ from .serializers import (
     NotificationSerializer, ProjectShareSerializer
 )
 from django.utils.timezone import now
+from .pagination import TaskKeysetPagination, NotificationCursorPagination
+from .dates import user_today_range
+from .task_tree import attach_subtask_trees
+from .search import index_tasks, search_task_ids
+from .counters import get_task_counts, invalidate_counts_for_tasks
+from .events import publish_notifications, publish_task_changes
+from .ranking import RANK_MAX_LENGTH, assign_append_ranks, rank_between, rebalance
+from .access import ProjectAccess
+
+def optimize_task_queryset(queryset):
+    """
+    Load everything TaskSerializer reads in a constant number of queries:
+    project/owner joined and labels prefetched. The subtask tree is attached
+    at serialization time by task_tree.attach_subtask_trees (one recursive query).
+    """
+    return queryset.select_related('project', 'owner').prefetch_related('labels')
+
 
 class TaskViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TaskKeysetPagination
+    BATCH_OPERATIONS = ('create', 'update', 'toggle', 'delete')
+    BATCH_MAX_OPERATIONS = 500
     
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -36,15 +61,28 @@ class TaskViewSet(viewsets.ModelViewSet):
         # 1. Owned by user
         # 2. In projects owned by user (regardless of task owner)
         # 3. In projects shared with user
-        return Task.objects.filter(
+        # (2) and (3) come from the cached ProjectAccess ids, so no join/DISTINCT
+        queryset = Task.objects.filter(
             models.Q(owner=user) |
-            models.Q(project__owner=user) |
-            models.Q(project__shares__shared_with=user, project__shares__status='accepted')
-        ).distinct().order_by('-created_at')
+            models.Q(project_id__in=ProjectAccess.for_request(self.request).project_ids())
+        ).order_by('-created_at')
+        # These actions don't serialize the looked-up task with TaskSerializer
+        if self.action in ['update', 'partial_update', 'destroy', 'create_subtask', 'subtasks', 'batch', 'move']:
+            return queryset
+        return optimize_task_queryset(queryset)
     
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
+    def list_response(self, tasks, ordering=None):
+        """Serialize a task list, paginated when the client asked for a page"""
+        page = self.paginator.paginate_queryset(tasks, self.request, view=self, ordering=ordering)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(tasks, many=True)
+        return Response(serializer.data)
+
     def create(self, request, *args, **kwargs):
         try:
             serializer = TaskCreateUpdateSerializer(data=request.data, context={'request': request})
@@ -55,83 +93,126 @@ class TaskViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({'detail': f'Task create failed: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Delta sync: tasks created/updated since the `since` cursor plus ids of deleted tasks.
+        Without a cursor (or with one older than the tombstone retention, or after the user
+        lost access to a project) a full snapshot is returned with `full_sync: true`.
+        """
+        from django.conf import settings
+        from django.utils.dateparse import parse_datetime
 
-def seed_default_data_for_user(user: User) -> None:
-    """Create a small set of default projects and tasks for a brand-new user.
-    Safe to call multiple times; it won't duplicate if projects already exist.
-    """
-    try:
-        # If the user already has any project, assume seeded
-        if Project.objects.filter(owner=user).exists() or Task.objects.filter(owner=user).exists():
-            return
+        user = request.user
+        # updated_at is stamped before a write commits, so a row can become visible after a
+        # cursor later than its timestamp was handed out. Step the cursor back by a margin so
+        # those rows are re-sent next time; the client merges by id, so overlaps are harmless.
+        now_ts = timezone.now()
+        margin = getattr(settings, 'TASK_SYNC_CURSOR_MARGIN_SECONDS', 60)
+        next_cursor = now_ts - timedelta(seconds=margin)
+        retention_days = getattr(settings, 'TASK_DELETION_RETENTION_DAYS', 30)
 
-        # Create two basic projects
-        inbox_project = Project.objects.create(
-            name='תיבת הדואר',
-            description='משימות ראשוניות והערות מהירות',
-            color='#4073FF',
-            owner=user
-        )
-        personal_project = Project.objects.create(
-            name='אישי',
-            description='משימות לבית וליום יום',
-            color='#DB4035',
-            owner=user
-        )
+        since_param = request.query_params.get('since')
+        since = None
+        if since_param:
+            since = parse_datetime(since_param)
+            if since is None:
+                return Response({'error': 'Invalid since cursor'}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+
+        full_sync = since is None or since < now_ts - timedelta(days=retention_days)
+        # Tombstones of a project the user lost are no longer visible to them: resend everything
+        if not full_sync and ProjectAccessRevocation.objects.filter(user_id=user.id, revoked_at__gte=since).exists():
+            full_sync = True
+        tasks = self.get_queryset()
+        deleted_ids = []
+
+        if not full_sync:
+            # Tasks of projects shared with the user since the cursor are new to them
+            # even though their own updated_at is older
+            newly_shared_project_ids = ProjectShare.objects.filter(
+                shared_with=user,
+                status='accepted',
+                accepted_at__gte=since
+            ).values_list('project_id', flat=True)
+            tasks = tasks.filter(
+                models.Q(updated_at__gte=since) |
+                models.Q(project_id__in=newly_shared_project_ids)
+            )
+
+            accessible_project_ids = ProjectAccess.for_request(request).project_ids()
+            deleted_ids = list(
+                TaskDeletion.objects.filter(deleted_at__gte=since).filter(
+                    models.Q(owner_id=user.id) |
+                    models.Q(project_id__in=accessible_project_ids)
+                ).values_list('task_id', flat=True).distinct()
+            )
+
+        serializer = TaskSerializer(tasks, many=True, context={'request': request})
+        # A task moved between two projects the user sees has a tombstone and is still visible
+        changed_ids = {task['id'] for task in serializer.data}
+        return Response({
+            'tasks': serializer.data,
+            'deleted': [task_id for task_id in deleted_ids if task_id not in changed_ids],
+            'cursor': next_cursor.isoformat(),
+            'full_sync': full_sync
+        })
+
+    @action(detail=False, methods=['get'])
+    def counts(self, request):
+        """Sidebar counters: today, overdue, upcoming, inbox and open tasks per project"""
+        return Response(get_task_counts(request.user, ProjectAccess.for_request(request)))
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Full-text search over title, description and label names (see todo.search).
+        Params: q, page (1-based), page_size. Results are ordered by relevance.
+        """
+        query = request.query_params.get('q', '').strip()
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = min(max(int(request.query_params.get('page_size', 20)), 1), 100)
+        except ValueError:
+            return Response({'error': 'page and page_size must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if not query:
+            return Response({'next': None, 'results': []})
+
+        # One extra row tells whether another page exists
+        task_ids = search_task_ids(query, self.get_queryset(), limit=page_size + 1, offset=(page - 1) * page_size)
+        has_next = len(task_ids) > page_size
+        task_ids = task_ids[:page_size]
+
+        tasks_by_id = optimize_task_queryset(Task.objects.filter(id__in=task_ids)).in_bulk()
+        tasks = [tasks_by_id[task_id] for task_id in task_ids if task_id in tasks_by_id]
+        serializer = TaskSerializer(tasks, many=True, context={'request': request})
+        next_url = None
+        if has_next:
+            next_url = replace_query_param(request.build_absolute_uri(), 'page', page + 1)
+        return Response({'next': next_url, 'results': serializer.data})
 
-        # Helper to create tasks with due dates
-        today = now()
-        Task.objects.create(
-            title='ברוך הבא ל-TodoFast',
-            description='התחל ביצירת משימה חדשה או עריכת משימה קיימת',
-            project=inbox_project,
-            owner=user,
-            priority=2
-        )
-        Task.objects.create(
-            title='בדוק את המשימות להיום',
-            description='פתח את תצוגת היום כדי לראות משימות דחופות',
-            project=personal_project,
-            owner=user,
-            priority=3,
-            due_date=today
-        )
-        Task.objects.create(
-            title='הוסף פרויקט חדש',
-            description='ארגן משימות לפי פרויקטים כדי לשמור על סדר',
-            project=personal_project,
-            owner=user,
-            priority=1
-        )
-    except Exception:
-        # Do not block registration/login on seeding errors
-        pass
-    
     @action(detail=False, methods=['get'])
     def today(self, request):
-        """Get today's tasks (Israel timezone)"""
-        from zoneinfo import ZoneInfo
-        israel_tz = ZoneInfo('Asia/Jerusalem')
-        israel_now = timezone.now().astimezone(israel_tz)
-        today = israel_now.date()
+        """Get today's tasks (in the user's timezone)"""
+        day_start, day_end = user_today_range(request.user)
         
         tasks = self.get_queryset().filter(
-            due_date__date=today,
+            due_date__gte=day_start,
+            due_date__lt=day_end,
             is_completed=False
         )
-        serializer = self.get_serializer(tasks, many=True)
-        return Response(serializer.data)
+        return self.list_response(tasks)
     
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
-        """Get upcoming tasks"""
-        today = timezone.now().date()
+        """Get upcoming tasks (due after today in the user's timezone)"""
+        _, day_end = user_today_range(request.user)
         tasks = self.get_queryset().filter(
-            due_date__gt=today,
+            due_date__gte=day_end,
             is_completed=False
         ).order_by('due_date')
-        serializer = self.get_serializer(tasks, many=True)
-        return Response(serializer.data)
+        return self.list_response(tasks, ordering=('due_date', 'id'))
     
     @action(detail=False, methods=['get'])
     def inbox(self, request):
@@ -140,8 +221,7 @@ def seed_default_data_for_user(user: User) -> None:
             project__isnull=True,
             is_completed=False
         )
-        serializer = self.get_serializer(tasks, many=True)
-        return Response(serializer.data)
+        return self.list_response(tasks)
     
     @action(detail=True, methods=['post', 'patch'])
     def toggle(self, request, pk=None):
@@ -157,11 +237,218 @@ def seed_default_data_for_user(user: User) -> None:
                 task.completed_at = None
                 
             task.save()
+            if task.is_completed:
+                task.extend_recurrence()
             serializer = self.get_serializer(task)
             return Response(serializer.data)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Apply many create/update/toggle/delete operations in one transaction.
+
+        Body: {"operations": [{"op": "create", "data": {...}},
+                              {"op": "update", "id": 5, "data": {"rank": "i5"}},
+                              {"op": "toggle", "id": 6},
+                              {"op": "delete", "id": 7}]}
+        All operations are validated first; if any fails nothing is written.
+        """
+        operations = request.data.get('operations')
+        if not isinstance(operations, list) or not operations:
+            return Response({'error': 'operations must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(operations) > self.BATCH_MAX_OPERATIONS:
+            return Response(
+                {'error': f'At most {self.BATCH_MAX_OPERATIONS} operations per batch'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        def operation_task_id(operation):
+            try:
+                return int(operation.get('id'))
+            except (AttributeError, TypeError, ValueError):
+                return None
+
+        # Load every referenced task with a single visibility-filtered query
+        operation_ids = [operation_task_id(operation) for operation in operations]
+        tasks_by_id = self.get_queryset().in_bulk({task_id for task_id in operation_ids if task_id})
+        deleted_ids = {
+            task_id for operation, task_id in zip(operations, operation_ids)
+            if task_id in tasks_by_id and operation.get('op') == 'delete'
+        }
+
+        results = []
+        prepared = []
+        has_errors = False
+        for index, operation in enumerate(operations):
+            result = {'index': index}
+            results.append(result)
+            op = operation.get('op') if isinstance(operation, dict) else None
+            result['op'] = op
+            if op not in self.BATCH_OPERATIONS:
+                result['errors'] = {'op': [f'Must be one of {", ".join(self.BATCH_OPERATIONS)}']}
+                has_errors = True
+                continue
+
+            task = None
+            if op != 'create':
+                task = tasks_by_id.get(operation_ids[index])
+                if task is None:
+                    result['errors'] = {'id': ['Task not found']}
+                    has_errors = True
+                    continue
+                result['id'] = task.id
+                if op != 'delete' and task.id in deleted_ids:
+                    result['errors'] = {'id': ['Task is deleted in the same batch']}
+                    has_errors = True
+                    continue
+
+            serializer = None
+            if op in ('create', 'update'):
+                serializer = TaskCreateUpdateSerializer(
+                    instance=task,
+                    data=operation.get('data') or {},
+                    partial=op == 'update',
+                    context={'request': request}
+                )
+                if not serializer.is_valid():
+                    result['errors'] = serializer.errors
+                    has_errors = True
+                    continue
+            prepared.append((result, op, task, serializer))
+
+        if has_errors:
+            return Response({'results': results}, status=status.HTTP_400_BAD_REQUEST)
+
+        now_ts = timezone.now()
+        to_create = []
+        to_update = {}
+        update_fields = set()
+        label_sets = []
+        completed_tasks = []
+
+        for result, op, task, serializer in prepared:
+            if op == 'create':
+                task, _, labels = serializer.prepare_instance(owner=request.user)
+                to_create.append((result, task))
+                if labels:
+                    label_sets.append((task, labels))
+                continue
+            if op == 'delete':
+                result['status'] = 'deleted'
+                continue
+            if op == 'update':
+                task, fields, labels = serializer.prepare_instance(instance=task)
+                update_fields.update(fields)
+                if labels is not None:
+                    label_sets.append((task, labels))
+            else:
+                task.is_completed = not task.is_completed
+                task.completed_at = now_ts if task.is_completed else None
+                update_fields.update(['is_completed', 'completed_at'])
+                if task.is_completed:
+                    completed_tasks.append(task)
+            # bulk_update skips auto_now, but delta sync relies on updated_at
+            task.updated_at = now_ts
+            to_update[task.id] = task
+            result['status'] = 'updated'
+
+        # bulk_create skips Task.save, so append unranked tasks to their lists here
+        assign_append_ranks([task for _, task in to_create])
+
+        with transaction.atomic():
+            if to_create:
+                Task.objects.bulk_create([task for _, task in to_create])
+                for result, task in to_create:
+                    result['id'] = task.id
+                    result['status'] = 'created'
+            if to_update:
+                update_fields.add('updated_at')
+                Task.objects.bulk_update(list(to_update.values()), sorted(update_fields))
+            if label_sets:
+                through = Task.labels.through
+                through.objects.filter(task_id__in=[task.id for task, _ in label_sets]).delete()
+                through.objects.bulk_create([
+                    through(task_id=task.id, label_id=label.id)
+                    for task, labels in label_sets
+                    for label in labels
+                ], ignore_conflicts=True)
+            if deleted_ids:
+                # Queryset delete still sends post_delete, so tombstones are recorded
+                Task.objects.filter(id__in=deleted_ids).delete()
+            for task in completed_tasks:
+                if task.id not in deleted_ids:
+                    task.extend_recurrence()
+            # Bulk writes skip the post_save/m2m signals that maintain search documents and counters
+            invalidate_counts_for_tasks([task for _, task in to_create] + list(to_update.values()))
+            publish_task_changes([task for _, task in to_create] + list(to_update.values()))
+            index_tasks(
+                [task.id for _, task in to_create] +
+                [task.id for _, op, task, _ in prepared if op == 'update' and task.id not in deleted_ids]
+            )
+
+        # Serialize all written tasks together
+        written_ids = [result['id'] for result in results if result.get('status') in ('created', 'updated')]
+        written = optimize_task_queryset(Task.objects.filter(id__in=written_ids))
+        serialized = {
+            item['id']: item
+            for item in TaskSerializer(written, many=True, context={'request': request}).data
+        }
+        for result in results:
+            if result.get('status') in ('created', 'updated'):
+                result['task'] = serialized.get(result['id'])
+        return Response({'results': results})
+    
+    @action(detail=True, methods=['post'])
+    def move(self, request, pk=None):
+        """
+        Place a task between two neighbours of its list by rewriting only its rank.
+        Body: {"previous_id": <task above or null>, "next_id": <task below or null>}
+        """
+        task = self.get_object()
+        neighbours = {}
+        for key in ('previous_id', 'next_id'):
+            neighbour_id = request.data.get(key)
+            if neighbour_id in (None, ''):
+                neighbours[key] = None
+                continue
+            try:
+                neighbour = self.get_queryset().get(pk=neighbour_id)
+            except (Task.DoesNotExist, ValueError, TypeError):
+                return Response({'error': f'{key} not found'}, status=status.HTTP_404_NOT_FOUND)
+            if neighbour.pk == task.pk or (neighbour.project_id, neighbour.parent_task_id) != (task.project_id, task.parent_task_id):
+                return Response({'error': 'Neighbours must be other tasks of the same list'}, status=status.HTTP_400_BAD_REQUEST)
+            neighbours[key] = neighbour
+
+        def rank_between_neighbours():
+            before = neighbours['previous_id'].rank if neighbours['previous_id'] else None
+            after = neighbours['next_id'].rank if neighbours['next_id'] else None
+            try:
+                rank = rank_between(before, after)
+            except ValueError:
+                # Neighbours share a rank or are out of order
+                return None
+            return rank if len(rank) <= RANK_MAX_LENGTH else None
+
+        rank = rank_between_neighbours()
+        if rank is None:
+            # Rare: make room by rewriting the whole list, then retry
+            with transaction.atomic():
+                rebalanced = {t.pk: t for t in rebalance(task.get_siblings())}
+            for key, neighbour in neighbours.items():
+                if neighbour is not None:
+                    neighbours[key] = rebalanced.get(neighbour.pk, neighbour)
+            rank = rank_between_neighbours()
+            if rank is None:
+                return Response({'error': 'previous_id must come before next_id'}, status=status.HTTP_400_BAD_REQUEST)
+
+        task.rank = rank
+        task.updated_at = timezone.now()
+        # Single-row UPDATE; siblings keep their ranks
+        Task.objects.filter(pk=task.pk).update(rank=task.rank, updated_at=task.updated_at)
+        return Response(TaskSerializer(task, context={'request': request}).data)
+    
     @action(detail=True, methods=['post'])
     def create_subtask(self, request, pk=None):
         """Create a sub-task for this task"""
@@ -188,16 +475,97 @@ def seed_default_data_for_user(user: User) -> None:
     def subtasks(self, request, pk=None):
         """Get all sub-tasks for this task"""
         parent_task = self.get_object()
-        subtasks = parent_task.subtasks.all().order_by('order', 'created_at')
-        serializer = TaskSerializer(subtasks, many=True)
+        attach_subtask_trees([parent_task])
+        serializer = TaskSerializer(parent_task.subtasks.all(), many=True)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def main_tasks(self, request):
         """Get only main tasks (not sub-tasks)"""
         tasks = self.get_queryset().filter(parent_task__isnull=True)
-        serializer = self.get_serializer(tasks, many=True)
-        return Response(serializer.data)
+        return self.list_response(tasks)
+
+
+def seed_default_data_for_user(user: User) -> None:
+    """Create a small set of default projects and tasks for a brand-new user.
+    Safe to call multiple times; it won't duplicate if projects already exist.
+    """
+    try:
+        # If the user already has any project, assume seeded
+        if Project.objects.filter(owner=user).exists() or Task.objects.filter(owner=user).exists():
+            return
+
+        # Create two basic projects
+        inbox_project = Project.objects.create(
+            name='תיבת הדואר',
+            description='משימות ראשוניות והערות מהירות',
+            color='#4073FF',
+            owner=user
+        )
+        personal_project = Project.objects.create(
+            name='אישי',
+            description='משימות לבית וליום יום',
+            color='#DB4035',
+            owner=user
+        )
+
+        # Helper to create tasks with due dates
+        today = now()
+        Task.objects.create(
+            title='ברוך הבא ל-TodoFast',
+            description='התחל ביצירת משימה חדשה או עריכת משימה קיימת',
+            project=inbox_project,
+            owner=user,
+            priority=2
+        )
+        Task.objects.create(
+            title='בדוק את המשימות להיום',
+            description='פתח את תצוגת היום כדי לראות משימות דחופות',
+            project=personal_project,
+            owner=user,
+            priority=3,
+            due_date=today
+        )
+        Task.objects.create(
+            title='הוסף פרויקט חדש',
+            description='ארגן משימות לפי פרויקטים כדי לשמור על סדר',
+            project=personal_project,
+            owner=user,
+            priority=1
+        )
+    except Exception:
+        # Do not block registration/login on seeding errors
+        pass
+
+
+def optimize_project_queryset(queryset):
+    """
+    Load everything ProjectSerializer reads in a constant number of queries:
+    open task and accepted share counts annotated, owner joined, members,
+    accepted shares (with shared_with) and the team (with its counts) prefetched.
+    """
+    open_tasks = Task.objects.filter(
+        project=models.OuterRef('pk'), is_completed=False
+    ).order_by().values('project').annotate(total=models.Count('pk')).values('total')
+    accepted_shares = ProjectShare.objects.filter(
+        project=models.OuterRef('pk'), status='accepted'
+    ).order_by().values('project').annotate(total=models.Count('pk')).values('total')
+    teams = Team.objects.select_related('owner').prefetch_related('members').annotate(
+        projects_total=models.Count('projects')
+    )
+    return queryset.annotate(
+        open_tasks_total=Coalesce(models.Subquery(open_tasks), 0),
+        accepted_shares_total=Coalesce(models.Subquery(accepted_shares), 0),
+    ).select_related('owner').prefetch_related(
+        'members',
+        models.Prefetch('team', queryset=teams),
+        models.Prefetch(
+            'shares',
+            queryset=ProjectShare.objects.filter(status='accepted').select_related('shared_with'),
+            to_attr='accepted_shares'
+        ),
+    )
+
 
 class ProjectViewSet(viewsets.ModelViewSet):
     serializer_class = ProjectSerializer
@@ -205,11 +573,15 @@ class ProjectViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         user = self.request.user
-        # Return projects owned by user OR shared with user
-        return Project.objects.filter(
-            models.Q(owner=user) | 
-            models.Q(shares__shared_with=user, shares__status='accepted')
-        ).distinct().order_by('name')
+        # Return projects owned by user OR shared with user (cached by ProjectAccess)
+        queryset = Project.objects.filter(
+            models.Q(owner=user) |
+            models.Q(id__in=ProjectAccess.for_request(self.request).project_ids())
+        ).order_by('name')
+        # These actions don't serialize the looked-up project with ProjectSerializer
+        if self.action in ['add_member', 'remove_member', 'tasks', 'share', 'leave', 'destroy']:
+            return queryset
+        return optimize_project_queryset(queryset)
     
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
@@ -220,7 +592,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         project = self.get_object()
         
         # Check if user is owner
-        if project.owner != request.user:
+        if not ProjectAccess.for_request(request).is_owner(project):
             return Response(
                 {'error': 'Only project owner can add members'}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -262,7 +634,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         project = self.get_object()
         
         # Check if user is owner
-        if project.owner != request.user:
+        if not ProjectAccess.for_request(request).is_owner(project):
             return Response(
                 {'error': 'Only project owner can remove members'}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -290,10 +662,15 @@ class ProjectViewSet(viewsets.ModelViewSet):
     def tasks(self, request, pk=None):
         """Get all tasks for this project"""
         project = self.get_object()
-        tasks = Task.objects.filter(
+        tasks = optimize_task_queryset(Task.objects.filter(
             project=project,
             owner=request.user
-        ).order_by('-created_at')
+        )).order_by('-created_at')
+        paginator = TaskKeysetPagination()
+        page = paginator.paginate_queryset(tasks, request, view=self)
+        if page is not None:
+            serializer = TaskSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
         serializer = TaskSerializer(tasks, many=True)
         return Response(serializer.data)
     
@@ -303,7 +680,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         project = self.get_object()
         
         # Only owner can share
-        if project.owner != request.user:
+        if not ProjectAccess.for_request(request).is_owner(project):
             return Response({'error': 'רק בעל הפרויקט יכול לשתף אותו'}, 
                           status=status.HTTP_403_FORBIDDEN)
         
@@ -312,47 +689,57 @@ class ProjectViewSet(viewsets.ModelViewSet):
             return Response({'error': 'יש לבחור לפחות חבר אחד'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        shared_count = 0
-        for friend_id in friend_ids:
-            try:
-                friend = User.objects.get(id=friend_id)
-                
-                # Check if already shared
-                existing_share = ProjectShare.objects.filter(
-                    project=project,
-                    shared_with=friend
-                ).first()
-                
-                if existing_share:
-                    if existing_share.status == 'declined':
-                        # Re-share if previously declined
-                        existing_share.status = 'pending'
-                        existing_share.save()
-                    else:
-                        continue  # Skip if already pending or accepted
-                else:
-                    # Create new share
-                    existing_share = ProjectShare.objects.create(
+        try:
+            friend_ids = {int(friend_id) for friend_id in friend_ids}
+        except (TypeError, ValueError):
+            return Response({'error': 'מזהי חברים לא תקינים'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            # All friends and their existing shares in two queries
+            found_ids = set(User.objects.filter(id__in=friend_ids).values_list('id', flat=True))
+            existing_shares = {
+                share.shared_with_id: share
+                for share in ProjectShare.objects.select_for_update().filter(
+                    project=project, shared_with_id__in=found_ids
+                )
+            }
+
+            reshared = []
+            new_shares = []
+            for friend_id in found_ids:
+                existing_share = existing_shares.get(friend_id)
+                if existing_share is None:
+                    new_shares.append(ProjectShare(
                         project=project,
                         shared_by=request.user,
-                        shared_with=friend,
+                        shared_with_id=friend_id,
                         status='pending'
-                    )
-                
-                # Create notification
-                Notification.objects.create(
-                    user=friend,
+                    ))
+                elif existing_share.status == 'declined':
+                    # Re-share if previously declined
+                    existing_share.status = 'pending'
+                    reshared.append(existing_share)
+                # Skip if already pending or accepted
+
+            # Pending shares grant no access, so skipping the membership signals is safe
+            ProjectShare.objects.bulk_update(reshared, ['status'])
+            new_shares = ProjectShare.objects.bulk_create(new_shares)
+
+            sender_name = request.user.first_name or request.user.username
+            publish_notifications(Notification.create_many([
+                Notification(
+                    user_id=share.shared_with_id,
                     notification_type='project_share',
                     title='בקשת שיתוף פרויקט',
-                    message=f'{request.user.first_name or request.user.username} שיתף איתך את הפרויקט "{project.name}"',
+                    message=f'{sender_name} שיתף איתך את הפרויקט "{project.name}"',
                     related_project=project,
                     related_user=request.user,
-                    action_data={'share_id': existing_share.id}
+                    action_data={'share_id': share.id}
                 )
-                shared_count += 1
-                
-            except User.DoesNotExist:
-                continue
+                for share in reshared + new_shares
+            ]))
+        shared_count = len(reshared) + len(new_shares)
         
         return Response({
             'status': 'shared',
@@ -366,35 +753,32 @@ class ProjectViewSet(viewsets.ModelViewSet):
         project = self.get_object()
         
         # Owner cannot leave their own project
-        if project.owner == request.user:
+        if ProjectAccess.for_request(request).is_owner(project):
             return Response({'error': 'בעל הפרויקט לא יכול לעזוב את הפרויקט'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
         # Find and remove share
         try:
-            share = ProjectShare.objects.get(project=project, shared_with=request.user, status='accepted')
-            share.delete()
-            
-            # Notify owner
-            Notification.objects.create(
-                user=project.owner,
-                notification_type='member_left',
-                title='חבר עזב פרויקט',
-                message=f'{request.user.first_name or request.user.username} עזב את הפרויקט "{project.name}"',
-                related_project=project,
-                related_user=request.user
-            )
-            
-            # Notify other members
-            for member_share in project.shares.filter(status='accepted').exclude(shared_with=request.user):
-                Notification.objects.create(
-                    user=member_share.shared_with,
-                    notification_type='member_left',
-                    title='חבר עזב פרויקט',
-                    message=f'{request.user.first_name or request.user.username} עזב את הפרויקט "{project.name}"',
-                    related_project=project,
-                    related_user=request.user
-                )
+            with transaction.atomic():
+                share = ProjectShare.objects.get(project=project, shared_with=request.user, status='accepted')
+                share.delete()
+
+                # Notify owner and other members in one INSERT
+                member_ids = project.shares.filter(status='accepted').exclude(
+                    shared_with=request.user
+                ).values_list('shared_with_id', flat=True)
+                message = f'{request.user.first_name or request.user.username} עזב את הפרויקט "{project.name}"'
+                publish_notifications(Notification.create_many([
+                    Notification(
+                        user_id=user_id,
+                        notification_type='member_left',
+                        title='חבר עזב פרויקט',
+                        message=message,
+                        related_project=project,
+                        related_user=request.user
+                    )
+                    for user_id in [project.owner_id, *member_ids]
+                ]))
             
             return Response({'status': 'left project'})
         except ProjectShare.DoesNotExist:
@@ -744,7 +1128,7 @@ class FriendViewSet(viewsets.ModelViewSet):
         # Return all friendships where the user is either the user or the friend
         return Friend.objects.filter(
             models.Q(user=user) | models.Q(friend=user)
-        ).order_by('-created_at')
+        ).select_related('user', 'friend').order_by('-created_at')
     
     @action(detail=False, methods=['post'])
     def send_request(self, request):
@@ -758,7 +1142,7 @@ class FriendViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
-        email = request.data.get('email')
+        email = (request.data.get('email') or '').strip().lower()
         if not email:
             return Response(
                 {'error': 'אימייל נדרש'}, 
@@ -993,22 +1377,18 @@ class FriendViewSet(viewsets.ModelViewSet):
             אם הקישור לא עובד, העתק והדבק את הכתובת בדפדפן שלך.
             """
             
-            from django.core.mail import send_mail
-            from django.conf import settings
-            
-            send_mail(
+            # Queue the email; the send_outbox_emails worker delivers it
+            EmailOutbox.enqueue(
                 subject=subject,
                 message=text_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[invitee_email],
+                recipient=invitee_email,
                 html_message=html_message,
-                fail_silently=False
             )
             
-            print(f"   📧 Invitation email sent to {invitee_email}")
+            print(f"   📧 Invitation email queued for {invitee_email}")
             
         except Exception as e:
-            print(f"   ❌ Failed to send invitation email: {str(e)}")
+            print(f"   ❌ Failed to queue invitation email: {str(e)}")
             # Don't fail the request if email fails
     
     def send_simple_invitation_email(self, inviter, invitee_email):
@@ -1070,22 +1450,18 @@ class FriendViewSet(viewsets.ModelViewSet):
             כשתצטרף עם האימייל הזה ({invitee_email}), בקשת החברות תיווצר אוטומטית!
             """
             
-            from django.core.mail import send_mail
-            from django.conf import settings
-            
-            send_mail(
+            # Queue the email; the send_outbox_emails worker delivers it
+            EmailOutbox.enqueue(
                 subject=subject,
                 message=text_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[invitee_email],
+                recipient=invitee_email,
                 html_message=html_message,
-                fail_silently=False
             )
             
-            print(f"   📧 Simple invitation email sent to {invitee_email}")
+            print(f"   📧 Simple invitation email queued for {invitee_email}")
             
         except Exception as e:
-            print(f"   ❌ Failed to send simple invitation email: {str(e)}")
+            print(f"   ❌ Failed to queue simple invitation email: {str(e)}")
             # Don't fail the request if email fails
     
     @action(detail=True, methods=['post'])
@@ -1374,28 +1750,40 @@ class FriendViewSet(viewsets.ModelViewSet):
 class NotificationViewSet(viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationCursorPagination
     
     def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user)
+        queryset = Notification.objects.filter(user=self.request.user)
+        if self.action == 'list':
+            # NotificationSerializer reads the sender's name and avatar
+            queryset = queryset.select_related('related_user__profile')
+        return queryset
     
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
-        """Get count of unread notifications"""
-        count = self.get_queryset().filter(is_read=False).count()
-        return Response({'count': count})
+        """Get count of unread notifications (denormalized in NotificationCounter)"""
+        return Response({'count': NotificationCounter.unread_for(request.user)})
+
+    def _mark_read(self, notification):
+        """Conditional UPDATE so concurrent requests decrement the counter only once"""
+        with transaction.atomic():
+            if Notification.objects.filter(pk=notification.pk, is_read=False).update(is_read=True):
+                NotificationCounter.decrement(notification.user_id)
+        notification.is_read = notification._original_is_read = True
     
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
         """Mark notification as read"""
         notification = self.get_object()
-        notification.is_read = True
-        notification.save()
+        self._mark_read(notification)
         return Response({'status': 'marked as read'})
     
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
         """Mark all notifications as read"""
-        self.get_queryset().update(is_read=True)
+        with transaction.atomic():
+            marked = self.get_queryset().filter(is_read=False).update(is_read=True)
+            NotificationCounter.decrement(request.user.id, marked)
         return Response({'status': 'all marked as read'})
     
     @action(detail=True, methods=['post'])
@@ -1413,35 +1801,41 @@ class NotificationViewSet(viewsets.ModelViewSet):
                           status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            share = ProjectShare.objects.get(id=share_id, shared_with=request.user)
-            share.status = 'accepted'
-            share.accepted_at = timezone.now()
-            share.save()
-            
-            # Mark notification as read
-            notification.is_read = True
-            notification.save()
-            
-            # Create notification for project owner
-            Notification.objects.create(
-                user=share.shared_by,
-                notification_type='project_accepted',
-                title='שיתוף פרויקט התקבל',
-                message=f'{request.user.first_name or request.user.username} קיבל את הזמנתך לפרויקט "{share.project.name}"',
-                related_project=share.project,
-                related_user=request.user
-            )
-            
-            # Notify all other members
-            for member_share in share.project.shares.filter(status='accepted').exclude(shared_with=request.user):
-                Notification.objects.create(
-                    user=member_share.shared_with,
-                    notification_type='general',
-                    title='חבר חדש בפרויקט',
-                    message=f'{request.user.first_name or request.user.username} הצטרף לפרויקט "{share.project.name}"',
-                    related_project=share.project,
-                    related_user=request.user
-                )
+            with transaction.atomic():
+                share = ProjectShare.objects.select_related('project').get(id=share_id, shared_with=request.user)
+                share.status = 'accepted'
+                share.accepted_at = timezone.now()
+                share.save()
+
+                # Mark notification as read
+                self._mark_read(notification)
+
+                # Notify the project owner and all other members in one INSERT
+                member_ids = share.project.shares.filter(status='accepted').exclude(
+                    shared_with=request.user
+                ).values_list('shared_with_id', flat=True)
+                sender_name = request.user.first_name or request.user.username
+                publish_notifications(Notification.create_many([
+                    Notification(
+                        user_id=share.shared_by_id,
+                        notification_type='project_accepted',
+                        title='שיתוף פרויקט התקבל',
+                        message=f'{sender_name} קיבל את הזמנתך לפרויקט "{share.project.name}"',
+                        related_project=share.project,
+                        related_user=request.user
+                    ),
+                    *[
+                        Notification(
+                            user_id=user_id,
+                            notification_type='general',
+                            title='חבר חדש בפרויקט',
+                            message=f'{sender_name} הצטרף לפרויקט "{share.project.name}"',
+                            related_project=share.project,
+                            related_user=request.user
+                        )
+                        for user_id in member_ids
+                    ]
+                ]))
             
             return Response({
                 'status': 'accepted',
@@ -1471,8 +1865,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
             share.save()
             
             # Mark notification as read
-            notification.is_read = True
-            notification.save()
+            self._mark_read(notification)
             
             # Notify project owner
             Notification.objects.create(
@@ -1553,7 +1946,7 @@ def simple_db_check(request):
     @action(detail=False, methods=['post'])
     def test_registration_logic(self, request):
         """Test registration logic for a specific email"""
-        email = request.data.get('email')
+        email = (request.data.get('email') or '').strip().lower()
         if not email:
             return Response({'error': 'Email required'}, status=status.HTTP_400_BAD_REQUEST)
         
@@ -1733,84 +2126,12 @@ def register_user(request):
                     # Seed default data for this new user
                     seed_default_data_for_user(user)
                     
-                    # Check for friend invitations
-                    print("\n" + "=" * 80)
-                    print("💌 CHECKING FOR FRIEND INVITATIONS")
-                    print("=" * 80)
-                    
-                    friend_request_created = False
-                    invitation_token = request.data.get('invite_token')
-                    
-                    print(f"🔍 Registration debug for {user.email}:")
-                    print(f"   Invitation token: {invitation_token}")
-                    print(f"   Checking database for pending invitations...")
-                    
-                    # Always check for pending invitations by email (even without token)
-                    try:
-                        print(f"   Looking for pending invitations for email: {user.email}")
-                        
-                        # First, check ALL Friend records to see what exists
-                        all_friends = Friend.objects.all()
-                        print(f"   Total Friend records in DB: {all_friends.count()}")
-                        
-                        for f in all_friends:
-                            try:
-                                print(f"   - Friend record: user={f.user.email}, friend={f.friend.email if f.friend else 'None'}, friend_email={getattr(f, 'friend_email', 'NO COLUMN')}, is_invitation={getattr(f, 'is_invitation', 'NO COLUMN')}, status={f.status}")
-                            except Exception as e:
-                                print(f"   - Friend record: user={f.user.email}, error reading: {e}")
-                        
-                        # Look for pending friendship by email
-                        try:
-                            pending_friendship = Friend.objects.filter(
-                                friend_email=user.email,
-                                is_invitation=True,
-                                status='pending'
-                            ).first()
-                            print(f"   Query result - Found pending friendship: {pending_friendship}")
-                        except Exception as query_error:
-                            print(f"   ❌ Query failed: {query_error}")
-                            print(f"   This means the columns don't exist in the database!")
-                            pending_friendship = None
-                        
-                        print(f"   Final result - Found pending friendship: {pending_friendship}")
-                        
-                        if pending_friendship:
-                            print(f"   Inviter: {pending_friendship.user.email}")
-                            
-                            # Link the friendship to the new user
-                            pending_friendship.friend = user
-                            pending_friendship.is_invitation = False
-                            pending_friendship.save()
-                            friend_request_created = True
-                            
-                            print(f"✅ Friend request created for new user: {user.email}")
-                            
-                            # Create reciprocal friendship (so the new user can see the request)
-                            Friend.objects.get_or_create(
-                                user=user,
-                                friend=pending_friendship.user,
-                                defaults={'status': 'pending'}
-                            )
-                            
-                            print(f"✅ Reciprocal friend request created")
-                            
-                            # Mark FriendInvitation as used if it exists
-                            try:
-                                invitation = FriendInvitation.objects.get(
-                                    invitee_email=user.email,
-                                    is_used=False
-                                )
-                                invitation.mark_as_used()
-                                print(f"✅ Marked FriendInvitation as used")
-                            except FriendInvitation.DoesNotExist:
-                                print(f"   No FriendInvitation record found (that's okay)")
-                        else:
-                            print(f"   No pending invitation found for {user.email}")
-                            
-                    except Exception as e:
-                        print(f"❌ Error processing invitation: {str(e)}")
-                        import traceback
-                        traceback.print_exc()
+                    # Claim pending friend invitations sent to this email
+                    # (indexed lowercase lookup + bulk updates, same transaction)
+                    inviter_ids = Friend.claim_invitations(user)
+                    friend_request_created = bool(inviter_ids)
+                    if friend_request_created:
+                        print(f"✅ Linked {len(inviter_ids)} friend invitations to new user: {user.email}")
                     
                     # Return success response with verification message
                     response_data = {
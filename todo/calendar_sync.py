@@ -0,0 +1,123 @@
+"""
+Background Google Calendar sync, run by the sync_calendars worker.
+
+Every active GoogleCalendarToken has its own next_sync_at. The worker claims
+due rows by setting their sync_lease_until (SKIP LOCKED where the database
+supports it); the calendar view claims a user the same way before a background
+refresh, so one sync per user runs across all processes. The worker syncs a
+few users at a time and schedules each one's
+next run: the regular interval after a success, exponential backoff after a
+failure, both with per-user jitter so users don't all sync at the same moment.
+
+Syncs are incremental (per-calendar sync tokens). Calendars are downloaded in
+full only when their token expired (410) or when the synced window
+(synced_until) runs short. A sync where any calendar failed counts as a
+failure for the backoff, though the calendars that did sync are cached.
+"""
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection as db_connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .calendar_views import cache_events, run_calendar_sync
+from .models import GoogleCalendarToken
+
+# How long a claimed user is reserved for the worker that claimed it
+CLAIM_LEASE = timedelta(minutes=10)
+MAX_RETRY_DELAY = timedelta(hours=6)
+
+
+class CalendarSyncError(Exception):
+    """Some calendars of a user could not be fetched (403, 429, 5xx, ...)"""
+
+
+def next_sync_time(failures, now=None):
+    """Interval after a success, base, 2*base, 4*base, ... after failures; plus up to 10% jitter"""
+    now = now or timezone.now()
+    if failures:
+        base = getattr(settings, 'CALENDAR_SYNC_RETRY_SECONDS', 60)
+        delay = min(timedelta(seconds=base * 2 ** (failures - 1)), MAX_RETRY_DELAY)
+    else:
+        delay = timedelta(seconds=getattr(settings, 'CALENDAR_SYNC_INTERVAL_SECONDS', 900))
+    return now + delay * (1 + random.uniform(0, 0.1))
+
+
+def claim_due(batch_size, now=None):
+    now = now or timezone.now()
+    lease_until = now + CLAIM_LEASE
+    with transaction.atomic():
+        due = GoogleCalendarToken.objects.filter(
+            Q(next_sync_at__isnull=True) | Q(next_sync_at__lte=now),
+            Q(sync_lease_until__isnull=True) | Q(sync_lease_until__lte=now),
+            is_active=True
+        )
+        candidates = due.order_by(F('next_sync_at').asc(nulls_first=True))
+        if db_connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        token_ids = list(candidates.values_list('id', flat=True)[:batch_size])
+        if token_ids:
+            # The predicates again: without row locks, claim_sync may have taken
+            # one of these users since the SELECT
+            due.filter(id__in=token_ids).update(sync_lease_until=lease_until)
+    # Only the rows this call leased
+    return list(GoogleCalendarToken.objects.filter(
+        id__in=token_ids, sync_lease_until=lease_until
+    ).select_related('user'))
+
+
+def sync_user(calendar_token, now=None):
+    """Sync one claimed user, schedule the next run and release the claim; returns True on success"""
+    now = now or timezone.now()
+    user = calendar_token.user
+
+    # Renew the window before incremental syncs stop covering the coming months
+    future_days = getattr(settings, 'CALENDAR_SYNC_FUTURE_DAYS', 180)
+    renew_window = (
+        calendar_token.synced_until is not None
+        and calendar_token.synced_until < now + timedelta(days=future_days / 2)
+    )
+    try:
+        result = run_calendar_sync(user, force_full_sync=renew_window, raise_errors=True)
+        # Calendars that did sync are cached even if others failed; those
+        # downloaded in full lose the events deleted since their last sync
+        cache_events(user, result.events, result.downloaded)
+        if result.failed:
+            raise CalendarSyncError('; '.join(result.failed.values()))
+    except Exception as e:
+        calendar_token.sync_failures += 1
+        calendar_token.last_sync_error = str(e)[:2000]
+        calendar_token.next_sync_at = next_sync_time(calendar_token.sync_failures)
+        print(f"❌ Calendar sync failed for {user.email} ({calendar_token.sync_failures} in a row): {e}")
+        return False
+    else:
+        calendar_token.sync_failures = 0
+        calendar_token.last_sync_error = ''
+        calendar_token.next_sync_at = next_sync_time(0)
+        return True
+    finally:
+        calendar_token.sync_lease_until = None
+        # Only the schedule: the sync itself saved the tokens on its own instance
+        calendar_token.save(update_fields=['sync_failures', 'last_sync_error', 'next_sync_at', 'sync_lease_until'])
+
+
+def _sync_user_in_thread(calendar_token):
+    try:
+        return sync_user(calendar_token)
+    finally:
+        db_connection.close()
+
+
+def run_batch(batch_size=20, concurrency=None):
+    """Sync one batch of due users, concurrency at a time; returns (synced, failed) counts"""
+    calendar_tokens = claim_due(batch_size)
+    if not calendar_tokens:
+        return 0, 0
+    concurrency = concurrency or getattr(settings, 'CALENDAR_SYNC_WORKER_CONCURRENCY', 4)
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(calendar_tokens))) as executor:
+        results = list(executor.map(_sync_user_in_thread, calendar_tokens))
+    synced = sum(1 for result in results if result)
+    return synced, len(results) - synced
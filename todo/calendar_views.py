@@ -17,9 +17,12 @@ from googleapiclient.errors import HttpError
 from datetime import datetime, timedelta, timezone as dt_timezone
 import os
 import json
+import threading
 import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from django.utils import timezone
-from django.db import transaction
+from django.db import connection as db_connection, transaction
 
 from .models import GoogleCalendarToken, GoogleCalendarEvent, Task
 from django.middleware.csrf import get_token
@@ -399,15 +402,94 @@ def sync_task_to_calendar(request, task_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-def sync_google_calendar_events(user, force_full_sync=False, start_date=None, end_date=None):
+def build_calendar_service(credentials):
+    """Calendar API client with its own HTTP transport (httplib2 connections are not thread-safe)"""
+    import httplib2
+    from google_auth_httplib2 import AuthorizedHttp
+
+    return build('calendar', 'v3', http=AuthorizedHttp(credentials, http=httplib2.Http()))
+
+
+def fetch_calendar_events(credentials, calendar, sync_token=None, time_min=None, time_max=None):
     """
-    Sync Google Calendar events using lazy loading with date ranges
-    Args:
-        user: User object
-        force_full_sync: Force full sync instead of incremental
-        start_date: Start date for lazy loading (YYYY-MM-DD)
-        end_date: End date for lazy loading (YYYY-MM-DD)
-    Returns (events, sync_token, has_more)
+    Page through events().list() of one calendar; runs on a worker thread of
+    sync_google_calendar_events. Returns (events, next_sync_token).
+    """
+    calendar_id = calendar['id']
+    calendar_summary = calendar.get('summary', 'Unknown Calendar')
+    service = build_calendar_service(credentials)
+
+    # No orderBy: Google rejects it together with syncToken, and the cache is sorted on read
+    sync_params = {
+        'calendarId': calendar_id,
+        'maxResults': 250,
+        'singleEvents': True
+    }
+    if sync_token:
+        # Incremental sync - use syncToken without time bounds
+        sync_params['syncToken'] = sync_token
+        print(f"📅 Using incremental sync for {calendar_summary} (token: {sync_token[:20]}...)")
+    else:
+        sync_params['timeMin'] = time_min.isoformat()
+        sync_params['timeMax'] = time_max.isoformat()
+        print(f"📅 Loading {calendar_summary}: {time_min.date()} to {time_max.date()}")
+
+    events = []
+    new_sync_token = None
+    while True:
+        events_result = service.events().list(**sync_params).execute()
+        events.extend(events_result.get('items', []))
+        # nextSyncToken comes with the last page
+        new_sync_token = events_result.get('nextSyncToken', new_sync_token)
+        page_token = events_result.get('nextPageToken')
+        if not page_token:
+            break
+        sync_params['pageToken'] = page_token
+
+    for event in events:
+        event['_calendar_summary'] = calendar_summary
+        event['_calendar_id'] = calendar_id
+
+    print(f"📅 Calendar '{calendar_summary}': {len(events)} events (new token: {new_sync_token[:20] if new_sync_token else 'None'}...)")
+    return events, new_sync_token
+
+
+def sync_window(now=None):
+    """Date range a full sync downloads; its sync tokens then keep that range up to date"""
+    now = now or timezone.now()
+    return (
+        now - timedelta(days=getattr(settings, 'CALENDAR_SYNC_PAST_DAYS', 30)),
+        now + timedelta(days=getattr(settings, 'CALENDAR_SYNC_FUTURE_DAYS', 180)),
+    )
+
+
+# events: fetched events of all calendars; sync_tokens: the new tokens by calendar id;
+# downloaded: {calendar_id: (time_min, time_max)} for calendars listed in full for that
+# range (no sync token), so cached rows of theirs that weren't returned are gone;
+# failed: {calendar_id: error message} for calendars that could not be fetched
+# (an expired sync token is not a failure: the calendar is downloaded next time)
+CalendarSyncResult = namedtuple('CalendarSyncResult', ['events', 'sync_tokens', 'downloaded', 'failed'])
+
+
+def sync_google_calendar_events(user, force_full_sync=False, start_date=None, end_date=None, raise_errors=False):
+    """Sync Google Calendar events; see run_calendar_sync. Returns (events, sync_tokens, has_more)"""
+    result = run_calendar_sync(user, force_full_sync, start_date, end_date, raise_errors)
+    return result.events, result.sync_tokens, False
+
+
+def run_calendar_sync(user, force_full_sync=False, start_date=None, end_date=None, raise_errors=False):
+    """
+    Sync Google Calendar events.
+    Without a date range, calendars with a stored sync token are synced
+    incrementally and the others are fully downloaded for sync_window(); the
+    new tokens and the covered range (synced_from/synced_until) are saved.
+    With start_date/end_date (YYYY-MM-DD) only that range is fetched and the
+    stored tokens are left alone (a token is tied to the range it was made for).
+    Calendars are fetched concurrently (CALENDAR_SYNC_MAX_WORKERS threads); an
+    error in one calendar doesn't affect the others and is reported in
+    CalendarSyncResult.failed.
+    Returns a CalendarSyncResult; other errors are logged and give an empty
+    result (sync_tokens None) unless raise_errors is set.
     """
     try:
         # Get the user's calendar token
@@ -418,537 +500,418 @@ def sync_google_calendar_events(user, force_full_sync=False, start_date=None, en
         
         if not calendar_token:
             print("❌ No Google Calendar token found for user")
-            return [], None, False
+            return CalendarSyncResult([], None, {}, {})
         
         # Build credentials
         credentials = calendar_token.to_credentials()
         
-        # Refresh token if expired
+        # Refresh token if expired (before the workers share the credentials)
         if credentials.expired and credentials.refresh_token:
             from google.auth.transport.requests import Request
             credentials.refresh(Request())
             GoogleCalendarToken.from_credentials(user, credentials)
         
-        # Build Calendar API service
-        service = build('calendar', 'v3', credentials=credentials)
-        
-        all_events = []
-        updated_sync_tokens = {}
-        
         # Get list of calendars
-        calendar_list = service.calendarList().list().execute()
+        calendar_list = build_calendar_service(credentials).calendarList().list().execute()
         calendars = calendar_list.get('items', [])
         
         print(f"📅 Syncing events from {len(calendars)} calendars")
         
-        # Initialize sync_tokens if not exists
-        if not calendar_token.sync_tokens:
-            calendar_token.sync_tokens = {}
+        range_only = bool(start_date and end_date)
+        if range_only:
+            time_min = datetime.strptime(start_date, '%Y-%m-%d').replace(tzinfo=dt_timezone.utc)
+            time_max = datetime.strptime(end_date, '%Y-%m-%d').replace(tzinfo=dt_timezone.utc)
+        else:
+            time_min, time_max = sync_window()
+        stored_tokens = {} if (force_full_sync or range_only) else (calendar_token.sync_tokens or {})
+        
+        results = {}
+        expired_calendar_ids = []
+        failed = {}
+        started = time.perf_counter()
+        
+        if calendars:
+            max_workers = min(getattr(settings, 'CALENDAR_SYNC_MAX_WORKERS', 4), len(calendars))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(
+                        fetch_calendar_events,
+                        credentials,
+                        calendar,
+                        stored_tokens.get(calendar['id']),
+                        time_min,
+                        time_max,
+                    ): calendar
+                    for calendar in calendars
+                }
+                for future in as_completed(futures):
+                    calendar = futures[future]
+                    calendar_summary = calendar.get('summary', 'Unknown Calendar')
+                    try:
+                        results[calendar['id']] = future.result()
+                    except Exception as cal_error:
+                        print(f"❌ Error syncing calendar '{calendar_summary}': {str(cal_error)}")
+                        # Check if it's a sync token error (410 Gone)
+                        if "410" in str(cal_error) or "gone" in str(cal_error).lower():
+                            print(f"🔄 Sync token expired for {calendar_summary}, will do full sync next time")
+                            expired_calendar_ids.append(calendar['id'])
+                        else:
+                            failed[calendar['id']] = f"{calendar_summary}: {cal_error}"
         
+        # Keep the calendar list order
+        all_events = []
+        updated_sync_tokens = {}
+        downloaded = {}
         for calendar in calendars:
-            calendar_id = calendar['id']
-            calendar_summary = calendar.get('summary', 'Unknown Calendar')
+            if calendar['id'] not in results:
+                continue
+            events, new_sync_token = results[calendar['id']]
+            all_events.extend(events)
+            if new_sync_token:
+                updated_sync_tokens[calendar['id']] = new_sync_token
+            if calendar['id'] not in stored_tokens:
+                downloaded[calendar['id']] = (time_min, time_max)
+        
+        print(f"📅 Fetched {len(all_events)} events from {len(results)}/{len(calendars)} calendars in {time.perf_counter() - started:.2f}s")
+        
+        if range_only:
+            return CalendarSyncResult(all_events, {}, downloaded, failed)
+        
+        # Merge and save the sync tokens once
+        if updated_sync_tokens or expired_calendar_ids:
+            previous_tokens = calendar_token.sync_tokens or {}
+            sync_tokens = {} if force_full_sync else {
+                calendar_id: token for calendar_id, token in previous_tokens.items()
+                if calendar_id not in expired_calendar_ids
+            }
+            sync_tokens.update(updated_sync_tokens)
+            calendar_token.sync_tokens = sync_tokens
+            update_fields = ['sync_tokens']
+            if updated_sync_tokens:
+                calendar_token.last_sync_time = timezone.now()
+                update_fields.append('last_sync_time')
             
-            try:
-                # Determine sync parameters
-                sync_params = {
-                    'calendarId': calendar_id,
-                    'maxResults': 250,
-                    'singleEvents': True,
-                    'orderBy': 'startTime'
-                }
-                
-                # Use incremental sync if available and not forcing full sync
-                calendar_sync_token = calendar_token.sync_tokens.get(calendar_id)
-                if not force_full_sync and calendar_sync_token:
-                    # Incremental sync - use syncToken without time bounds
-                    sync_params['syncToken'] = calendar_sync_token
-                    print(f"📅 Using incremental sync for {calendar_summary} (token: {calendar_sync_token[:20]}...)")
+            # Range every token covers: a calendar downloaded now covers this
+            # sync_window(), the others still cover the previous one
+            fully_downloaded = [
+                calendar_id for calendar_id in updated_sync_tokens if calendar_id not in stored_tokens
+            ]
+            if fully_downloaded:
+                if force_full_sync or calendar_token.synced_from is None or not previous_tokens:
+                    calendar_token.synced_from, calendar_token.synced_until = time_min, time_max
                 else:
-                    # LAZY LOADING: Fetch only requested date range
-                    from datetime import datetime, timedelta
-                    
-                    if start_date and end_date:
-                        # Use provided date range (from frontend lazy loading)
-                        time_min = datetime.strptime(start_date, '%Y-%m-%d').isoformat() + 'Z'
-                        time_max = datetime.strptime(end_date, '%Y-%m-%d').isoformat() + 'Z'
-                        sync_params['timeMin'] = time_min
-                        sync_params['timeMax'] = time_max
-                        print(f"📅 Lazy loading {calendar_summary}: {start_date} to {end_date}")
-                    else:
-                        # Default: Load current month ± 1 month
-                        now = datetime.utcnow()
-                        start = now - timedelta(days=30)
-                        end = now + timedelta(days=60)
-                        time_min = start.isoformat() + 'Z'
-                        time_max = end.isoformat() + 'Z'
-                        sync_params['timeMin'] = time_min
-                        sync_params['timeMax'] = time_max
-                        print(f"📅 Initial load {calendar_summary}: ±3 months from now")
-                
-                # Fetch events with pagination handling
-                events = []
-                page_token = None
-                new_sync_token = None
-                
-                while True:
-                    # Add page token if we're paginating
-                    if page_token:
-                        sync_params['pageToken'] = page_token
-                    
-                    # Make API call
-                    events_result = service.events().list(**sync_params).execute()
-                    page_events = events_result.get('items', [])
-                    events.extend(page_events)
-                    
-                    # Check for sync token (only on first page)
-                    if new_sync_token is None:
-                        new_sync_token = events_result.get('nextSyncToken')
-                    
-                    # Check for pagination
-                    page_token = events_result.get('nextPageToken')
-                    if not page_token:
-                        break
-                    
-                    # Remove pageToken from params for next iteration
-                    sync_params.pop('pageToken', None)
-                
-                # Store the sync token for this calendar
-                if new_sync_token:
-                    updated_sync_tokens[calendar_id] = new_sync_token
-                
-                print(f"📅 Calendar '{calendar_summary}': {len(events)} events (new token: {new_sync_token[:20] if new_sync_token else 'None'}...)")
-                
-                # Process events
-                for event in events:
-                    event['_calendar_summary'] = calendar_summary
-                    event['_calendar_id'] = calendar_id
-                    all_events.append(event)
-                
-            except Exception as cal_error:
-                print(f"❌ Error syncing calendar '{calendar_summary}': {str(cal_error)}")
-                # Check if it's a sync token error (410 Gone)
-                if "410" in str(cal_error) or "gone" in str(cal_error).lower():
-                    print(f"🔄 Sync token expired for {calendar_summary}, will do full sync next time")
-                    # Remove the invalid sync token
-                    if calendar_id in calendar_token.sync_tokens:
-                        del calendar_token.sync_tokens[calendar_id]
-                continue
-        
-        # Update sync tokens for all calendars
-        if updated_sync_tokens:
-            calendar_token.sync_tokens.update(updated_sync_tokens)
-            calendar_token.last_sync_time = timezone.now()
-            calendar_token.save()
+                    calendar_token.synced_from = max(calendar_token.synced_from, time_min)
+                    calendar_token.synced_until = min(calendar_token.synced_until, time_max)
+                update_fields += ['synced_from', 'synced_until']
+            
+            # Only these fields: a refresh above may have stored a newer access token
+            calendar_token.save(update_fields=update_fields)
             print(f"📅 Updated sync tokens for {len(updated_sync_tokens)} calendars")
         
-        return all_events, updated_sync_tokens, False
+        return CalendarSyncResult(all_events, updated_sync_tokens, downloaded, failed)
         
     except Exception as e:
-        print(f"❌ Error in sync_google_calendar_events: {str(e)}")
+        if raise_errors:
+            raise
+        print(f"❌ Error in run_calendar_sync: {str(e)}")
         import traceback
         traceback.print_exc()
-        return [], None, False
+        return CalendarSyncResult([], None, {}, {})
+
+
+# Fields refreshed when an already cached event is upserted again
+CACHED_EVENT_UPDATE_FIELDS = [
+    'calendar_id', 'calendar_summary', 'title', 'description', 'start_time', 'end_time',
+    'is_all_day', 'html_link', 'color_id', 'event_data', 'recurring_event_id', 'is_active', 'updated_at',
+]
+
+
+def parse_cached_event(user, event):
+    """Build an unsaved GoogleCalendarEvent from a Google API event (None if it can't be cached)"""
+    event_id = event.get('id', '')
+    if not event_id:
+        return None
 
+    start_data = event.get('start', {})
+    end_data = event.get('end', {})
+    is_all_day = 'date' in start_data
+    if is_all_day:
+        start_time = datetime.strptime(start_data['date'], '%Y-%m-%d').replace(tzinfo=dt_timezone.utc)
+        end_time = datetime.strptime(end_data.get('date', start_data['date']), '%Y-%m-%d').replace(tzinfo=dt_timezone.utc)
+    else:
+        start_time = datetime.fromisoformat(start_data['dateTime'].replace('Z', '+00:00'))
+        end_time = datetime.fromisoformat(end_data.get('dateTime', start_data['dateTime']).replace('Z', '+00:00'))
 
-def cache_events(user, events):
+    return GoogleCalendarEvent(
+        user=user,
+        google_event_id=event_id,
+        calendar_id=event.get('_calendar_id', ''),
+        calendar_summary=event.get('_calendar_summary', 'Unknown Calendar'),
+        title=event.get('summary', 'No Title'),
+        description=event.get('description', ''),
+        start_time=start_time,
+        end_time=end_time,
+        is_all_day=is_all_day,
+        html_link=event.get('htmlLink', ''),
+        color_id=event.get('colorId', ''),
+        event_data=event,
+        recurring_event_id=event.get('recurringEventId', ''),
+        is_active=True,
+    )
+
+
+def cache_events(user, events, downloaded=None):
     """
-    Cache Google Calendar events in the database for faster retrieval
-    Uses atomic transactions and retry logic to handle database locks
+    Cache Google Calendar events in the database for faster retrieval.
+    Events are upserted in chunks (INSERT ... ON CONFLICT (user, google_event_id)
+    DO UPDATE), one transaction per chunk. Events Google reports as cancelled
+    (incremental syncs include deletions) are marked inactive instead; a
+    cancelled recurring instance only hides that occurrence, a cancelled series
+    hides all of its instances. downloaded ({calendar_id: (time_min, time_max)},
+    see CalendarSyncResult) names calendars listed in full: their cached events
+    in that range which were not returned are marked inactive too.
+    Returns the number of cached events.
     """
-    def cache_single_event_with_retry(event, max_retries=3):
-        """Cache a single event with retry logic for database locks"""
-        for attempt in range(max_retries):
-            try:
-                event_id = event.get('id', '')
-                if not event_id:
-                    return None, False
-                    
-                title = event.get('summary', 'No Title')
-                description = event.get('description', '')
-                html_link = event.get('htmlLink', '')
-                color_id = event.get('colorId', '')
-                calendar_id = event.get('_calendar_id', '')
-                calendar_summary = event.get('_calendar_summary', 'Unknown Calendar')
-                
-                # Handle start and end times
-                start_data = event.get('start', {})
-                end_data = event.get('end', {})
-                
-                # Determine if it's an all-day event
-                is_all_day = 'date' in start_data
-                
-                if is_all_day:
-                    # All-day event
-                    start_date = start_data.get('date', '')
-                    end_date = end_data.get('date', '')
-                    start_time = datetime.strptime(start_date, '%Y-%m-%d').replace(tzinfo=dt_timezone.utc)
-                    end_time = datetime.strptime(end_date, '%Y-%m-%d').replace(tzinfo=dt_timezone.utc)
-                else:
-                    # Timed event
-                    start_time_str = start_data.get('dateTime', '')
-                    end_time_str = end_data.get('dateTime', '')
-                    start_time = datetime.fromisoformat(start_time_str.replace('Z', '+00:00'))
-                    end_time = datetime.fromisoformat(end_time_str.replace('Z', '+00:00'))
-                
-                # Use atomic transaction for database operation
-                with transaction.atomic():
-                    cached_event, created = GoogleCalendarEvent.objects.update_or_create(
-                        user=user,
-                        google_event_id=event_id,
-                        defaults={
-                            'calendar_id': calendar_id,
-                            'calendar_summary': calendar_summary,
-                            'title': title,
-                            'description': description,
-                            'start_time': start_time,
-                            'end_time': end_time,
-                            'is_all_day': is_all_day,
-                            'html_link': html_link,
-                            'color_id': color_id,
-                            'event_data': event,
-                            'is_active': True
-                        }
-                    )
-                return cached_event, created
-                
-            except Exception as e:
-                if 'database is locked' in str(e).lower() and attempt < max_retries - 1:
-                    # Wait with exponential backoff before retrying
-                    wait_time = 0.1 * (2 ** attempt)  # 0.1s, 0.2s, 0.4s
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    # Log the error but don't crash the entire caching process
-                    print(f"⚠️  Error caching event {event.get('id', 'unknown')}: {str(e)}")
-                    return None, False
-        
-        return None, False
-    
+    chunk_size = getattr(settings, 'CALENDAR_CACHE_CHUNK_SIZE', 500)
     try:
-        cached_count = 0
-        updated_count = 0
+        # Keyed by event id: an event shared between two calendars is cached once,
+        # and a single upsert statement may not touch the same row twice.
+        # The last state of an id wins, whether an update or a cancellation.
+        parsed = {}
+        cancelled_ids = set()
         error_count = 0
-        
-        # Process events in batches to reduce lock contention
-        batch_size = 10
-        for i in range(0, len(events), batch_size):
-            batch = events[i:i + batch_size]
-            
-            for event in batch:
-                cached_event, created = cache_single_event_with_retry(event)
-                
-                if cached_event:
-                    if created:
-                        cached_count += 1
-                    else:
-                        updated_count += 1
-                elif cached_event is None:
-                    error_count += 1
-            
-            # Small delay between batches to reduce lock contention
-            if i + batch_size < len(events):
-                time.sleep(0.05)
-        
-        if cached_count + updated_count > 0:
-            print(f"📅 Cached {cached_count} new events, updated {updated_count} events" + 
+        for event in events:
+            event_id = event.get('id', '')
+            if event.get('status') == 'cancelled' and event_id:
+                # Cancellations carry little more than the id (no start/end)
+                cancelled_ids.add(event_id)
+                parsed.pop(event_id, None)
+                continue
+            try:
+                cached_event = parse_cached_event(user, event)
+            except (KeyError, ValueError, TypeError) as e:
+                print(f"⚠️  Error caching event {event.get('id', 'unknown')}: {str(e)}")
+                error_count += 1
+                continue
+            if cached_event is not None:
+                parsed[cached_event.google_event_id] = cached_event
+                cancelled_ids.discard(cached_event.google_event_id)
+
+        cached_events = list(parsed.values())
+        for i in range(0, len(cached_events), chunk_size):
+            with transaction.atomic():
+                GoogleCalendarEvent.objects.bulk_create(
+                    cached_events[i:i + chunk_size],
+                    update_conflicts=True,
+                    unique_fields=['user', 'google_event_id'],
+                    update_fields=CACHED_EVENT_UPDATE_FIELDS,
+                )
+
+        deactivated_count = 0
+        if cancelled_ids:
+            deactivated_count = GoogleCalendarEvent.deactivate(user, cancelled_ids, batch_size=chunk_size)
+
+        if downloaded:
+            # Every returned id, including events that failed to parse
+            seen_ids = {event.get('id', '') for event in events}
+            for calendar_id, (time_min, time_max) in downloaded.items():
+                deactivated_count += GoogleCalendarEvent.deactivate_missing(
+                    user, calendar_id, time_min, time_max, seen_ids, batch_size=chunk_size
+                )
+
+        if cached_events or deactivated_count:
+            print(f"📅 Cached {len(cached_events)} events, deactivated {deactivated_count} cancelled or deleted" +
                   (f", {error_count} errors" if error_count > 0 else ""))
-        
+        return len(cached_events)
+
     except Exception as e:
         print(f"❌ Error in cache_events: {str(e)}")
         import traceback
         traceback.print_exc()
+        return 0
+
+
+def refresh_calendar_cache(user, **sync_kwargs):
+    """Sync from Google and cache the result; returns the number of cached events"""
+    result = run_calendar_sync(user, **sync_kwargs)
+    return cache_events(user, result.events, result.downloaded)
+
+
+def refresh_calendar_range(user, range_start, range_end):
+    """
+    Read a range outside the synced window through from Google, cache it (events
+    deleted from it are deactivated) and remember it in fetched_ranges so later
+    requests are served from the cache. Returns the number of cached events.
+    """
+    # Whole days, as run_calendar_sync takes dates
+    start_date = range_start.date()
+    end_date = (range_end - timedelta(microseconds=1)).date() + timedelta(days=1)
+    fetched_at = timezone.now()
+    try:
+        result = run_calendar_sync(
+            user,
+            start_date=start_date.strftime('%Y-%m-%d'),
+            end_date=end_date.strftime('%Y-%m-%d'),
+            raise_errors=True
+        )
+    except Exception as e:
+        print(f"❌ Error fetching calendar range {start_date} - {end_date}: {str(e)}")
+        return 0
+    cached_count = cache_events(user, result.events, result.downloaded)
+
+    calendar_token = GoogleCalendarToken.objects.filter(user=user, is_active=True).first()
+    if calendar_token:
+        calendar_token.record_fetched_range(
+            datetime.combine(start_date, datetime.min.time(), tzinfo=dt_timezone.utc),
+            datetime.combine(end_date, datetime.min.time(), tzinfo=dt_timezone.utc),
+            fetched_at
+        )
+    return cached_count
+
+
+def claim_calendar_sync(user):
+    """Take the user's sync lease for a sync started here (see GoogleCalendarToken.claim_sync)"""
+    lease = timedelta(seconds=getattr(settings, 'CALENDAR_SYNC_LOCK_SECONDS', 300))
+    return GoogleCalendarToken.claim_sync(user, lease)
+
+
+def run_claimed_sync(user, refresh, *args, **kwargs):
+    """
+    Run refresh(user, ...) now, holding the user's sync lease. Returns False
+    without running it while another sync of the user (a background refresh
+    or the sync_calendars worker) holds the lease.
+    """
+    if not claim_calendar_sync(user):
+        return False
+    try:
+        refresh(user, *args, **kwargs)
+    finally:
+        GoogleCalendarToken.release_sync(user)
+    return True
+
+
+def refresh_calendar_in_background(user, range_start=None, range_end=None):
+    """
+    Start an incremental sync (or, given range_start/range_end, a refresh of that
+    read-through range) on a daemon thread, unless a sync of this user is already
+    running here or in the sync_calendars worker. Returns True if a refresh was started.
+    """
+    if not claim_calendar_sync(user):
+        return False
+
+    def run():
+        try:
+            if range_start is None:
+                refresh_calendar_cache(user)
+            else:
+                refresh_calendar_range(user, range_start, range_end)
+        except Exception as e:
+            print(f"❌ Background calendar sync failed for {user.email}: {str(e)}")
+        finally:
+            GoogleCalendarToken.release_sync(user)
+            # The thread opened its own database connection
+            db_connection.close()
+
+    threading.Thread(target=run, name=f'calendar-sync-{user.id}', daemon=True).start()
+    return True
+
+
+def format_cached_event(event):
+    return {
+        'id': event.google_event_id,
+        'title': event.title,
+        'description': event.description or '',
+        'start': event.start_time.isoformat() if not event.is_all_day else event.start_time.strftime('%Y-%m-%d'),
+        'end': event.end_time.isoformat() if not event.is_all_day else event.end_time.strftime('%Y-%m-%d'),
+        'is_all_day': event.is_all_day,
+        'html_link': event.html_link or '',
+        'color': event.color_id or '',
+        'calendar_summary': event.calendar_summary,
+        'calendar_id': event.calendar_id,
+        'google_event_id': event.google_event_id
+    }
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_calendar_events(request):
     """
-    Fetch Google Calendar events for display in the calendar view
-    Uses incremental synchronization for efficiency
-    Supports date range filtering for performance optimization
+    Google Calendar events for the calendar view, served from the
+    GoogleCalendarEvent cache (stale-while-revalidate):
+    - first use, or force_full_sync=true: sync from Google before answering
+    - a range outside the synced window: fetched from Google and cached the
+      first time (see fetched_ranges), then served like the window
+    - cache older than CALENDAR_CACHE_TTL_SECONDS: answered from the cache
+      while an incremental sync (or a refetch of the range) runs in the background
+    Query params: start_date, end_date (YYYY-MM-DD, inclusive)
     """
     try:
-        # Get date range parameters for filtering (Todoist approach)
-        start_date = request.GET.get('start_date')  # Format: YYYY-MM-DD
-        end_date = request.GET.get('end_date')      # Format: YYYY-MM-DD
-        
-        # Check if we should force a full sync
-        force_full_sync = request.GET.get('force_full_sync', 'false').lower() == 'true'
-        
-        # Use lazy loading with date range (Todoist approach)
+        now = timezone.now()
         try:
-            events, sync_tokens, has_more = sync_google_calendar_events(
-                request.user, 
-                force_full_sync=force_full_sync,
-                start_date=start_date,
-                end_date=end_date
-            )
-            print(f"📅 Lazy load returned {len(events) if events else 0} events for range {start_date} to {end_date}")
-        except Exception as sync_error:
-            print(f"❌ Error in sync_google_calendar_events: {str(sync_error)}")
-            import traceback
-            traceback.print_exc()
-            events = []
-            sync_tokens = {}
-            has_more = False
-        
-        if not events:
-            # Try to get cached events if API sync fails
-            cached_events = GoogleCalendarEvent.objects.filter(
-                user=request.user,
-                is_active=True,
-                start_time__gte=timezone.now() - timedelta(days=30),
-                start_time__lte=timezone.now() + timedelta(days=90)
-            ).order_by('start_time')
-            
-            if cached_events.exists():
-                print(f"📅 Using {cached_events.count()} cached events")
-                formatted_events = []
-                for event in cached_events:
-                    formatted_events.append({
-                        'id': event.google_event_id,
-                        'title': event.title,
-                        'description': event.description or '',
-                        'start': event.start_time.isoformat() if not event.is_all_day else event.start_time.strftime('%Y-%m-%d'),
-                        'end': event.end_time.isoformat() if not event.is_all_day else event.end_time.strftime('%Y-%m-%d'),
-                        'is_all_day': event.is_all_day,
-                        'html_link': event.html_link or '',
-                        'color': event.color_id or '',
-                        'calendar_summary': event.calendar_summary,
-                        'calendar_id': event.calendar_id,
-                        'google_event_id': event.google_event_id
-                    })
-                
-                return Response({
-                    'success': True,
-                    'events': formatted_events,
-                    'message': f'נטענו {len(formatted_events)} אירועים (מטמון)'
-                })
-            
+            if request.GET.get('start_date'):
+                range_start = datetime.strptime(request.GET['start_date'], '%Y-%m-%d').replace(tzinfo=dt_timezone.utc)
+            else:
+                range_start = now - timedelta(days=30)
+            if request.GET.get('end_date'):
+                range_end = datetime.strptime(request.GET['end_date'], '%Y-%m-%d').replace(tzinfo=dt_timezone.utc) + timedelta(days=1)
+            else:
+                range_end = now + timedelta(days=90)
+        except ValueError:
+            return Response({
+                'success': False,
+                'error': 'תאריך לא תקין',
+                'events': []
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        calendar_token = GoogleCalendarToken.objects.filter(user=request.user, is_active=True).first()
+        if not calendar_token:
             return Response({
                 'success': True,
                 'events': [],
                 'message': 'לא מחובר ליומן Google או אין אירועים'
             })
         
-        # Cache events for future use
-        cache_events(request.user, events)
-        
-        # OPTIMIZATION NOTE: Backend filtering is DISABLED
-        # Frontend will handle visible range filtering for better performance
-        # This allows the frontend to quickly filter by visible range without API calls
-        # Backend returns all synced events (default: last 30 days to next 90 days from sync)
-        print(f"📅 Backend returning {len(events)} total events (no backend filtering - frontend will handle visible range)")
-        
-        # Format events for frontend
-        formatted_events = []
-        for event in events:
-            # Extract event details
-            event_id = event.get('id', '')
-            title = event.get('summary', 'No Title')
-            description = event.get('description', '')
-            html_link = event.get('htmlLink', '')
-            color_id = event.get('colorId', '')
-            
-            # Handle start and end times
-            start_data = event.get('start', {})
-            end_data = event.get('end', {})
-            
-            # Determine if it's an all-day event
-            is_all_day = 'date' in start_data
-            
-            if is_all_day:
-                # All-day event
-                start_date = start_data.get('date', '')
-                end_date = end_data.get('date', '')
-                start_time = start_date
-                end_time = end_date
-            else:
-                # Timed event
-                start_time = start_data.get('dateTime', '')
-                end_time = end_data.get('dateTime', '')
-            
-            # Add calendar info
-            calendar_summary = event.get('_calendar_summary', 'Unknown Calendar')
-            calendar_id = event.get('_calendar_id', '')
-            
-            formatted_events.append({
-                'id': event_id,
-                'title': title,
-                'description': description,
-                'start': start_time,
-                'end': end_time,
-                'is_all_day': is_all_day,
-                'html_link': html_link,
-                'color': color_id,
-                'calendar_summary': calendar_summary,
-                'calendar_id': calendar_id,
-                'google_event_id': event_id
-            })
-        
-        sync_type = "incremental" if not force_full_sync else "full"
-        print(f"📅 Returning {len(formatted_events)} events ({sync_type} sync)")
-        
-        return Response({
-            'success': True,
-            'events': formatted_events,
-            'message': f'נטענו {len(formatted_events)} אירועים ({sync_type})',
-            'sync_tokens': sync_tokens,
-            'has_more': has_more
-        })
-        
-        # Get events from now onwards (next 90 days for calendar view)
-        from datetime import datetime, timedelta
-        now = datetime.utcnow().isoformat() + 'Z'
-        end_date = (datetime.utcnow() + timedelta(days=90)).isoformat() + 'Z'
-        
-        print(f"📅 Fetching Google Calendar events from {now} to {end_date}")
-        
-        # First, get list of all calendars (including subscribed ones like holidays)
-        try:
-            calendar_list = service.calendarList().list().execute()
-            calendars = calendar_list.get('items', [])
-            
-            print(f"📅 Found {len(calendars)} calendars")
-            for cal in calendars:
-                print(f"  - {cal.get('summary', 'Unknown')} ({cal.get('id', 'No ID')}) - Access: {cal.get('accessRole', 'Unknown')} - Type: {cal.get('type', 'Unknown')}")
-                # Check for holiday calendars specifically
-                if ('holiday' in cal.get('summary', '').lower() or 
-                    'israel' in cal.get('summary', '').lower() or
-                    'heb' in cal.get('summary', '').lower() or
-                    'jewish' in cal.get('summary', '').lower()):
-                    print(f"    🎉 Found potential holiday calendar: {cal.get('summary')} (ID: {cal.get('id')})")
-        except Exception as calendar_list_error:
-            print(f"❌ Error fetching calendar list: {str(calendar_list_error)}")
-            # Fallback to primary calendar only
-            calendars = [{'id': 'primary', 'summary': 'Primary Calendar'}]
-        
-        # Fetch events from all calendars (primary + subscribed)
-        all_events = []
-        
-        for calendar in calendars:
-            calendar_id = calendar['id']
-            calendar_summary = calendar.get('summary', 'Unknown Calendar')
-            
-            try:
-                events_result = service.events().list(
-                    calendarId=calendar_id,
-                    timeMin=now,
-                    timeMax=end_date,
-                    maxResults=250,
-                    singleEvents=True,
-                    orderBy='startTime'
-                ).execute()
-                
-                calendar_events = events_result.get('items', [])
-                print(f"📅 Calendar '{calendar_summary}': {len(calendar_events)} events")
-                
-                # Log first few events from each calendar for debugging
-                for i, event in enumerate(calendar_events[:3]):  # Show first 3 events
-                    event_title = event.get('summary', 'No title')
-                    event_start = event.get('start', {})
-                    print(f"    Event {i+1}: {event_title} - Start: {event_start}")
-                
-                # Special logging for holiday calendars
-                if ('holiday' in calendar_summary.lower() or 
-                    'israel' in calendar_summary.lower() or
-                    'heb' in calendar_summary.lower()):
-                    print(f"    🎉 HOLIDAY CALENDAR: {calendar_summary} has {len(calendar_events)} events")
-                
-                # Add calendar info to each event for debugging
-                for event in calendar_events:
-                    event['_calendar_summary'] = calendar_summary
-                    event['_calendar_id'] = calendar_id
-                
-                all_events.extend(calendar_events)
-                
-            except Exception as cal_error:
-                print(f"❌ Error fetching from calendar '{calendar_summary}': {str(cal_error)}")
-                continue
-        
-        # Deduplicate events that might appear in multiple calendars
-        seen_events = set()
-        deduplicated_events = []
-        
-        for event in all_events:
-            # Create a unique key based on title, start time, and calendar
-            event_key = f"{event.get('summary', '')}_{event.get('start', {})}_{event.get('_calendar_id', '')}"
-            
-            if event_key not in seen_events:
-                seen_events.add(event_key)
-                deduplicated_events.append(event)
+        force_full_sync = request.GET.get('force_full_sync', 'false').lower() == 'true'
+        refreshing = False
+        # Syncs below take the user's lease; while another sync holds it the
+        # cache is served as it is and reported as refreshing
+        if force_full_sync or calendar_token.synced_from is None:
+            if run_claimed_sync(request.user, refresh_calendar_cache, force_full_sync=force_full_sync):
+                calendar_token.refresh_from_db()
             else:
-                print(f"🔄 Deduplicated event: {event.get('summary', 'No title')} from {event.get('_calendar_summary', 'Unknown')}")
+                refreshing = True
         
-        events = deduplicated_events
-        print(f"📅 Total events found across all calendars: {len(all_events)}")
-        print(f"📅 Deduplicated events: {len(events)}")
-        
-        # Format events for frontend display (NO TASK CREATION)
-        formatted_events = []
-        
-        for event in events:
-            try:
-                # Get event details
-                summary = event.get('summary', 'Untitled Event')
-                description = event.get('description', '')
-                event_id = event.get('id')
-                html_link = event.get('htmlLink', '')  # Link to open in Google Calendar
-                
-                # Get start and end times
-                start = event.get('start', {})
-                end = event.get('end', {})
-                
-                if 'dateTime' in start:
-                    # Timed event
-                    start_datetime = start['dateTime']
-                    end_datetime = end.get('dateTime', start_datetime)
-                    is_all_day = False
-                elif 'date' in start:
-                    # All-day event
-                    start_datetime = start['date']
-                    end_datetime = end.get('date', start_datetime)
-                    is_all_day = True
-                else:
-                    # No time specified, skip
-                    continue
-                
-                formatted_events.append({
-                    'id': f'gcal_{event_id}',  # Prefix to distinguish from app tasks
-                    'google_event_id': event_id,
-                    'title': summary,
-                    'description': description,
-                    'start': start_datetime,
-                    'end': end_datetime,
-                    'is_all_day': is_all_day,
-                    'html_link': html_link,
-                    'source': 'google_calendar',  # Mark as Google Calendar event
-                    'color': '#4285f4',  # Google Calendar blue
-                    'calendar_summary': event.get('_calendar_summary', 'Unknown Calendar'),
-                    'calendar_id': event.get('_calendar_id', 'unknown'),
-                })
-                
-            except Exception as event_error:
-                print(f"❌ Error formatting event: {str(event_error)}")
-                continue
-        
-        print(f"✅ Returning {len(formatted_events)} formatted events")
+        ttl = timedelta(seconds=getattr(settings, 'CALENDAR_CACHE_TTL_SECONDS', 300))
+        if calendar_token.covers(range_start, range_end):
+            if calendar_token.last_sync_time is None or calendar_token.last_sync_time < now - ttl:
+                refreshing = refresh_calendar_in_background(request.user)
+        else:
+            # Outside the range the sync tokens keep fresh: read through to Google
+            # once, then refetch the whole range when it gets stale
+            fetched_at = calendar_token.fetched_range_time(range_start, range_end)
+            if fetched_at is None:
+                if not run_claimed_sync(request.user, refresh_calendar_range, range_start, range_end):
+                    refreshing = True
+            elif fetched_at < now - ttl:
+                refreshing = refresh_calendar_in_background(request.user, range_start, range_end)
+        
+        # Events overlapping the range
+        cached_events = GoogleCalendarEvent.objects.filter(
+            user=request.user,
+            is_active=True,
+            start_time__lt=range_end,
+            end_time__gt=range_start
+        ).defer('event_data').order_by('start_time')
+        formatted_events = [format_cached_event(event) for event in cached_events]
         
         return Response({
             'success': True,
             'events': formatted_events,
-            'count': len(formatted_events)
+            'message': f'נטענו {len(formatted_events)} אירועים',
+            'last_sync_time': calendar_token.last_sync_time.isoformat() if calendar_token.last_sync_time else None,
+            'refreshing': refreshing
         })
         
-    except HttpError as e:
-        print(f"Google API error: {str(e)}")
-        return Response({
-            'success': False,
-            'error': 'שגיאה בגישה ליומן Google',
-            'events': []
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
     except Exception as e:
         print(f"Error fetching calendar events: {str(e)}")
         import traceback
@@ -964,22 +927,31 @@ def get_calendar_events(request):
 @permission_classes([IsAuthenticated])
 def sync_calendar_incremental(request):
     """
-    Force an incremental sync of Google Calendar events
+    Run an incremental sync of Google Calendar events now (sync tokens are kept;
+    only calendars whose token expired are downloaded again)
     """
     try:
         print(f"🔄 Starting incremental sync for user: {request.user.email}")
         
-        # Force a full sync to get the latest changes
-        events, sync_tokens, has_more = sync_google_calendar_events(request.user, force_full_sync=True)
-        
-        # Cache the events
-        cache_events(request.user, events)
+        if not claim_calendar_sync(request.user):
+            return Response({
+                'success': True,
+                'message': 'סנכרון כבר מתבצע',
+                'events_count': 0,
+                'refreshing': True
+            }, status=status.HTTP_202_ACCEPTED)
+        try:
+            result = run_calendar_sync(request.user)
+            # Cache the events; calendars downloaded again lose the events deleted meanwhile
+            cache_events(request.user, result.events, result.downloaded)
+        finally:
+            GoogleCalendarToken.release_sync(request.user)
         
         return Response({
             'success': True,
-            'message': f'סונכרנו {len(events)} אירועים',
-            'events_count': len(events),
-            'sync_tokens': sync_tokens
+            'message': f'סונכרנו {len(result.events)} אירועים',
+            'events_count': len(result.events),
+            'sync_tokens': result.sync_tokens
         })
         
     except Exception as e:
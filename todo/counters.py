@@ -0,0 +1,101 @@
+"""
+Sidebar task counters (Today, Overdue, Upcoming, Inbox and per project).
+
+All counters come from one grouped conditional-aggregation query over the
+user's visible open tasks and are cached per user until the next task write
+that can affect them, or the user's local midnight, whichever comes first.
+Like todo.access, counters are only cached in a cache shared by every process
+(Redis, see CACHES): with a per-process LocMem cache, writes made by another
+web worker or a management command could not invalidate them.
+"""
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .dates import get_user_timezone, user_today_range
+from .models import Task, ProjectMembership
+from .access import ProjectAccess
+
+
+def _cache_key(user_id):
+    return f'task_counts:{user_id}'
+
+
+def _cache_enabled():
+    """Only a cache shared by every process can be invalidated reliably"""
+    return (
+        getattr(settings, 'TASK_COUNTS_CACHE_TIMEOUT', 300) > 0
+        and not isinstance(caches['default'], LocMemCache)
+    )
+
+
+def compute_task_counts(user, tz=None, access=None):
+    tz = tz or get_user_timezone(user)
+    access = access or ProjectAccess(user)
+    day_start, day_end = user_today_range(user, tz)
+    rows = Task.objects.filter(
+        Q(owner=user) | Q(project_id__in=access.project_ids()),
+        is_completed=False
+    ).order_by().values('project_id').annotate(
+        total=Count('id'),
+        today=Count('id', filter=Q(due_date__gte=day_start, due_date__lt=day_end)),
+        overdue=Count('id', filter=Q(due_date__lt=day_start)),
+        upcoming=Count('id', filter=Q(due_date__gte=day_end)),
+    )
+
+    counts = {'today': 0, 'overdue': 0, 'upcoming': 0, 'inbox': 0, 'projects': {}}
+    for row in rows:
+        for key in ('today', 'overdue', 'upcoming'):
+            counts[key] += row[key]
+        if row['project_id'] is None:
+            counts['inbox'] = row['total']
+        else:
+            counts['projects'][row['project_id']] = row['total']
+    return counts
+
+
+def get_task_counts(user, access=None):
+    """Cached counters for a user; a cache hit runs no queries"""
+    if not _cache_enabled():
+        return compute_task_counts(user, access=access)
+    key = _cache_key(user.id)
+    counts = cache.get(key)
+    if counts is None:
+        tz = get_user_timezone(user)
+        counts = compute_task_counts(user, tz, access)
+        # "Today" rolls over at the user's local midnight
+        _, day_end = user_today_range(user, tz)
+        seconds_to_midnight = int((day_end - timezone.now()).total_seconds()) + 1
+        timeout = min(getattr(settings, 'TASK_COUNTS_CACHE_TIMEOUT', 300), max(seconds_to_midnight, 1))
+        cache.set(key, counts, timeout)
+    return counts
+
+
+def invalidate_task_counts(user_ids=(), project_ids=()):
+    """Drop cached counters of the given users and of every member of the given projects"""
+    if not _cache_enabled():
+        return
+    user_ids = set(user_ids)
+    project_ids = {project_id for project_id in project_ids if project_id is not None}
+    if project_ids:
+        user_ids.update(
+            ProjectMembership.objects.filter(project_id__in=project_ids).values_list('user_id', flat=True)
+        )
+    if user_ids:
+        keys = [_cache_key(user_id) for user_id in user_ids]
+        # Deleted on commit so a concurrent request can't re-cache the pre-commit counts
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_counts_for_tasks(tasks):
+    """Invalidate counters affected by writes that bypass the Task signals (bulk_create/bulk_update)"""
+    tasks = list(tasks)
+    invalidate_task_counts(
+        user_ids={task.owner_id for task in tasks},
+        project_ids={task.project_id for task in tasks} | {
+            getattr(task, '_original_project_id', None) for task in tasks
+        }
+    )
@@ -0,0 +1,45 @@
+"""
+Per-user timezone helpers for date-based task views.
+
+Views filter on half-open UTC ranges (`due_date >= start AND due_date < end`)
+instead of `due_date__date=...`, so the database can seek the
+(owner, is_completed, due_date) index rather than applying a date function
+to every row.
+"""
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.utils import timezone
+
+
+def get_user_timezone(user):
+    """Return the ZoneInfo from the user's profile, falling back to settings.TIME_ZONE"""
+    tz_name = None
+    try:
+        tz_name = user.profile.timezone
+    except Exception:
+        pass
+    try:
+        return ZoneInfo(tz_name or settings.TIME_ZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(settings.TIME_ZONE)
+
+
+def user_today(user, tz=None):
+    """Today's date in the user's timezone"""
+    tz = tz or get_user_timezone(user)
+    return timezone.now().astimezone(tz).date()
+
+
+def local_day_range(day, tz):
+    """Half-open UTC datetime range [start, end) covering `day` in timezone `tz`"""
+    start = datetime.combine(day, time.min, tzinfo=tz)
+    end = datetime.combine(day + timedelta(days=1), time.min, tzinfo=tz)
+    return start.astimezone(ZoneInfo('UTC')), end.astimezone(ZoneInfo('UTC'))
+
+
+def user_today_range(user, tz=None):
+    """Half-open UTC range for the user's current local day"""
+    tz = tz or get_user_timezone(user)
+    return local_day_range(user_today(user, tz), tz)
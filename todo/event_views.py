@@ -0,0 +1,60 @@
+"""
+/api/events/ - server-sent event stream of the current user's channel (see todo.events)
+
+A plain async Django view rather than a DRF one: DRF views are sync and would
+hold a worker thread for the lifetime of the connection. Needs the ASGI app
+(todofast/asgi.py); under WSGI an endless stream would be buffered, so the
+view answers 503 and clients keep polling.
+"""
+import asyncio
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from .events import format_sse, get_broker
+
+
+async def _event_frames(user_id):
+    heartbeat = getattr(settings, 'EVENT_STREAM_HEARTBEAT_SECONDS', 25)
+    events = get_broker().subscribe(user_id)
+    # Keep one pending read: cancelling it on every heartbeat would close the subscription
+    next_event = asyncio.ensure_future(anext(events))
+    # Let the subscription register before the client sees the stream as open
+    await asyncio.sleep(0)
+    try:
+        # Tell EventSource how long to wait before reconnecting
+        yield format_sse(comment='connected', retry=5000)
+        while True:
+            done, _ = await asyncio.wait({next_event}, timeout=heartbeat)
+            if not done:
+                # Keeps proxies from closing an idle connection
+                yield format_sse(comment='keepalive')
+                continue
+            event = next_event.result()
+            next_event = asyncio.ensure_future(anext(events))
+            yield format_sse(event)
+    finally:
+        # Client gone: drop the subscription
+        next_event.cancel()
+        try:
+            await next_event
+        except (asyncio.CancelledError, StopAsyncIteration):
+            pass
+        await events.aclose()
+
+
+@require_GET
+async def event_stream(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'Event stream requires the ASGI server'}, status=503)
+
+    response = StreamingHttpResponse(_event_frames(user.id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Disable proxy buffering (nginx) so events go out immediately
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,205 @@
+"""
+Server-sent events: per-user push channel for notifications and task/project changes.
+
+Views and signals call publish() (sync, after commit); the /api/events/ stream
+(todo.event_views, ASGI only) subscribes to the user's channel through the
+broker configured in settings.EVENT_BROKER:
+- InProcessBroker (default): asyncio queues in the serving process; enough for
+  a single ASGI worker
+- CacheBroker: a per-user event log in the Django cache that subscribers poll;
+  works across processes when the cache is shared (point CACHES at a
+  FileBasedCache locally to test a multi-process setup)
+
+Events only say *what* changed; clients refetch through the regular endpoints
+(e.g. /api/tasks/changes/), so payloads never need per-user permission checks.
+"""
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import ProjectMembership
+
+
+class BaseBroker:
+    """Delivers events to the subscribers of a user's channel"""
+
+    def publish(self, user_ids, event):
+        raise NotImplementedError
+
+    async def subscribe(self, user_id):
+        """Async iterator of events for user_id; ends when the consumer stops iterating"""
+        raise NotImplementedError
+
+
+class InProcessBroker(BaseBroker):
+    """Fans events out to asyncio queues of the streams open in this process"""
+
+    def __init__(self, max_queue_size=100):
+        self.max_queue_size = max_queue_size
+        self._lock = threading.Lock()
+        self._subscribers = {}  # user_id -> {(loop, queue), ...}
+
+    def publish(self, user_ids, event):
+        with self._lock:
+            targets = [
+                subscriber
+                for user_id in set(user_ids)
+                for subscriber in self._subscribers.get(user_id, ())
+            ]
+        for loop, queue in targets:
+            # publish() runs in sync view threads; queues belong to the event loop
+            loop.call_soon_threadsafe(self._put, queue, event)
+
+    @staticmethod
+    def _put(queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A stalled client misses events rather than growing memory;
+            # it resyncs through the regular endpoints when it reconnects
+            pass
+
+    async def subscribe(self, user_id):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(self.max_queue_size))
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+        try:
+            while True:
+                yield await subscriber[1].get()
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(user_id, set())
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    self._subscribers.pop(user_id, None)
+
+
+class CacheBroker(BaseBroker):
+    """
+    Per-user event log in a (shared) Django cache: events:{user_id}:{seq} plus a
+    sequence counter. Subscribers poll the counter, so an idle stream costs one
+    cache read per poll interval and no database queries.
+    """
+
+    def __init__(self, cache_alias='default', poll_interval=1.0, event_ttl=60):
+        self.cache_alias = cache_alias
+        self.poll_interval = poll_interval
+        self.event_ttl = event_ttl
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    @staticmethod
+    def _seq_key(user_id):
+        return f'events_seq:{user_id}'
+
+    @staticmethod
+    def _event_key(user_id, seq):
+        return f'events:{user_id}:{seq}'
+
+    def publish(self, user_ids, event):
+        for user_id in set(user_ids):
+            self.cache.add(self._seq_key(user_id), 0, None)
+            seq = self.cache.incr(self._seq_key(user_id))
+            self.cache.set(self._event_key(user_id, seq), event, self.event_ttl)
+
+    async def subscribe(self, user_id):
+        # Only events published after subscribing are delivered
+        last_seq = await self.cache.aget(self._seq_key(user_id), 0)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            seq = await self.cache.aget(self._seq_key(user_id), 0)
+            if seq <= last_seq:
+                continue
+            keys = [self._event_key(user_id, s) for s in range(last_seq + 1, seq + 1)]
+            events = await self.cache.aget_many(keys)
+            for key in keys:
+                if key in events:
+                    yield events[key]
+            last_seq = seq
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """The broker configured in settings.EVENT_BROKER ({'BACKEND': dotted path, 'OPTIONS': {...}})"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                config = getattr(settings, 'EVENT_BROKER', {})
+                backend = import_string(config.get('BACKEND', 'todo.events.InProcessBroker'))
+                _broker = backend(**config.get('OPTIONS', {}))
+    return _broker
+
+
+def publish(user_ids, event_type, **data):
+    """Publish an event to the given users once the current transaction commits"""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+    event = {'type': event_type, **data}
+
+    def send():
+        try:
+            get_broker().publish(user_ids, event)
+        except Exception as e:
+            # Push is best effort; clients still resync on reconnect
+            print(f"Failed to publish {event_type} event: {e}")
+
+    transaction.on_commit(send)
+
+
+def project_member_ids(project_ids):
+    project_ids = {project_id for project_id in project_ids if project_id is not None}
+    if not project_ids:
+        return set()
+    return set(
+        ProjectMembership.objects.filter(project_id__in=project_ids).values_list('user_id', flat=True)
+    )
+
+
+def publish_notifications(notifications):
+    """Push newly created notifications (also after bulk_create, which skips signals)"""
+    for notification in notifications:
+        publish(
+            [notification.user_id],
+            'notification',
+            id=notification.pk,
+            notification_type=notification.notification_type,
+            title=notification.title,
+        )
+
+
+def publish_task_changes(tasks):
+    """Tell the owners and project members of changed tasks to pull /api/tasks/changes/"""
+    tasks = list(tasks)
+    project_ids = {task.project_id for task in tasks} | {
+        getattr(task, '_original_project_id', None) for task in tasks
+    }
+    publish(
+        {task.owner_id for task in tasks} | project_member_ids(project_ids),
+        'tasks_changed',
+        project_ids=sorted(project_id for project_id in project_ids if project_id is not None),
+    )
+
+
+def format_sse(event=None, comment=None, retry=None):
+    """Encode one server-sent event frame"""
+    lines = []
+    if comment is not None:
+        lines.append(f': {comment}')
+    if retry is not None:
+        lines.append(f'retry: {retry}')
+    if event is not None:
+        lines.append(f"event: {event['type']}")
+        lines.append(f'data: {json.dumps(event, ensure_ascii=False)}')
+    return '\n'.join(lines) + '\n\n'
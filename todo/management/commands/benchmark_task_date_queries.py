@@ -0,0 +1,96 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from todo.access import ProjectAccess
+from todo.dates import get_user_timezone, user_today, user_today_range
+from todo.models import Project, ProjectMembership, Task
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare query plans and timings of due_date__date lookups vs. UTC range lookups for the today view (as TaskViewSet queries it)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', type=str, help='User to benchmark (defaults to a temporary user)')
+        parser.add_argument('--seed', type=int, default=20000, help='Synthetic tasks to insert (rolled back afterwards)')
+        parser.add_argument('--runs', type=int, default=50, help='Timed executions per query')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run_benchmark(options)
+                # Never keep the synthetic data
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def run_benchmark(self, options):
+        if options['email']:
+            try:
+                user = User.objects.get(email=options['email'])
+            except User.DoesNotExist:
+                raise CommandError(f"No user with email {options['email']}")
+        else:
+            user = User.objects.create_user(username='benchmark_task_dates', password=None)
+
+        if options['seed']:
+            self.seed_tasks(user, options['seed'])
+
+        user_tz = get_user_timezone(user)
+        today = user_today(user, user_tz)
+        day_start, day_end = user_today_range(user, user_tz)
+
+        # The visibility filter of TaskViewSet.get_queryset: own tasks plus tasks of accessible projects
+        visible = Task.objects.filter(
+            Q(owner=user) | Q(project_id__in=ProjectAccess(user).project_ids())
+        ).order_by('-created_at')
+        queries = [
+            ('due_date__date (function on column)', visible.filter(
+                is_completed=False, due_date__date=today
+            )),
+            ('UTC half-open range (index seek)', visible.filter(
+                is_completed=False, due_date__gte=day_start, due_date__lt=day_end
+            )),
+        ]
+
+        for label, queryset in queries:
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(queryset.explain())
+            started = time.perf_counter()
+            for _ in range(options['runs']):
+                rows = list(queryset.values_list('id', flat=True))
+            elapsed_ms = (time.perf_counter() - started) * 1000 / options['runs']
+            self.stdout.write(f"rows={len(rows)} avg={elapsed_ms:.2f}ms\n")
+
+    def seed_tasks(self, user, count):
+        now = timezone.now()
+        # A third of the tasks belong to a teammate's project shared with the user,
+        # so both branches of the visibility filter match rows
+        teammate = User.objects.create_user(username='benchmark_task_dates_teammate', password=None)
+        shared_project = Project.objects.create(name='Benchmark shared project', owner=teammate)
+        ProjectMembership.objects.create(user=user, project=shared_project, role='shared')
+        tasks = [
+            Task(
+                title=f'Benchmark task {i}',
+                owner=teammate if i % 3 == 0 else user,
+                project=shared_project if i % 3 == 0 else None,
+                is_completed=random.random() < 0.5,
+                due_date=now + timedelta(hours=random.randint(-24 * 180, 24 * 180)),
+            )
+            for i in range(count)
+        ]
+        Task.objects.bulk_create(tasks, batch_size=1000)
+        # Refresh planner statistics so the plans reflect the seeded distribution
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.stdout.write(f"Seeded {count} tasks for {user.username}")
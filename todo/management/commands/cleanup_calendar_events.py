@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from todo.models import GoogleCalendarEvent
+
+
+class Command(BaseCommand):
+    help = 'Delete cached Google Calendar events that were cancelled long enough ago (run periodically)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'CALENDAR_EVENT_RETENTION_DAYS', 30),
+            help='Keep cancelled events deactivated within this many days'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per statement')
+
+    def handle(self, *args, **options):
+        deleted_count = GoogleCalendarEvent.purge_inactive(
+            retention_days=options['days'],
+            batch_size=options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(f"✅ Deleted {deleted_count} cancelled calendar events"))
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from todo.models import Notification
+
+
+class Command(BaseCommand):
+    help = 'Merge repeated project notifications and delete old read notifications (run periodically)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 90),
+            help='Keep read notifications newer than this many days'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per statement')
+        parser.add_argument('--no-compact', action='store_true', help='Skip merging repeated notifications')
+
+    def handle(self, *args, **options):
+        merged_count = 0
+        if not options['no_compact']:
+            merged_count = Notification.compact()
+        deleted_count = Notification.cleanup_expired(
+            retention_days=options['days'],
+            batch_size=options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Merged {merged_count} and deleted {deleted_count} expired notifications"
+        ))
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from todo.models import ProjectAccessRevocation, TaskDeletion
+
+
+class Command(BaseCommand):
+    help = 'Delete task tombstones and access revocations older than the delta-sync retention window'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'TASK_DELETION_RETENTION_DAYS', 30),
+            help='Keep tombstones newer than this many days'
+        )
+
+    def handle(self, *args, **options):
+        deleted_count = TaskDeletion.cleanup_expired(retention_days=options['days'])
+        revoked_count = ProjectAccessRevocation.cleanup_expired(retention_days=options['days'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Deleted {deleted_count} task tombstones and {revoked_count} access revocations"
+        ))
@@ -151,8 +151,7 @@ class Command(BaseCommand):
                     project=work,
                     owner=demo_user,
                     priority=2,
-                    due_date=today.replace(hour=9, minute=0, second=0, microsecond=0),
-                    order=1
+                    due_date=today.replace(hour=9, minute=0, second=0, microsecond=0)
                 )
                 
                 task2 = Task.objects.create(
@@ -161,8 +160,7 @@ class Command(BaseCommand):
                     project=personal,
                     owner=demo_user,
                     priority=3,
-                    due_date=today.replace(hour=7, minute=30, second=0, microsecond=0),
-                    order=2
+                    due_date=today.replace(hour=7, minute=30, second=0, microsecond=0)
                 )
                 
                 # Tomorrow's tasks
@@ -172,8 +170,7 @@ class Command(BaseCommand):
                     project=personal,
                     owner=demo_user,
                     priority=2,
-                    due_date=tomorrow.replace(hour=10, minute=0, second=0, microsecond=0),
-                    order=3
+                    due_date=tomorrow.replace(hour=10, minute=0, second=0, microsecond=0)
                 )
                 
                 task4 = Task.objects.create(
@@ -182,8 +179,7 @@ class Command(BaseCommand):
                     project=work,
                     owner=demo_user,
                     priority=4,
-                    due_date=tomorrow.replace(hour=14, minute=0, second=0, microsecond=0),
-                    order=4
+                    due_date=tomorrow.replace(hour=14, minute=0, second=0, microsecond=0)
                 )
                 
                 # Future tasks
@@ -193,8 +189,7 @@ class Command(BaseCommand):
                     project=learning,
                     owner=demo_user,
                     priority=1,
-                    due_date=next_week,
-                    order=5
+                    due_date=next_week
                 )
                 
                 task6 = Task.objects.create(
@@ -203,8 +198,7 @@ class Command(BaseCommand):
                     project=personal,
                     owner=demo_user,
                     priority=1,
-                    due_date=next_week + timedelta(days=3),
-                    order=6
+                    due_date=next_week + timedelta(days=3)
                 )
                 
                 # Inbox task (no project)
@@ -212,8 +206,7 @@ class Command(BaseCommand):
                     title='קניית לחם',
                     description='קניית לחם טרי לשבת',
                     owner=demo_user,
-                    priority=1,
-                    order=7
+                    priority=1
                 )
                 
                 # Add labels to some tasks
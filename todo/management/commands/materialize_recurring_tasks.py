@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from todo.models import Task
+from todo.recurrence import materialize_occurrences
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming occurrences of recurring tasks for the configured window'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'RECURRENCE_WINDOW_DAYS', 60),
+            help='Materialize occurrences due within this many days'
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Series processed per transaction')
+
+    def handle(self, *args, **options):
+        series = Task.objects.filter(
+            is_recurring=True,
+            due_date__isnull=False
+        ).exclude(recurring_pattern='').select_related('owner__profile').order_by('id')
+
+        batch_size = options['batch_size']
+        batch = []
+        created_count = 0
+        for task in series.iterator(chunk_size=batch_size):
+            batch.append(task)
+            if len(batch) >= batch_size:
+                created_count += self.materialize(batch, options['days'])
+                batch = []
+        if batch:
+            created_count += self.materialize(batch, options['days'])
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Created {created_count} recurring task occurrences"))
+
+    def materialize(self, batch, days):
+        with transaction.atomic():
+            return len(materialize_occurrences(batch, window_days=days))
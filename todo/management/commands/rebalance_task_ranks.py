@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Length
+
+from todo.models import Task
+from todo.ranking import RANK_REBALANCE_LENGTH, rebalance
+
+
+class Command(BaseCommand):
+    help = 'Rewrite task lists whose ranks grew long with evenly spaced short ranks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-length',
+            type=int,
+            default=RANK_REBALANCE_LENGTH,
+            help='Rebalance lists containing a rank longer than this'
+        )
+        parser.add_argument('--all', action='store_true', help='Rebalance every list')
+
+    def handle(self, *args, **options):
+        tasks = Task.objects.all()
+        if not options['all']:
+            # Empty ranks come from rows written without Task.save (e.g. raw imports)
+            tasks = tasks.annotate(rank_length=Length('rank')).filter(
+                Q(rank_length__gt=options['max_length']) | Q(rank='')
+            )
+
+        groups = set()
+        for project_id, parent_task_id, owner_id in tasks.values_list('project_id', 'parent_task_id', 'owner_id'):
+            # Project lists are shared by all members; inbox lists are per owner
+            groups.add((project_id, parent_task_id, owner_id if project_id is None else None))
+
+        rebalanced_count = 0
+        for project_id, parent_task_id, owner_id in groups:
+            siblings = Task(project_id=project_id, parent_task_id=parent_task_id, owner_id=owner_id).get_siblings()
+            with transaction.atomic():
+                rebalanced_count += len(rebalance(siblings))
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Rebalanced {len(groups)} lists ({rebalanced_count} tasks)"))
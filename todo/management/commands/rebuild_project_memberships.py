@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from todo.models import ProjectMembership
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized ProjectMembership table from projects and accepted shares'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = ProjectMembership.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt {count} project memberships"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from todo.models import Task, TaskSearchDocument
+from todo.search import index_tasks
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search documents of all tasks'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            TaskSearchDocument.objects.all().delete()
+            task_ids = list(Task.objects.values_list('id', flat=True))
+            index_tasks(task_ids)
+        self.stdout.write(self.style.SUCCESS(f"✅ Indexed {len(task_ids)} tasks"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from todo.models import NotificationCounter
+
+
+class Command(BaseCommand):
+    help = 'Recount unread notifications and fix drifted NotificationCounter rows (run periodically)'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            fixed = NotificationCounter.reconcile()
+        self.stdout.write(self.style.SUCCESS(f"✅ Reconciled notification counters ({fixed} corrected)"))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from todo.outbox import send_batch
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued EmailOutbox rows in batches over one SMTP connection (long-running worker)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Emails sent per SMTP connection')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the due emails once and exit')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = send_batch(options['batch_size'])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f"📧 Sent {sent}, failed {failed}")
+                # A full batch means more may be due right away
+                if sent + failed >= options['batch_size']:
+                    continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Outbox drained: {total_sent} sent, {total_failed} failed"))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from todo.calendar_sync import run_batch
+
+
+class Command(BaseCommand):
+    help = 'Incrementally sync Google Calendar events of all connected users on a schedule (long-running worker)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=20, help='Users claimed per batch')
+        parser.add_argument('--concurrency', type=int, default=None,
+                            help='Users synced in parallel (default: CALENDAR_SYNC_WORKER_CONCURRENCY)')
+        parser.add_argument('--interval', type=float, default=30.0, help='Seconds to sleep when no user is due')
+        parser.add_argument('--once', action='store_true', help='Sync the users that are due once and exit')
+
+    def handle(self, *args, **options):
+        total_synced = total_failed = 0
+        while True:
+            synced, failed = run_batch(options['batch_size'], options['concurrency'])
+            total_synced += synced
+            total_failed += failed
+            if synced or failed:
+                self.stdout.write(f"📅 Synced {synced} users, {failed} failed")
+                # A full batch means more may be due right away
+                if synced + failed >= options['batch_size']:
+                    continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Calendar sync done: {total_synced} synced, {total_failed} failed"))
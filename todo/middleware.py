@@ -0,0 +1,114 @@
+"""
+Per-request query and latency instrumentation.
+
+QueryBudgetMiddleware counts the SQL queries and database time of every
+request (through connection.execute_wrapper, so it works with DEBUG off),
+adds them as Server-Timing / X-Query-Count headers when enabled and logs
+requests that go over their view's budget. Budgets live in
+settings.QUERY_BUDGET['VIEWS']: a URL name ('task-list', 'project-detail',
+...) budgets its reads (GET/HEAD/OPTIONS), a (URL name, method) pair such as
+('task-list', 'POST') budgets a write; writes without one get the defaults.
+todo.testing.query_budget enforces the same budgets in tests.
+"""
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Context manager counting queries and database time on all connections of this thread"""
+
+    def __init__(self, record_sql=False):
+        self.count = 0
+        self.db_seconds = 0.0
+        self.queries = [] if record_sql else None
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - start
+            self.count += 1
+            if self.queries is not None:
+                self.queries.append(sql)
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+        self._stack = None
+
+    @property
+    def db_ms(self):
+        return self.db_seconds * 1000
+
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def budget_for(view_name, method='GET'):
+    """(max_queries, max_ms) for a URL name and HTTP method, falling back to the defaults"""
+    config = getattr(settings, 'QUERY_BUDGET', {})
+    max_queries = config.get('DEFAULT_MAX_QUERIES', 30)
+    max_ms = config.get('MAX_DURATION_MS', 1000)
+    views = config.get('VIEWS', {})
+    budget = views.get((view_name, method.upper()))
+    if budget is None and method.upper() in READ_METHODS:
+        budget = views.get(view_name)
+    if isinstance(budget, dict):
+        max_queries = budget.get('queries', max_queries)
+        max_ms = budget.get('ms', max_ms)
+    elif budget is not None:
+        max_queries = budget
+    return max_queries, max_ms
+
+
+class QueryBudgetMiddleware:
+    """
+    Sync only: queries of async views run in sync_to_async threads the wrapper
+    would not see. Streaming bodies (/api/events/) are produced after the
+    middleware returns, so only the time to the first byte is measured.
+    """
+
+    def __init__(self, get_response):
+        config = getattr(settings, 'QUERY_BUDGET', {})
+        if not config.get('ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.headers = config.get('HEADERS', False)
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with QueryStats() as stats:
+            response = self.get_response(request)
+        wall_ms = (time.perf_counter() - start) * 1000
+
+        if self.headers:
+            response['Server-Timing'] = (
+                f'db;dur={stats.db_ms:.1f};desc="{stats.count} queries", total;dur={wall_ms:.1f}'
+            )
+            response['X-Query-Count'] = str(stats.count)
+
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            view_name = match.view_name
+            max_queries, max_ms = budget_for(view_name, request.method)
+            if stats.count > max_queries or wall_ms > max_ms:
+                logger.warning(
+                    "Over budget: %s %s (%s) - %d/%d queries, %.1fms db, %.1f/%sms total",
+                    request.method, request.path, view_name,
+                    stats.count, max_queries, stats.db_ms, wall_ms, max_ms
+                )
+        return response
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.14 on 2026-10-17 20:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0014_notification_projectshare'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField(verbose_name='מזהה משימה')),
+                ('owner_id', models.BigIntegerField(verbose_name='מזהה בעלים')),
+                ('project_id', models.BigIntegerField(blank=True, null=True, verbose_name='מזהה פרויקט')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, verbose_name='נמחקה בתאריך')),
+            ],
+            options={
+                'verbose_name': 'משימה שנמחקה',
+                'verbose_name_plural': 'משימות שנמחקו',
+                'ordering': ['-deleted_at'],
+                'indexes': [models.Index(fields=['deleted_at'], name='todo_taskde_deleted_3d8338_idx'), models.Index(fields=['owner_id', 'deleted_at'], name='todo_taskde_owner_i_7cb922_idx'), models.Index(fields=['project_id', 'deleted_at'], name='todo_taskde_project_737ccd_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-17 20:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0015_taskdeletion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['created_at', 'id'], name='todo_task_created_32aca9_idx'),
+        ),
+    ]
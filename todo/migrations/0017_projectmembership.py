@@ -0,0 +1,51 @@
+# Generated by Django 5.0.14 on 2026-10-17 20:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_memberships(apps, schema_editor):
+    Project = apps.get_model('todo', 'Project')
+    ProjectShare = apps.get_model('todo', 'ProjectShare')
+    ProjectMembership = apps.get_model('todo', 'ProjectMembership')
+
+    rows = [
+        ProjectMembership(user_id=owner_id, project_id=project_id, role='owner')
+        for project_id, owner_id in Project.objects.values_list('id', 'owner_id')
+    ]
+    rows.extend(
+        ProjectMembership(user_id=user_id, project_id=project_id, role='shared')
+        for project_id, user_id in ProjectShare.objects.filter(
+            status='accepted'
+        ).values_list('project_id', 'shared_with_id')
+    )
+    # Owner rows come first, so an owner's own share never overrides the owner role
+    ProjectMembership.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0016_task_created_at_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('owner', 'בעלים'), ('shared', 'משותף')], max_length=10, verbose_name='תפקיד')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='נוצר בתאריך')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='todo.project', verbose_name='פרויקט')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='project_memberships', to=settings.AUTH_USER_MODEL, verbose_name='משתמש')),
+            ],
+            options={
+                'verbose_name': 'חברות בפרויקט',
+                'verbose_name_plural': 'חברויות בפרויקטים',
+                'unique_together': {('user', 'project')},
+            },
+        ),
+        migrations.RunPython(populate_memberships, migrations.RunPython.noop),
+    ]
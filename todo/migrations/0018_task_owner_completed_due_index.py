@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-17 20:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0017_projectmembership'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'is_completed', 'due_date'], name='todo_task_owner_i_bf46e0_idx'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.0.14 on 2026-10-17 20:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copy of todo.ranking.evenly_spaced_ranks as of this migration, so later
+# changes to the ranking module can't change what this migration writes
+ALPHABET = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(ALPHABET)
+
+
+def evenly_spaced_ranks(count):
+    """`count` short, increasing ranks spread evenly over the key space"""
+    width = 2
+    while BASE ** width < (count + 1) * BASE:
+        width += 1
+    space = BASE ** width
+    ranks = []
+    for i in range(1, count + 1):
+        value = i * space // (count + 1)
+        digits = []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(ALPHABET[digit])
+        ranks.append(''.join(reversed(digits)).rstrip('0'))
+    return ranks
+
+
+def populate_ranks(apps, schema_editor):
+    Task = apps.get_model('todo', 'Task')
+
+    groups = {}
+    tasks = Task.objects.order_by('order', '-priority', 'due_date', 'created_at', 'id')
+    for task in tasks.only('id', 'project_id', 'parent_task_id', 'owner_id'):
+        # Project lists are shared by all members; inbox lists are per owner
+        key = (task.project_id, task.parent_task_id, task.owner_id if task.project_id is None else None)
+        groups.setdefault(key, []).append(task)
+
+    updated = []
+    for group in groups.values():
+        for task, rank in zip(group, evenly_spaced_ranks(len(group))):
+            task.rank = rank
+            updated.append(task)
+    Task.objects.bulk_update(updated, ['rank'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0018_task_owner_completed_due_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='task',
+            options={'ordering': ['rank', '-priority', 'due_date', 'created_at'], 'verbose_name': 'משימה', 'verbose_name_plural': 'משימות'},
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='rank',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='דירוג'),
+        ),
+        migrations.RunPython(populate_ranks, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='task',
+            name='order',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'rank'], name='todo_task_project_04e89f_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.14 on 2026-10-17 20:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0019_task_rank'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='occurrence_date',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='תאריך מופע'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='recurrence_generated_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='מופעים נוצרו עד'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='recurrence_parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='todo.task', verbose_name='סדרה חוזרת'),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='recurring_pattern',
+            field=models.CharField(blank=True, max_length=500, verbose_name='תבנית חזרה'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(fields=('recurrence_parent', 'occurrence_date'), name='unique_task_occurrence'),
+        ),
+    ]
@@ -0,0 +1,122 @@
+# Generated by Django 5.0.14 on 2026-10-17 20:58
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copies of the todo.search helpers as of this migration, so later
+# changes to the search module can't change what this migration does
+DOCUMENT_TABLE = 'todo_tasksearchdocument'
+FTS_TABLE = f'{DOCUMENT_TABLE}_fts'
+POSTGRES_INDEX = f'{DOCUMENT_TABLE}_tsv_idx'
+POSTGRES_VECTOR = "to_tsvector('simple', title || ' ' || body)"
+
+HEBREW_PREFIX_LETTERS = set('והבכלמש')
+MAX_PREFIX_LENGTH = 3
+MIN_STEM_LENGTH = 3
+FINAL_LETTERS = str.maketrans('ךםןףץ', 'כמנפצ')
+HEBREW_LETTER = re.compile(r'[א-ת]')
+WORD = re.compile(r'\w+')
+
+
+def normalize_text(text):
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return stripped.lower().translate(FINAL_LETTERS)
+
+
+def token_variants(token):
+    variants = [token]
+    if HEBREW_LETTER.match(token):
+        for i in range(min(MAX_PREFIX_LENGTH, len(token) - MIN_STEM_LENGTH)):
+            if token[i] not in HEBREW_PREFIX_LETTERS:
+                break
+            variants.append(token[i + 1:])
+    return variants
+
+
+def document_text(text):
+    tokens = WORD.findall(normalize_text(text))
+    return ' '.join(variant for token in tokens for variant in token_variants(token))
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            f"title, body, content='{DOCUMENT_TABLE}', content_rowid='task_id')"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {DOCUMENT_TABLE} BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.task_id, new.title, new.body); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {DOCUMENT_TABLE} BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) "
+            f"VALUES ('delete', old.task_id, old.title, old.body); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON {DOCUMENT_TABLE} BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) "
+            f"VALUES ('delete', old.task_id, old.title, old.body); "
+            f"INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.task_id, new.title, new.body); END"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE INDEX {POSTGRES_INDEX} ON {DOCUMENT_TABLE} USING GIN ({POSTGRES_VECTOR})"
+        )
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute(f"DROP INDEX IF EXISTS {POSTGRES_INDEX}")
+
+
+def populate_documents(apps, schema_editor):
+    Task = apps.get_model('todo', 'Task')
+    TaskSearchDocument = apps.get_model('todo', 'TaskSearchDocument')
+
+    documents = []
+    for task in Task.objects.only('id', 'title', 'description').prefetch_related('labels').iterator(chunk_size=500):
+        label_names = ' '.join(label.name for label in task.labels.all())
+        documents.append(TaskSearchDocument(
+            task_id=task.pk,
+            title=document_text(task.title),
+            body=document_text(f'{task.description or ""} {label_names}'),
+        ))
+        if len(documents) >= 500:
+            TaskSearchDocument.objects.bulk_create(documents)
+            documents = []
+    TaskSearchDocument.objects.bulk_create(documents)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0020_task_recurrence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskSearchDocument',
+            fields=[
+                ('task', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='todo.task', verbose_name='משימה')),
+                ('title', models.TextField(blank=True, verbose_name='כותרת מנורמלת')),
+                ('body', models.TextField(blank=True, verbose_name='תוכן מנורמל')),
+            ],
+            options={
+                'verbose_name': 'מסמך חיפוש משימה',
+                'verbose_name_plural': 'מסמכי חיפוש משימות',
+            },
+        ),
+        migrations.RunPython(create_index, drop_index),
+        migrations.RunPython(populate_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_counters(apps, schema_editor):
+    Notification = apps.get_model('todo', 'Notification')
+    NotificationCounter = apps.get_model('todo', 'NotificationCounter')
+    NotificationCounter.objects.bulk_create([
+        NotificationCounter(user_id=row['user_id'], unread_count=row['count'])
+        for row in Notification.objects.filter(is_read=False).order_by().values('user_id').annotate(
+            count=models.Count('id')
+        )
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('todo', '0021_task_search_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_counter', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='משתמש')),
+                ('unread_count', models.PositiveIntegerField(default=0, verbose_name='התראות שלא נקראו')),
+            ],
+            options={
+                'verbose_name': 'מונה התראות',
+                'verbose_name_plural': 'מוני התראות',
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:25
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0023_notification_pagination_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('to_email', models.EmailField(max_length=254, verbose_name='נמען')),
+                ('from_email', models.CharField(max_length=255, verbose_name='שולח')),
+                ('subject', models.CharField(max_length=255, verbose_name='נושא')),
+                ('text_body', models.TextField(verbose_name='תוכן')),
+                ('html_body', models.TextField(blank=True, verbose_name='תוכן HTML')),
+                ('status', models.CharField(choices=[('pending', 'ממתין'), ('sent', 'נשלח'), ('failed', 'נכשל')], default='pending', max_length=10, verbose_name='סטטוס')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='ניסיונות')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='ניסיון הבא')),
+                ('last_error', models.TextField(blank=True, verbose_name='שגיאה אחרונה')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='נוצר בתאריך')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='נשלח בתאריך')),
+            ],
+            options={
+                'verbose_name': 'אימייל יוצא',
+                'verbose_name_plural': 'תור אימיילים יוצאים',
+                'ordering': ['next_attempt_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='todo_emailo_status_7f4f67_idx')],
+            },
+        ),
+    ]
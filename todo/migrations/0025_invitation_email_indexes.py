@@ -0,0 +1,46 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def lowercase_emails(apps, schema_editor):
+    """Invitations are now matched by exact lowercase email"""
+    for model_name, owner_field, email_field in [
+        ('Friend', 'user_id', 'friend_email'),
+        ('FriendInvitation', 'inviter_id', 'invitee_email'),
+    ]:
+        Model = apps.get_model('todo', model_name)
+        taken = set(Model.objects.exclude(**{f'{email_field}__isnull': True}).values_list(owner_field, email_field))
+        for row in Model.objects.exclude(**{f'{email_field}__isnull': True}).iterator():
+            email = getattr(row, email_field)
+            normalized = email.strip().lower()
+            if normalized == email:
+                continue
+            key = (getattr(row, owner_field), normalized)
+            if key in taken:
+                # Same inviter already has the lowercase row (unique_together)
+                row.delete()
+                continue
+            taken.add(key)
+            Model.objects.filter(pk=row.pk).update(**{email_field: normalized})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0024_email_outbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='friend',
+            index=models.Index(condition=models.Q(('is_invitation', True), ('status', 'pending')), fields=['friend_email'], name='friend_pending_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='friendinvitation',
+            index=models.Index(condition=models.Q(('is_used', False)), fields=['invitee_email'], name='friendinv_open_email_idx'),
+        ),
+    ]
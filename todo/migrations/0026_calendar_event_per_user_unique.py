@@ -0,0 +1,24 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0025_invitation_email_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='googlecalendarevent',
+            name='google_event_id',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AddConstraint(
+            model_name='googlecalendarevent',
+            constraint=models.UniqueConstraint(fields=('user', 'google_event_id'), name='unique_user_google_event'),
+        ),
+    ]
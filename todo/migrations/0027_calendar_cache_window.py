@@ -0,0 +1,33 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0026_calendar_event_per_user_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='googlecalendarevent',
+            name='todo_google_user_id_a86508_idx',
+        ),
+        migrations.AddField(
+            model_name='googlecalendartoken',
+            name='synced_from',
+            field=models.DateTimeField(blank=True, help_text='Start of the date range kept in sync by sync_tokens', null=True),
+        ),
+        migrations.AddField(
+            model_name='googlecalendartoken',
+            name='synced_until',
+            field=models.DateTimeField(blank=True, help_text='End of the date range kept in sync by sync_tokens', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='googlecalendarevent',
+            index=models.Index(fields=['user', 'start_time', 'end_time'], name='todo_google_user_id_341a60_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0027_calendar_cache_window'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='googlecalendartoken',
+            name='last_sync_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='googlecalendartoken',
+            name='next_sync_at',
+            field=models.DateTimeField(blank=True, help_text='When the sync_calendars worker syncs this user next', null=True),
+        ),
+        migrations.AddField(
+            model_name='googlecalendartoken',
+            name='sync_failures',
+            field=models.PositiveIntegerField(default=0, help_text='Consecutive failed background syncs'),
+        ),
+        migrations.AddIndex(
+            model_name='googlecalendartoken',
+            index=models.Index(fields=['is_active', 'next_sync_at'], name='todo_google_is_acti_cbbb91_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_recurring_event_ids(apps, schema_editor):
+    """Copy recurringEventId out of the cached API payload"""
+    GoogleCalendarEvent = apps.get_model('todo', 'GoogleCalendarEvent')
+    batch = []
+    for event in GoogleCalendarEvent.objects.only('id', 'event_data').iterator():
+        recurring_event_id = (event.event_data or {}).get('recurringEventId')
+        if recurring_event_id:
+            event.recurring_event_id = recurring_event_id
+            batch.append(event)
+        if len(batch) >= 500:
+            GoogleCalendarEvent.objects.bulk_update(batch, ['recurring_event_id'])
+            batch = []
+    if batch:
+        GoogleCalendarEvent.objects.bulk_update(batch, ['recurring_event_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0028_calendar_sync_schedule'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='googlecalendarevent',
+            name='recurring_event_id',
+            field=models.CharField(blank=True, default='', help_text='Series id of a recurring event instance', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='googlecalendarevent',
+            name='is_active',
+            field=models.BooleanField(default=True, help_text='False once Google reports the event cancelled; purged later'),
+        ),
+        migrations.AddIndex(
+            model_name='googlecalendarevent',
+            index=models.Index(fields=['user', 'recurring_event_id'], name='todo_google_user_id_54b185_idx'),
+        ),
+        migrations.RunPython(fill_recurring_event_ids, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:48
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def collapse_legacy_chains(apps, schema_editor):
+    """
+    The old create_next_occurrence copied a recurring task on every completion and
+    left is_recurring=True on every copy, so each copy would be materialized as a
+    series of its own. Keep the latest row of each chain as the series and turn
+    the older copies into plain tasks. Open occurrences already materialized from
+    those copies are duplicates and are removed; the series recreates them.
+    """
+    Task = apps.get_model('todo', 'Task')
+    TaskDeletion = apps.get_model('todo', 'TaskDeletion')
+
+    chains = defaultdict(list)
+    legacy = Task.objects.filter(
+        is_recurring=True, recurrence_parent__isnull=True
+    ).exclude(recurring_pattern='').order_by(models.F('due_date').asc(nulls_first=True), 'id')
+    for task in legacy.only('id', 'owner_id', 'project_id', 'title', 'recurring_pattern', 'due_time', 'due_date'):
+        chains[(task.owner_id, task.project_id, task.title, task.recurring_pattern, task.due_time)].append(task.id)
+
+    demoted_ids = [task_id for task_ids in chains.values() for task_id in task_ids[:-1]]
+    for i in range(0, len(demoted_ids), 500):
+        chunk = demoted_ids[i:i + 500]
+        duplicates = Task.objects.filter(recurrence_parent_id__in=chunk, is_completed=False)
+        # Historical models don't fire signals: write the delta-sync tombstones here
+        TaskDeletion.objects.bulk_create([
+            TaskDeletion(task_id=task_id, owner_id=owner_id, project_id=project_id)
+            for task_id, owner_id, project_id in duplicates.values_list('id', 'owner_id', 'project_id')
+        ])
+        duplicates.delete()
+        Task.objects.filter(recurrence_parent_id__in=chunk).update(recurrence_parent=None)
+        Task.objects.filter(id__in=chunk).update(is_recurring=False, recurrence_generated_until=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0029_calendar_event_cancellations'),
+    ]
+
+    operations = [
+        migrations.RunPython(collapse_legacy_chains, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='task',
+            name='recurrence_parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occurrences', to='todo.task', verbose_name='סדרה חוזרת'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0030_collapse_legacy_recurring_chains'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='googlecalendartoken',
+            name='fetched_ranges',
+            field=models.JSONField(blank=True, default=list, help_text="Ranges outside synced_from/synced_until read through from Google: [{'from', 'until', 'fetched_at'}]"),
+        ),
+    ]
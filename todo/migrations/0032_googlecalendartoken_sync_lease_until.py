@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 21:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0031_googlecalendartoken_fetched_ranges'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='googlecalendartoken',
+            name='sync_lease_until',
+            field=models.DateTimeField(blank=True, help_text='Set while a sync of this user runs (worker or view); see claim_sync', null=True),
+        ),
+    ]
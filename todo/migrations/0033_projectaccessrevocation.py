@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-17 22:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0032_googlecalendartoken_sync_lease_until'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectAccessRevocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.BigIntegerField(verbose_name='מזהה משתמש')),
+                ('project_id', models.BigIntegerField(verbose_name='מזהה פרויקט')),
+                ('revoked_at', models.DateTimeField(auto_now_add=True, verbose_name='בוטל בתאריך')),
+            ],
+            options={
+                'verbose_name': 'ביטול גישה לפרויקט',
+                'verbose_name_plural': 'ביטולי גישה לפרויקטים',
+                'ordering': ['-revoked_at'],
+                'indexes': [models.Index(fields=['user_id', 'revoked_at'], name='todo_projec_user_id_60c866_idx'), models.Index(fields=['revoked_at'], name='todo_projec_revoked_aea1d8_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Greatest
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import datetime, timedelta
@@ -78,15 +79,12 @@ class Project(models.Model):
     
     def is_shared_with_user(self, user):
         """Check if project is shared with a specific user"""
-        return self.shares.filter(shared_with=user, status='accepted').exists()
+        from .access import ProjectAccess
+        return ProjectAccess(user).is_shared(self)
 
     def get_all_members(self):
         """Get all users who have access (owner + accepted shares)"""
-        member_ids = [self.owner.id]
-        member_ids.extend(
-            self.shares.filter(status='accepted').values_list('shared_with_id', flat=True)
-        )
-        return User.objects.filter(id__in=member_ids)
+        return User.objects.filter(project_memberships__project=self)
 
     def can_user_delete(self, user):
         """Only owner can delete project"""
@@ -138,10 +136,16 @@ class Task(models.Model):
     
     # Recurring tasks
     is_recurring = models.BooleanField(default=False, verbose_name='חוזרת')
-    recurring_pattern = models.CharField(max_length=100, blank=True, verbose_name='תבנית חזרה')  # daily, weekly, monthly, etc.
+    recurring_pattern = models.CharField(max_length=500, blank=True, verbose_name='תבנית חזרה')  # daily, weekly, monthly or an RRULE (see todo.recurrence)
+    # SET_NULL: completed and overdue occurrences outlive their series as ordinary
+    # tasks; the open ones from today on are deleted with it (see todo.signals)
+    recurrence_parent = models.ForeignKey('self', on_delete=models.SET_NULL, related_name='occurrences', null=True, blank=True, verbose_name='סדרה חוזרת')
+    occurrence_date = models.DateTimeField(null=True, blank=True, verbose_name='תאריך מופע')
+    recurrence_generated_until = models.DateTimeField(null=True, blank=True, verbose_name='מופעים נוצרו עד')
     
     # Order for sorting
-    order = models.IntegerField(default=0, verbose_name='סדר')
+    # Lexicographic position within the task's list (see todo.ranking)
+    rank = models.CharField(max_length=255, blank=True, default='', verbose_name='דירוג')
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='נוצר בתאריך')
@@ -150,11 +154,42 @@ class Task(models.Model):
     class Meta:
         verbose_name = 'משימה'
         verbose_name_plural = 'משימות'
-        ordering = ['order', '-priority', 'due_date', 'created_at']
+        ordering = ['rank', '-priority', 'due_date', 'created_at']
+        indexes = [
+            # Manual ordering within a project (see todo.ranking)
+            models.Index(fields=['project', 'rank']),
+            # Keyset pagination key (see todo.pagination.TaskKeysetPagination)
+            models.Index(fields=['created_at', 'id']),
+            # Today/upcoming/overdue range scans (see todo.dates)
+            models.Index(fields=['owner', 'is_completed', 'due_date']),
+        ]
+        constraints = [
+            # Makes occurrence materialization idempotent (see todo.recurrence)
+            models.UniqueConstraint(fields=['recurrence_parent', 'occurrence_date'], name='unique_task_occurrence'),
+        ]
     
     def __str__(self):
         return self.title
     
+    def save(self, *args, **kwargs):
+        if not self.rank:
+            # New tasks go to the end of their list
+            self.rank = self.next_rank()
+        super().save(*args, **kwargs)
+    
+    def get_siblings(self):
+        """Tasks sharing this task's manually ordered list (project or inbox, same parent)"""
+        siblings = Task.objects.filter(project_id=self.project_id, parent_task_id=self.parent_task_id)
+        if self.project_id is None:
+            siblings = siblings.filter(owner_id=self.owner_id)
+        return siblings
+    
+    def next_rank(self):
+        """Rank placing this task after the last of its siblings"""
+        from .ranking import rank_between
+        last_rank = self.get_siblings().order_by().aggregate(last=models.Max('rank'))['last']
+        return rank_between(last_rank or None, None)
+    
     def is_overdue(self):
         if self.due_date and not self.is_completed:
             return timezone.now() > self.due_date
@@ -185,39 +220,19 @@ class Task(models.Model):
         self.is_completed = True
         self.completed_at = timezone.now()
         self.save()
-        
-        # Handle recurring tasks
-        if self.is_recurring and self.recurring_pattern:
-            self.create_next_occurrence()
-    
-    def create_next_occurrence(self):
-        """Create next occurrence for recurring tasks"""
-        if not self.is_recurring:
-            return
-            
-        next_due_date = None
-        if self.due_date:
-            if self.recurring_pattern == 'daily':
-                next_due_date = self.due_date + timedelta(days=1)
-            elif self.recurring_pattern == 'weekly':
-                next_due_date = self.due_date + timedelta(weeks=1)
-            elif self.recurring_pattern == 'monthly':
-                next_due_date = self.due_date + timedelta(days=30)
-        
-        if next_due_date:
-            Task.objects.create(
-                title=self.title,
-                description=self.description,
-                project=self.project,
-                owner=self.owner,
-                assignee=self.assignee,
-                priority=self.priority,
-                due_date=next_due_date,
-                due_time=self.due_time,
-                is_recurring=True,
-                recurring_pattern=self.recurring_pattern,
-                order=self.order
-            )
+        self.extend_recurrence()
+    
+    def extend_recurrence(self):
+        """
+        After completing a task of a recurring series, make sure the series' next
+        occurrence exists. The rest of the window is filled by materialize_recurring_tasks.
+        """
+        series = self if self.is_recurring else self.recurrence_parent
+        if series is not None and series.is_recurring and series.recurring_pattern:
+            from .recurrence import create_next_occurrence
+            after = self.occurrence_date or self.due_date
+            if after is not None:
+                create_next_occurrence(series, after)
     
     def has_subtasks(self):
         """Check if this task has sub-tasks"""
@@ -235,11 +250,96 @@ class Task(models.Model):
         """Check if this task is a sub-task"""
         return self.parent_task is not None
     
+    def get_ancestors(self):
+        """Parent chain of this task, nearest first, loaded with one recursive query"""
+        if self.parent_task_id is None:
+            return []
+        from .task_tree import fetch_ancestors
+        return fetch_ancestors(self.pk)
+    
     def get_root_task(self):
         """Get the root parent task"""
-        if self.parent_task:
-            return self.parent_task.get_root_task()
-        return self
+        ancestors = self.get_ancestors()
+        return ancestors[-1] if ancestors else self
+
+
+class TaskDeletion(models.Model):
+    """
+    Tombstone log of deleted tasks, read by the task delta-sync endpoint.
+    Tasks moved out of a project get one too, for the members who lose sight of them.
+    Ids are stored as plain integers so entries survive the owner/project deletion.
+    """
+    task_id = models.BigIntegerField(verbose_name='מזהה משימה')
+    owner_id = models.BigIntegerField(verbose_name='מזהה בעלים')
+    project_id = models.BigIntegerField(null=True, blank=True, verbose_name='מזהה פרויקט')
+    deleted_at = models.DateTimeField(auto_now_add=True, verbose_name='נמחקה בתאריך')
+
+    class Meta:
+        verbose_name = 'משימה שנמחקה'
+        verbose_name_plural = 'משימות שנמחקו'
+        ordering = ['-deleted_at']
+        indexes = [
+            models.Index(fields=['deleted_at']),
+            models.Index(fields=['owner_id', 'deleted_at']),
+            models.Index(fields=['project_id', 'deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"Task {self.task_id} deleted at {self.deleted_at}"
+
+    @classmethod
+    def cleanup_expired(cls, retention_days=30):
+        """Delete tombstones older than the retention window (run this periodically)"""
+        cutoff = timezone.now() - timedelta(days=retention_days)
+        deleted_count, _ = cls.objects.filter(deleted_at__lt=cutoff).delete()
+        return deleted_count
+
+
+class ProjectAccessRevocation(models.Model):
+    """
+    Log of users losing access to a project (left, unshared, declined, project deleted).
+    The task delta-sync endpoint answers with a full snapshot when one is newer than the
+    cursor, since the tombstones of those tasks are no longer visible to the user.
+    """
+    user_id = models.BigIntegerField(verbose_name='מזהה משתמש')
+    project_id = models.BigIntegerField(verbose_name='מזהה פרויקט')
+    revoked_at = models.DateTimeField(auto_now_add=True, verbose_name='בוטל בתאריך')
+
+    class Meta:
+        verbose_name = 'ביטול גישה לפרויקט'
+        verbose_name_plural = 'ביטולי גישה לפרויקטים'
+        ordering = ['-revoked_at']
+        indexes = [
+            models.Index(fields=['user_id', 'revoked_at']),
+            models.Index(fields=['revoked_at']),
+        ]
+
+    def __str__(self):
+        return f"User {self.user_id} lost project {self.project_id} at {self.revoked_at}"
+
+    @classmethod
+    def cleanup_expired(cls, retention_days=30):
+        """Delete entries older than the retention window (run this periodically)"""
+        cutoff = timezone.now() - timedelta(days=retention_days)
+        deleted_count, _ = cls.objects.filter(revoked_at__lt=cutoff).delete()
+        return deleted_count
+
+class TaskSearchDocument(models.Model):
+    """
+    Normalized search text of a task (title, description and label names).
+    The database full-text index (SQLite FTS5 / PostgreSQL tsvector) is built
+    over this table; see todo.search.
+    """
+    task = models.OneToOneField(Task, on_delete=models.CASCADE, primary_key=True, related_name='search_document', verbose_name='משימה')
+    title = models.TextField(blank=True, verbose_name='כותרת מנורמלת')
+    body = models.TextField(blank=True, verbose_name='תוכן מנורמל')
+
+    class Meta:
+        verbose_name = 'מסמך חיפוש משימה'
+        verbose_name_plural = 'מסמכי חיפוש משימות'
+
+    def __str__(self):
+        return f"Search document for task {self.task_id}"
 
 
 class Comment(models.Model):
@@ -364,6 +464,55 @@ class EmailVerification(models.Model):
         return expired_count
 
 
+class EmailOutbox(models.Model):
+    """
+    Outgoing email queue. Requests only insert a row (in their own transaction);
+    the send_outbox_emails worker delivers them in batches over one SMTP
+    connection, retrying failures with exponential backoff (see todo.outbox).
+    """
+    STATUS_CHOICES = [
+        ('pending', 'ממתין'),
+        ('sent', 'נשלח'),
+        ('failed', 'נכשל'),
+    ]
+
+    to_email = models.EmailField(verbose_name='נמען')
+    from_email = models.CharField(max_length=255, verbose_name='שולח')
+    subject = models.CharField(max_length=255, verbose_name='נושא')
+    text_body = models.TextField(verbose_name='תוכן')
+    html_body = models.TextField(blank=True, verbose_name='תוכן HTML')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name='סטטוס')
+    attempts = models.PositiveIntegerField(default=0, verbose_name='ניסיונות')
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name='ניסיון הבא')
+    last_error = models.TextField(blank=True, verbose_name='שגיאה אחרונה')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='נוצר בתאריך')
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name='נשלח בתאריך')
+
+    class Meta:
+        verbose_name = 'אימייל יוצא'
+        verbose_name_plural = 'תור אימיילים יוצאים'
+        ordering = ['next_attempt_at']
+        indexes = [
+            # The worker's "due" scan
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.to_email} - {self.subject} ({self.status})"
+
+    @classmethod
+    def enqueue(cls, subject, message, recipient, html_message='', from_email=None):
+        """Queue an email instead of calling SMTP inside the request"""
+        from django.conf import settings
+        return cls.objects.create(
+            to_email=recipient,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            subject=subject,
+            text_body=message,
+            html_body=html_message or '',
+        )
+
+
 class GoogleCalendarToken(models.Model):
     """Store Google Calendar OAuth tokens for users"""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='calendar_token')
@@ -380,10 +529,23 @@ class GoogleCalendarToken(models.Model):
     last_sync_token = models.TextField(null=True, blank=True, help_text="Token for incremental sync")
     last_sync_time = models.DateTimeField(null=True, blank=True, help_text="Last successful sync timestamp")
     sync_tokens = models.JSONField(default=dict, help_text="Per-calendar sync tokens")
+    synced_from = models.DateTimeField(null=True, blank=True, help_text="Start of the date range kept in sync by sync_tokens")
+    synced_until = models.DateTimeField(null=True, blank=True, help_text="End of the date range kept in sync by sync_tokens")
+    next_sync_at = models.DateTimeField(null=True, blank=True, help_text="When the sync_calendars worker syncs this user next")
+    sync_failures = models.PositiveIntegerField(default=0, help_text="Consecutive failed background syncs")
+    last_sync_error = models.TextField(blank=True, default='')
+    sync_lease_until = models.DateTimeField(null=True, blank=True, help_text="Set while a sync of this user runs (worker or view); see claim_sync")
+    fetched_ranges = models.JSONField(default=list, blank=True, help_text="Ranges outside synced_from/synced_until read through from Google: [{'from', 'until', 'fetched_at'}]")
+    
+    # Read-through ranges remembered per user, most recent first
+    MAX_FETCHED_RANGES = 20
     
     class Meta:
         verbose_name = 'Google Calendar Token'
         verbose_name_plural = 'Google Calendar Tokens'
+        indexes = [
+            models.Index(fields=['is_active', 'next_sync_at']),
+        ]
     
     def __str__(self):
         return f"Calendar token for {self.user.email}"
@@ -407,6 +569,51 @@ class GoogleCalendarToken(models.Model):
             scopes=self.scopes
         )
     
+    def covers(self, start, end):
+        """Whether start..end lies inside the range the sync tokens keep up to date"""
+        return (
+            self.synced_from is not None
+            and self.synced_from <= start and end <= self.synced_until
+        )
+    
+    def fetched_range_time(self, start, end):
+        """When start..end was last read through from Google (None if no fetched range covers it)"""
+        fetched_times = [
+            datetime.fromisoformat(entry['fetched_at'])
+            for entry in self.fetched_ranges or []
+            if datetime.fromisoformat(entry['from']) <= start and end <= datetime.fromisoformat(entry['until'])
+        ]
+        return max(fetched_times, default=None)
+    
+    def record_fetched_range(self, start, end, fetched_at):
+        """Remember a read-through range, dropping the ones it or the synced window covers"""
+        ranges = [
+            entry for entry in self.fetched_ranges or []
+            if not (start <= datetime.fromisoformat(entry['from']) and datetime.fromisoformat(entry['until']) <= end)
+            and not self.covers(datetime.fromisoformat(entry['from']), datetime.fromisoformat(entry['until']))
+        ]
+        ranges.insert(0, {'from': start.isoformat(), 'until': end.isoformat(), 'fetched_at': fetched_at.isoformat()})
+        self.fetched_ranges = ranges[:self.MAX_FETCHED_RANGES]
+        self.save(update_fields=['fetched_ranges'])
+    
+    @classmethod
+    def claim_sync(cls, user, lease, now=None):
+        """
+        Reserve a sync of the user for lease (a timedelta) with a conditional
+        UPDATE, so one sync per user runs across all processes. Returns True if
+        claimed; release_sync ends it early.
+        """
+        now = now or timezone.now()
+        return cls.objects.filter(
+            models.Q(sync_lease_until__isnull=True) | models.Q(sync_lease_until__lte=now),
+            user=user,
+            is_active=True
+        ).update(sync_lease_until=now + lease) > 0
+    
+    @classmethod
+    def release_sync(cls, user):
+        cls.objects.filter(user=user).update(sync_lease_until=None)
+    
     @classmethod
     def from_credentials(cls, user, credentials):
         """Create or update token from credentials object"""
@@ -429,7 +636,7 @@ class GoogleCalendarToken(models.Model):
 class GoogleCalendarEvent(models.Model):
     """Cache Google Calendar events for efficient retrieval"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='cached_events')
-    google_event_id = models.CharField(max_length=255, unique=True)
+    google_event_id = models.CharField(max_length=255)
     calendar_id = models.CharField(max_length=255)
     calendar_summary = models.CharField(max_length=255)
     title = models.CharField(max_length=500)
@@ -440,21 +647,83 @@ class GoogleCalendarEvent(models.Model):
     html_link = models.URLField(blank=True, null=True)
     color_id = models.CharField(max_length=50, blank=True, null=True)
     event_data = models.JSONField(default=dict, help_text="Full event data from Google API")
+    recurring_event_id = models.CharField(max_length=255, blank=True, default='', help_text="Series id of a recurring event instance")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    is_active = models.BooleanField(default=True)
+    is_active = models.BooleanField(default=True, help_text="False once Google reports the event cancelled; purged later")
     
     class Meta:
         verbose_name = 'Google Calendar Event'
         verbose_name_plural = 'Google Calendar Events'
         indexes = [
-            models.Index(fields=['user', 'start_time']),
+            # Range overlap lookups: start_time < range end AND end_time > range start
+            models.Index(fields=['user', 'start_time', 'end_time']),
             models.Index(fields=['google_event_id']),
             models.Index(fields=['calendar_id']),
+            models.Index(fields=['user', 'recurring_event_id']),
+        ]
+        constraints = [
+            # Event ids are only unique per calendar owner: the same shared event
+            # is cached once for every user who can see it
+            models.UniqueConstraint(fields=['user', 'google_event_id'], name='unique_user_google_event'),
         ]
     
     def __str__(self):
         return f"{self.title} ({self.user.email})"
+    
+    @classmethod
+    def deactivate(cls, user, event_ids, batch_size=500):
+        """
+        Mark cancelled events inactive. A cancelled series id also deactivates
+        every cached instance of the series. Returns the number of rows updated.
+        """
+        event_ids = list(set(event_ids))
+        updated_count = 0
+        for i in range(0, len(event_ids), batch_size):
+            chunk = event_ids[i:i + batch_size]
+            updated_count += cls.objects.filter(
+                models.Q(google_event_id__in=chunk) | models.Q(recurring_event_id__in=chunk),
+                user=user,
+                is_active=True
+            ).update(is_active=False, updated_at=timezone.now())
+        return updated_count
+    
+    @classmethod
+    def deactivate_missing(cls, user, calendar_id, time_min, time_max, seen_ids, batch_size=500):
+        """
+        Mark inactive the cached events of a calendar lying within time_min..time_max
+        that a full listing of that range did not return (deleted on Google's side
+        without a sync token reporting it). Returns the number of rows updated.
+        """
+        missing_ids = [
+            event_id for event_id in cls.objects.filter(
+                user=user,
+                calendar_id=calendar_id,
+                is_active=True,
+                start_time__gte=time_min,
+                end_time__lte=time_max
+            ).values_list('google_event_id', flat=True)
+            if event_id not in seen_ids
+        ]
+        updated_count = 0
+        for i in range(0, len(missing_ids), batch_size):
+            updated_count += cls.objects.filter(
+                user=user, google_event_id__in=missing_ids[i:i + batch_size]
+            ).update(is_active=False, updated_at=timezone.now())
+        return updated_count
+    
+    @classmethod
+    def purge_inactive(cls, retention_days=30, batch_size=1000):
+        """Delete events deactivated longer ago than the retention window in chunks (run this periodically)"""
+        cutoff = timezone.now() - timedelta(days=retention_days)
+        expired = cls.objects.filter(is_active=False, updated_at__lt=cutoff).order_by('id')
+        deleted_count = 0
+        while True:
+            ids = list(expired.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return deleted_count
+            deleted, _ = cls.objects.filter(id__in=ids).delete()
+            deleted_count += deleted
 
 
 class FriendInvitation(models.Model):
@@ -473,9 +742,19 @@ class FriendInvitation(models.Model):
         verbose_name_plural = 'הזמנות חברים'
         unique_together = ['inviter', 'invitee_email']
         ordering = ['-created_at']
+        indexes = [
+            # Claimed by email at registration (Friend.claim_invitations)
+            models.Index(fields=['invitee_email'], name='friendinv_open_email_idx', condition=models.Q(is_used=False)),
+        ]
     
     def __str__(self):
         return f"Invitation from {self.inviter.email} to {self.invitee_email}"
+
+    def save(self, *args, **kwargs):
+        # Registered emails are lowercase, so invitations are matched by exact value
+        if self.invitee_email:
+            self.invitee_email = self.invitee_email.strip().lower()
+        super().save(*args, **kwargs)
     
     @classmethod
     def generate_token(cls):
@@ -537,12 +816,52 @@ class Friend(models.Model):
         verbose_name_plural = 'חברים'
         unique_together = [['user', 'friend'], ['user', 'friend_email']]
         ordering = ['-created_at']
+        indexes = [
+            # Pending invitations are claimed by email at registration
+            models.Index(
+                fields=['friend_email'], name='friend_pending_email_idx',
+                condition=models.Q(is_invitation=True, status='pending')
+            ),
+        ]
     
     def __str__(self):
         if self.friend:
             return f"{self.user.username} - {self.friend.username} ({self.status})"
         else:
             return f"{self.user.username} - {self.friend_email} ({self.status})"
+
+    def save(self, *args, **kwargs):
+        if self.friend_email:
+            self.friend_email = self.friend_email.strip().lower()
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def claim_invitations(cls, user):
+        """
+        Link every pending invitation sent to the user's email to the new account,
+        create the reciprocal requests and mark FriendInvitations used, in a fixed
+        number of indexed queries. Call inside the registration transaction.
+        Returns the inviters' user ids.
+        """
+        email = (user.email or '').strip().lower()
+        if not email:
+            return []
+        now = timezone.now()
+        pending = list(
+            cls.objects.filter(friend_email=email, is_invitation=True, status='pending').values_list('id', 'user_id')
+        )
+        inviter_ids = [inviter_id for _, inviter_id in pending if inviter_id != user.id]
+        if pending:
+            cls.objects.filter(id__in=[friendship_id for friendship_id, _ in pending]).update(
+                friend=user, is_invitation=False, updated_at=now
+            )
+            # Reciprocal requests so the new user sees them
+            cls.objects.bulk_create([
+                cls(user=user, friend_id=inviter_id, status='pending')
+                for inviter_id in inviter_ids
+            ], ignore_conflicts=True)
+        FriendInvitation.objects.filter(invitee_email=email, is_used=False).update(is_used=True, used_at=now)
+        return inviter_ids
     
     def accept(self):
         """Accept friend request"""
@@ -601,11 +920,171 @@ class Notification(models.Model):
         indexes = [
             models.Index(fields=['user', 'is_read']),
             models.Index(fields=['created_at']),
+            # Keyset pagination of a user's list (NotificationCursorPagination)
+            models.Index(fields=['user', 'created_at', 'id']),
         ]
+
+    # Types merged per (user, project) by compact()
+    COMPACTED_TYPES = {
+        'member_left': ('חברים עזבו פרויקט', '{name} ועוד {others} חברים עזבו את הפרויקט "{project}"'),
+        'project_accepted': ('שיתוף פרויקט התקבל', '{name} ועוד {others} חברים קיבלו את הזמנתך לפרויקט "{project}"'),
+    }
     
     def __str__(self):
         return f"{self.user.username} - {self.title}"
 
+    @classmethod
+    def cleanup_expired(cls, retention_days=90, batch_size=1000):
+        """Delete read notifications older than the retention window in chunks (run this periodically)"""
+        cutoff = timezone.now() - timedelta(days=retention_days)
+        expired = cls.objects.filter(is_read=True, created_at__lt=cutoff).order_by('id')
+        deleted_count = 0
+        while True:
+            # Short transactions instead of one huge DELETE that locks the table
+            ids = list(expired.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return deleted_count
+            deleted, _ = cls.objects.filter(id__in=ids).delete()
+            deleted_count += deleted
+
+    @classmethod
+    def compact(cls, batch_size=500):
+        """
+        Merge repeated member_left / project_accepted notifications of the same
+        project into the newest one of each group. Returns the number of rows removed.
+        """
+        groups = list(
+            cls.objects.filter(
+                notification_type__in=cls.COMPACTED_TYPES, related_project__isnull=False
+            ).order_by().values('user_id', 'notification_type', 'related_project_id').annotate(
+                rows=models.Count('id')
+            ).filter(rows__gt=1).values_list('user_id', 'notification_type', 'related_project_id')
+        )
+        removed_count = 0
+        for i in range(0, len(groups), batch_size):
+            batch = groups[i:i + batch_size]
+            condition = models.Q()
+            for user_id, notification_type, project_id in batch:
+                condition |= models.Q(
+                    user_id=user_id, notification_type=notification_type, related_project_id=project_id
+                )
+            grouped = {}
+            for notification in cls.objects.filter(condition).select_related(
+                'related_user', 'related_project'
+            ).order_by('-created_at', '-id'):
+                key = (notification.user_id, notification.notification_type, notification.related_project_id)
+                grouped.setdefault(key, []).append(notification)
+
+            with transaction.atomic():
+                for notifications in grouped.values():
+                    removed_count += cls._merge(notifications)
+        return removed_count
+
+    @classmethod
+    def _merge(cls, notifications):
+        """Fold a group (newest first) into its newest row"""
+        kept, merged = notifications[0], notifications[1:]
+        user_ids = []
+        count = 0
+        for notification in notifications:
+            data = notification.action_data or {}
+            count += data.get('aggregated_count', 1)
+            for user_id in data.get('related_user_ids', [notification.related_user_id]):
+                if user_id is not None and user_id not in user_ids:
+                    user_ids.append(user_id)
+
+        # The same member leaving twice keeps the newest row's own text
+        if len(user_ids) > 1:
+            title, message = cls.COMPACTED_TYPES[kept.notification_type]
+            name = kept.related_user.first_name or kept.related_user.username if kept.related_user else ''
+            kept.title = title
+            kept.message = message.format(name=name, others=len(user_ids) - 1, project=kept.related_project.name)
+        kept.action_data = {**(kept.action_data or {}), 'aggregated_count': count, 'related_user_ids': user_ids}
+        # Still unread if any merged row was
+        kept.is_read = all(notification.is_read for notification in notifications)
+
+        # Deleting first lets the counter signals decrement the merged unread rows
+        cls.objects.filter(id__in=[notification.id for notification in merged]).delete()
+        kept.save(update_fields=['title', 'message', 'action_data', 'is_read'])
+        return len(merged)
+
+    @classmethod
+    def create_many(cls, notifications):
+        """bulk_create notifications and count them as unread (bulk_create skips the signals)"""
+        notifications = cls.objects.bulk_create(notifications)
+        unread = {}
+        for notification in notifications:
+            if not notification.is_read:
+                unread[notification.user_id] = unread.get(notification.user_id, 0) + 1
+        NotificationCounter.increment(unread)
+        return notifications
+
+
+class NotificationCounter(models.Model):
+    """
+    Denormalized unread notification count per user, so the polled
+    unread_count endpoint is a primary-key read. Changed with F() updates by
+    the Notification signals and the mark-read actions; the
+    reconcile_notification_counters command repairs any drift.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='notification_counter', verbose_name='משתמש')
+    unread_count = models.PositiveIntegerField(default=0, verbose_name='התראות שלא נקראו')
+
+    class Meta:
+        verbose_name = 'מונה התראות'
+        verbose_name_plural = 'מוני התראות'
+
+    def __str__(self):
+        return f"{self.user.username} - {self.unread_count}"
+
+    @classmethod
+    def unread_for(cls, user):
+        return cls.objects.filter(user=user).values_list('unread_count', flat=True).first() or 0
+
+    @classmethod
+    def increment(cls, counts):
+        """Add {user_id: n} to the counters, creating missing rows"""
+        counts = {user_id: n for user_id, n in counts.items() if n}
+        if not counts:
+            return
+        cls.objects.bulk_create([cls(user_id=user_id) for user_id in counts], ignore_conflicts=True)
+        # One UPDATE per distinct amount (usually just 1)
+        by_amount = {}
+        for user_id, n in counts.items():
+            by_amount.setdefault(n, []).append(user_id)
+        for n, user_ids in by_amount.items():
+            cls.objects.filter(user_id__in=user_ids).update(unread_count=models.F('unread_count') + n)
+
+    @classmethod
+    def decrement(cls, user_id, n=1):
+        if n:
+            cls.objects.filter(user_id=user_id).update(
+                unread_count=Greatest(models.F('unread_count') - n, 0)
+            )
+
+    @classmethod
+    def reconcile(cls):
+        """Recount every user's unread notifications; returns the number of corrected counters"""
+        actual = dict(
+            Notification.objects.filter(is_read=False).order_by().values('user_id').annotate(
+                count=models.Count('id')
+            ).values_list('user_id', 'count')
+        )
+        stored = dict(cls.objects.values_list('user_id', 'unread_count'))
+        wrong = [
+            cls(user_id=user_id, unread_count=actual.get(user_id, 0))
+            for user_id, count in stored.items()
+            if count != actual.get(user_id, 0)
+        ]
+        missing = [
+            cls(user_id=user_id, unread_count=count)
+            for user_id, count in actual.items()
+            if user_id not in stored
+        ]
+        cls.objects.bulk_update(wrong, ['unread_count'], batch_size=500)
+        cls.objects.bulk_create(missing, batch_size=500, ignore_conflicts=True)
+        return len(wrong) + len(missing)
+
 
 class ProjectShare(models.Model):
     """Track project sharing invitations and accepted shares"""
@@ -631,3 +1110,56 @@ class ProjectShare(models.Model):
     
     def __str__(self):
         return f"{self.project.name} - {self.shared_by.username} → {self.shared_with.username}"
+
+
+class ProjectMembership(models.Model):
+    """
+    Materialized project access: one row per (user, project) for the owner and
+    every accepted share. Kept in sync by the Project/ProjectShare signals in
+    todo.signals so task visibility is an indexed lookup instead of a join.
+    """
+    ROLE_CHOICES = [
+        ('owner', 'בעלים'),
+        ('shared', 'משותף'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='project_memberships', verbose_name='משתמש')
+    project = models.ForeignKey('Project', on_delete=models.CASCADE, related_name='memberships', verbose_name='פרויקט')
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES, verbose_name='תפקיד')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='נוצר בתאריך')
+
+    class Meta:
+        verbose_name = 'חברות בפרויקט'
+        verbose_name_plural = 'חברויות בפרויקטים'
+        unique_together = ['user', 'project']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.project.name} ({self.role})"
+
+    @classmethod
+    def project_ids_for(cls, user):
+        """Subquery of ids of every project the user can access"""
+        return cls.objects.filter(user=user).values('project_id')
+
+    @classmethod
+    def rebuild(cls):
+        """Recreate all rows from Project owners and accepted ProjectShares"""
+        rows = [
+            cls(user_id=owner_id, project_id=project_id, role='owner')
+            for project_id, owner_id in Project.objects.values_list('id', 'owner_id')
+        ]
+        owned = {(row.user_id, row.project_id) for row in rows}
+        rows.extend(
+            cls(user_id=user_id, project_id=project_id, role='shared')
+            for project_id, user_id in ProjectShare.objects.filter(
+                status='accepted'
+            ).values_list('project_id', 'shared_with_id')
+            if (user_id, project_id) not in owned
+        )
+        cls.objects.all().delete()
+        cls.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+        # bulk_create skips the signals: drop every cached ProjectAccess
+        from django.db import transaction
+        from .access import invalidate_project_access
+        transaction.on_commit(invalidate_project_access)
+        return len(rows)
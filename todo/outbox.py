@@ -0,0 +1,129 @@
+"""
+EmailOutbox delivery, run by the send_outbox_emails worker.
+
+Each batch is claimed by pushing its next_attempt_at forward by a lease
+(SELECT ... FOR UPDATE SKIP LOCKED where the database supports it), so several
+workers never send the same row and a crashed worker's rows are retried once
+the lease expires. The whole batch goes out over a single SMTP connection;
+each email's outcome is saved as soon as it is known, so a crash mid-batch
+only retries the emails that were not sent, and a batch stops before its
+lease runs out (sends are bounded by EMAIL_TIMEOUT).
+"""
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection as db_connection, transaction
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+# How long a claimed row is reserved for the worker that claimed it
+CLAIM_LEASE = timedelta(minutes=5)
+MAX_RETRY_DELAY = timedelta(hours=6)
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2*base, 4*base, ... capped at MAX_RETRY_DELAY"""
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_SECONDS', 60)
+    return min(timedelta(seconds=base * 2 ** (attempts - 1)), MAX_RETRY_DELAY)
+
+
+def claim_batch(batch_size, now=None):
+    now = now or timezone.now()
+    with transaction.atomic():
+        due = EmailOutbox.objects.filter(status='pending', next_attempt_at__lte=now).order_by('next_attempt_at')
+        if db_connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        emails = list(due[:batch_size])
+        if emails:
+            EmailOutbox.objects.filter(id__in=[email.id for email in emails]).update(
+                next_attempt_at=now + CLAIM_LEASE
+            )
+    return emails
+
+
+def build_message(email, smtp_connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.text_body,
+        from_email=email.from_email,
+        to=[email.to_email],
+        connection=smtp_connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def save_result(email):
+    """Persist one email's outcome right away (the rest of the batch may never get there)"""
+    EmailOutbox.objects.filter(pk=email.pk).update(
+        status=email.status,
+        attempts=email.attempts,
+        next_attempt_at=email.next_attempt_at,
+        last_error=email.last_error,
+        sent_at=email.sent_at,
+    )
+
+
+def send_batch(batch_size=50):
+    """Send one batch of due emails; returns (sent, failed) counts"""
+    # Taken before the claim, so never later than the lease the claim sets
+    lease_until = timezone.now() + CLAIM_LEASE
+    emails = claim_batch(batch_size)
+    if not emails:
+        return 0, 0
+    # Stop while one more send (at most EMAIL_TIMEOUT) still fits in the lease
+    send_deadline = lease_until - timedelta(seconds=getattr(settings, 'EMAIL_TIMEOUT', None) or 60)
+
+    max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    sent_count = failed_count = 0
+    smtp_connection = get_connection(fail_silently=False)
+    try:
+        smtp_connection.open()
+    except Exception as e:
+        # Server unreachable: the whole batch is retried later
+        smtp_connection = None
+        connection_error = e
+
+    for email in emails:
+        if timezone.now() >= send_deadline:
+            # The rest is claimed again by the next batch once the lease expires
+            print(f"⚠️ Email batch ran out of lease time, {len(emails) - sent_count - failed_count} emails left for later")
+            break
+        email.attempts += 1
+        try:
+            if smtp_connection is None:
+                raise connection_error
+            build_message(email, smtp_connection).send()
+        except Exception as e:
+            if isinstance(e, smtplib.SMTPServerDisconnected) and smtp_connection is not None:
+                # Reconnect for the rest of the batch
+                try:
+                    smtp_connection.close()
+                    smtp_connection.open()
+                except Exception:
+                    pass
+            email.last_error = str(e)[:2000]
+            if email.attempts >= max_attempts:
+                email.status = 'failed'
+                print(f"❌ Giving up on email {email.id} to {email.to_email}: {e}")
+            else:
+                email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+            save_result(email)
+            failed_count += 1
+            continue
+        email.status = 'sent'
+        email.sent_at = timezone.now()
+        email.last_error = ''
+        save_result(email)
+        sent_count += 1
+
+    if smtp_connection is not None:
+        try:
+            smtp_connection.close()
+        except Exception:
+            pass
+    return sent_count, failed_count
@@ -0,0 +1,128 @@
+"""
+Keyset (cursor) pagination for task and notification lists
+"""
+import base64
+import json
+
+from django.db import models
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class TaskKeysetPagination(BasePagination):
+    """
+    Opt-in keyset pagination over (created_at, id).
+
+    Only active when the client sends `page_size` or `cursor`, so existing
+    callers keep receiving a plain list. Each page is a single indexed range
+    query (`(created_at, id) < (last_created_at, last_id)`) regardless of depth.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def is_active(self, request):
+        return (self.cursor_query_param in request.query_params or
+                self.page_size_query_param in request.query_params)
+
+    def paginate_queryset(self, queryset, request, view=None, ordering=None):
+        if not self.is_active(request):
+            return None
+
+        self.request = request
+        self.ordering = ordering or self.ordering
+        self.page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            queryset = queryset.filter(self.get_position_filter(cursor))
+
+        # Fetch one extra row to know whether there is a next page
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        page = results[:self.page_size]
+        self.next_cursor = self.encode_cursor(page[-1]) if self.has_next and page else None
+        return page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_position_filter(self, cursor):
+        """Build `(key, id)` row comparison that continues after the cursor position"""
+        key_ordering, id_ordering = self.ordering
+        key_field = key_ordering.lstrip('-')
+        key_lookup = 'lt' if key_ordering.startswith('-') else 'gt'
+        id_lookup = 'lt' if id_ordering.startswith('-') else 'gt'
+        return (
+            models.Q(**{f'{key_field}__{key_lookup}': cursor['key']}) |
+            models.Q(**{key_field: cursor['key'], f'id__{id_lookup}': cursor['id']})
+        )
+
+    def encode_cursor(self, instance):
+        key_field = self.ordering[0].lstrip('-')
+        key = getattr(instance, key_field)
+        payload = json.dumps({'key': key.isoformat(), 'id': instance.pk})
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            key = parse_datetime(payload['key'])
+            task_id = int(payload['id'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if key is None:
+            raise NotFound(self.invalid_cursor_message)
+        return {'key': key, 'id': task_id}
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'next_cursor': self.next_cursor,
+            'results': data,
+        })
+
+
+class NotificationCursorPagination(TaskKeysetPagination):
+    """
+    Always-on keyset pagination for notifications, newest first. `since_id`
+    limits the page to notifications newer than one the client already has.
+    """
+    page_size = 50
+    max_page_size = 100
+    since_id_query_param = 'since_id'
+
+    def is_active(self, request):
+        return True
+
+    def paginate_queryset(self, queryset, request, view=None, ordering=None):
+        since_id = request.query_params.get(self.since_id_query_param)
+        if since_id:
+            try:
+                queryset = queryset.filter(id__gt=int(since_id))
+            except ValueError:
+                raise ValidationError({self.since_id_query_param: 'Must be an integer'})
+        return super().paginate_queryset(queryset, request, view, ordering)
@@ -0,0 +1,132 @@
+"""
+Lexicographic ranks for manual task ordering.
+
+A rank is a base-36 string ("0-9a-z") compared as plain text, so a task can be
+placed between any two neighbours by writing only its own row:
+rank_between('a', 'b') == 'ai'. Ranks never end in '0', which guarantees there
+is always room below any rank. Digits and lowercase letters sort the same way
+under SQLite's binary collation and PostgreSQL's locale collations.
+
+Appending and prepending step by a small fixed amount, so the ends of a list
+stay short (a few characters for millions of tasks). Repeated inserts into
+the same gap make ranks longer; rebalance_task_ranks (management command)
+rewrites long groups with evenly spaced short ranks.
+"""
+import re
+
+from django.utils import timezone
+
+ALPHABET = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(ALPHABET)
+
+# Groups with ranks longer than this are rewritten by the rebalance command
+RANK_REBALANCE_LENGTH = 24
+# Hard limit (Task.rank max_length is 255); moves past it rebalance inline
+RANK_MAX_LENGTH = 128
+
+RANK_PATTERN = re.compile(r'^[0-9a-z]*[1-9a-z]$')
+
+
+def is_valid_rank(rank):
+    return isinstance(rank, str) and bool(RANK_PATTERN.match(rank))
+
+
+def _to_rank(value, width):
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, BASE)
+        digits.append(ALPHABET[digit])
+    # Trailing zeros don't change the order and would break is_valid_rank
+    return ''.join(reversed(digits)).rstrip('0')
+
+
+def _step_width(rank, edge):
+    """
+    Precision the end of a list advances at. It doubles with every leading
+    'z' ('0' at the start), so each level fits 36x more steps than the last.
+    """
+    return 2 * (len(rank) - len(rank.lstrip(edge))) + 2
+
+
+def rank_after(before):
+    """A short rank after `before`: `before` cut to the step width plus one step"""
+    width = _step_width(before, 'z')
+    # The digit after the leading 'z's is below 'z', so the carry never overflows
+    return _to_rank(int(before[:width].ljust(width, '0'), BASE) + 1, width)
+
+
+def rank_before(after):
+    """A short rank before `after`: `after` cut to the step width minus one step"""
+    width = _step_width(after, '0')
+    # The digit after the leading '0's is above '0', so the result stays above zero
+    return _to_rank(int(after[:width].ljust(width, '0'), BASE) - 1, width)
+
+
+def rank_between(before=None, after=None):
+    """
+    Return a rank strictly between `before` and `after`.
+    None means the start (before) or the end (after) of the list.
+    """
+    if after is None:
+        return rank_after(before or '')
+    if before is None:
+        return rank_before(after)
+    if before >= after:
+        raise ValueError(f'Rank {before!r} must sort before {after!r}')
+
+    result = []
+    i = 0
+    while True:
+        lo = ALPHABET.index(before[i]) if i < len(before) else 0
+        if after is None:
+            hi = BASE
+        else:
+            hi = ALPHABET.index(after[i]) if i < len(after) else BASE
+        if hi - lo > 1:
+            result.append(ALPHABET[(lo + hi) // 2])
+            return ''.join(result)
+        result.append(ALPHABET[lo])
+        if hi > lo:
+            # Already below `after` at this position; only `before` bounds the rest
+            after = None
+        i += 1
+
+
+def evenly_spaced_ranks(count):
+    """`count` short, increasing ranks spread evenly over the key space"""
+    width = 2
+    while BASE ** width < (count + 1) * BASE:
+        width += 1
+    space = BASE ** width
+    return [_to_rank(i * space // (count + 1), width) for i in range(1, count + 1)]
+
+
+def assign_append_ranks(tasks):
+    """
+    Give unranked, unsaved tasks ranks at the end of their lists, for writes
+    that bypass Task.save (bulk_create). One MAX(rank) query per list.
+    """
+    last_ranks = {}
+    for task in tasks:
+        if task.rank:
+            continue
+        # Project lists are shared by all members; inbox lists are per owner
+        key = (task.project_id, task.parent_task_id, task.owner_id if task.project_id is None else None)
+        task.rank = rank_between(last_ranks[key], None) if key in last_ranks else task.next_rank()
+        last_ranks[key] = task.rank
+    return tasks
+
+
+def rebalance(siblings):
+    """
+    Rewrite the ranks of one list (a Task queryset from Task.get_siblings) with
+    evenly spaced short ranks, keeping the current order. Returns the tasks.
+    """
+    tasks = list(siblings.order_by('rank', '-priority', 'due_date', 'created_at', 'id'))
+    now = timezone.now()
+    for task, rank in zip(tasks, evenly_spaced_ranks(len(tasks))):
+        task.rank = rank
+        # bulk_update skips auto_now; delta-sync clients need to see the new order
+        task.updated_at = now
+    siblings.model.objects.bulk_update(tasks, ['rank', 'updated_at'], batch_size=500)
+    return tasks
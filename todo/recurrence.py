@@ -0,0 +1,202 @@
+"""
+Recurring task engine built on dateutil's rrule.
+
+A recurring series is a Task with is_recurring=True, a due_date (the first
+occurrence) and a recurring_pattern: either one of the legacy names
+(daily/weekly/monthly) or an RFC 5545 RRULE such as "FREQ=WEEKLY;BYDAY=SU,TU".
+
+Upcoming occurrences are stored as regular Task rows (recurrence_parent points
+at the series) so list and calendar views read them like any other task.
+materialize_occurrences() creates them in bulk up to RECURRENCE_WINDOW_DAYS
+ahead; the materialize_recurring_tasks command runs it for every series on a
+schedule. Completing a task only adds the series' next occurrence
+(create_next_occurrence), so a request never fills the whole window.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+from dateutil.rrule import rrulestr
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .dates import get_user_timezone, local_day_range
+from .models import Task
+from .ranking import assign_append_ranks
+from .search import index_tasks
+from .counters import invalidate_counts_for_tasks
+from .events import publish_task_changes
+
+logger = logging.getLogger(__name__)
+
+LEGACY_PATTERNS = {
+    'daily': 'FREQ=DAILY',
+    'weekly': 'FREQ=WEEKLY',
+    'monthly': 'FREQ=MONTHLY',
+    'yearly': 'FREQ=YEARLY',
+}
+
+# Caps a single run for very dense rules (e.g. FREQ=HOURLY)
+MAX_OCCURRENCES_PER_RUN = 500
+
+# Fields copied from the series to each occurrence
+COPIED_FIELDS = [
+    'title', 'description', 'project_id', 'owner_id', 'assignee_id',
+    'parent_task_id', 'priority', 'due_time',
+]
+
+
+def normalize_rule(pattern):
+    """Return the RRULE text for a recurring_pattern, or None if it isn't one"""
+    pattern = (pattern or '').strip()
+    if not pattern:
+        return None
+    if pattern.lower() in LEGACY_PATTERNS:
+        return LEGACY_PATTERNS[pattern.lower()]
+    if pattern.upper().startswith('RRULE:'):
+        pattern = pattern[len('RRULE:'):]
+    return pattern if pattern.upper().startswith('FREQ=') else None
+
+
+def build_rule(series, tz=None):
+    """
+    rrule for a series, expanded in the owner's timezone so occurrences keep their
+    local wall-clock time across DST changes. None if the series can't recur.
+    """
+    rule_text = normalize_rule(series.recurring_pattern)
+    if not rule_text or series.due_date is None:
+        return None
+    tz = tz or get_user_timezone(series.owner)
+    try:
+        return rrulestr(rule_text, dtstart=series.due_date.astimezone(tz))
+    except (ValueError, TypeError) as e:
+        logger.warning("Invalid recurrence rule for task %s: %r (%s)", series.pk, rule_text, e)
+        return None
+
+
+def occurrences_between(series, start, end, tz=None, inclusive=False):
+    """Occurrence datetimes (UTC) of a series in the range (start, end], or [start, end] if inclusive"""
+    rule = build_rule(series, tz)
+    if rule is None:
+        return []
+    occurrences = []
+    for occurrence in rule.xafter(start, inc=inclusive):
+        if occurrence > end or len(occurrences) >= MAX_OCCURRENCES_PER_RUN:
+            break
+        occurrences.append(occurrence.astimezone(ZoneInfo('UTC')))
+    return occurrences
+
+
+def new_occurrence(series, occurrence):
+    """Unsaved occurrence Task of a series at the given datetime"""
+    task = Task(recurrence_parent_id=series.pk, occurrence_date=occurrence, due_date=occurrence)
+    for field in COPIED_FIELDS:
+        setattr(task, field, getattr(series, field))
+    return task
+
+
+def insert_occurrences(series_ids, new_tasks):
+    """bulk_create occurrences with their series' labels, then index, count and publish them"""
+    through = Task.labels.through
+    labels_by_series = defaultdict(list)
+    for task_id, label_id in through.objects.filter(task_id__in=series_ids).values_list('task_id', 'label_id'):
+        labels_by_series[task_id].append(label_id)
+
+    assign_append_ranks(new_tasks)
+    Task.objects.bulk_create(new_tasks, batch_size=500)
+    through.objects.bulk_create([
+        through(task_id=task.pk, label_id=label_id)
+        for task in new_tasks
+        for label_id in labels_by_series[task.recurrence_parent_id]
+    ], batch_size=500)
+    index_tasks(task.pk for task in new_tasks)
+    invalidate_counts_for_tasks(new_tasks)
+    publish_task_changes(new_tasks)
+
+
+def create_next_occurrence(series, after, now=None):
+    """
+    Create the first occurrence of a series after `after` (today's at the
+    earliest) unless it already exists. Returns the new task or None.
+    """
+    now = now or timezone.now()
+    tz = get_user_timezone(series.owner)
+    rule = build_rule(series, tz)
+    if rule is None:
+        return None
+    today_start, _ = local_day_range(now.astimezone(tz).date(), tz)
+    if after < today_start:
+        occurrence = rule.after(today_start, inc=True)
+    else:
+        occurrence = rule.after(after.astimezone(tz))
+    if occurrence is None:
+        return None
+    occurrence = occurrence.astimezone(ZoneInfo('UTC'))
+    if Task.objects.filter(recurrence_parent_id=series.pk, occurrence_date=occurrence).exists():
+        return None
+    task = new_occurrence(series, occurrence)
+    try:
+        with transaction.atomic():
+            insert_occurrences([series.pk], [task])
+    except IntegrityError:
+        # Created concurrently (unique_task_occurrence)
+        return None
+    return task
+
+
+def materialize_occurrences(series_list, window_days=None, now=None):
+    """
+    Create the missing occurrence rows of the given series up to `window_days`
+    ahead with bulk_create, and advance each series' recurrence_generated_until.
+    Occurrences before today (in the owner's timezone) are never created, so a
+    series that wasn't materialized for a while doesn't come back as a pile of
+    overdue tasks. Series whose window is already filled cost no queries.
+    Returns the new tasks.
+    """
+    window_days = window_days if window_days is not None else getattr(settings, 'RECURRENCE_WINDOW_DAYS', 60)
+    now = now or timezone.now()
+    horizon = now + timedelta(days=window_days)
+
+    pending = []
+    for series in series_list:
+        generated_until = series.recurrence_generated_until or series.due_date
+        if series.due_date is None or generated_until is None or generated_until >= horizon:
+            continue
+        tz = get_user_timezone(series.owner)
+        today_start, _ = local_day_range(now.astimezone(tz).date(), tz)
+        if generated_until < today_start:
+            # Skip the missed past occurrences; today's still counts
+            pending.append((series, today_start, True, tz))
+        else:
+            pending.append((series, generated_until, False, tz))
+    if not pending:
+        return []
+
+    # Rows that already exist (e.g. from an interrupted run) are skipped
+    existing = set(
+        Task.objects.filter(
+            recurrence_parent_id__in=[series.pk for series, *_ in pending],
+            occurrence_date__gte=min(start for _, start, *_ in pending)
+        ).values_list('recurrence_parent_id', 'occurrence_date')
+    )
+
+    new_tasks = []
+    for series, start, inclusive, tz in pending:
+        occurrences = occurrences_between(series, start, horizon, tz, inclusive=inclusive)
+        for occurrence in occurrences:
+            if (series.pk, occurrence) in existing:
+                continue
+            new_tasks.append(new_occurrence(series, occurrence))
+        # A capped run resumes from the last generated occurrence next time
+        if len(occurrences) >= MAX_OCCURRENCES_PER_RUN:
+            series.recurrence_generated_until = occurrences[-1]
+        else:
+            series.recurrence_generated_until = horizon
+
+    if new_tasks:
+        insert_occurrences([series.pk for series, *_ in pending], new_tasks)
+
+    Task.objects.bulk_update([series for series, *_ in pending], ['recurrence_generated_until'], batch_size=500)
+    return new_tasks
@@ -0,0 +1,187 @@
+"""
+Full-text task search.
+
+Task title, description and label names are normalized in Python and stored in
+TaskSearchDocument; the database indexes that table:
+- SQLite: an external-content FTS5 table kept in sync by triggers, ranked with bm25()
+- PostgreSQL: a GIN index on to_tsvector('simple', ...), ranked with ts_rank()
+Other backends fall back to substring matching on the document table.
+
+Hebrew handling: niqqud and other combining marks are stripped, final letters
+are folded (ם -> מ) and words are also indexed without their one-letter
+proclitics (ו, ה, ב, כ, ל, מ, ש), so "בבית" is found by "בית" and vice versa.
+"""
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Task, TaskSearchDocument
+
+DOCUMENT_TABLE = TaskSearchDocument._meta.db_table
+FTS_TABLE = f'{DOCUMENT_TABLE}_fts'
+POSTGRES_INDEX = f'{DOCUMENT_TABLE}_tsv_idx'
+POSTGRES_VECTOR = "to_tsvector('simple', title || ' ' || body)"
+
+HEBREW_PREFIX_LETTERS = set('והבכלמש')
+# Longest proclitic chain stripped, e.g. "וכש" in "וכשהגענו"
+MAX_PREFIX_LENGTH = 3
+# Shorter stems ("ית" from "בית") would match almost everything
+MIN_STEM_LENGTH = 3
+FINAL_LETTERS = str.maketrans('ךםןףץ', 'כמנפצ')
+HEBREW_LETTER = re.compile(r'[א-ת]')
+WORD = re.compile(r'\w+')
+
+
+def normalize_text(text):
+    """Lowercase, strip niqqud/accents and fold Hebrew final letters"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return stripped.lower().translate(FINAL_LETTERS)
+
+
+def token_variants(token):
+    """The token plus its stems with Hebrew proclitics removed"""
+    variants = [token]
+    if HEBREW_LETTER.match(token):
+        for i in range(min(MAX_PREFIX_LENGTH, len(token) - MIN_STEM_LENGTH)):
+            if token[i] not in HEBREW_PREFIX_LETTERS:
+                break
+            variants.append(token[i + 1:])
+    return variants
+
+
+def tokenize(text):
+    return WORD.findall(normalize_text(text))
+
+
+def document_text(text):
+    return ' '.join(variant for token in tokenize(text) for variant in token_variants(token))
+
+
+# Index maintenance
+
+def build_document(task):
+    """Search document for a task whose labels are loaded (or cheap to load)"""
+    label_names = ' '.join(label.name for label in task.labels.all())
+    return TaskSearchDocument(
+        task_id=task.pk,
+        title=document_text(task.title),
+        body=document_text(f'{task.description or ""} {label_names}'),
+    )
+
+
+def index_tasks(task_ids):
+    """(Re)build search documents for the given tasks; used after writes that bypass signals"""
+    task_ids = list(task_ids)
+    for i in range(0, len(task_ids), 500):
+        tasks = Task.objects.filter(id__in=task_ids[i:i + 500]).only(
+            'id', 'title', 'description'
+        ).prefetch_related('labels')
+        TaskSearchDocument.objects.bulk_create(
+            [build_document(task) for task in tasks],
+            update_conflicts=True,
+            unique_fields=['task'],
+            update_fields=['title', 'body'],
+        )
+
+
+def create_search_index(schema_editor):
+    """Create the vendor-specific full-text index over TaskSearchDocument (used by migrations)"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            f"title, body, content='{DOCUMENT_TABLE}', content_rowid='task_id')"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {DOCUMENT_TABLE} BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.task_id, new.title, new.body); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {DOCUMENT_TABLE} BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) "
+            f"VALUES ('delete', old.task_id, old.title, old.body); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON {DOCUMENT_TABLE} BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) "
+            f"VALUES ('delete', old.task_id, old.title, old.body); "
+            f"INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.task_id, new.title, new.body); END"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE INDEX {POSTGRES_INDEX} ON {DOCUMENT_TABLE} USING GIN ({POSTGRES_VECTOR})"
+        )
+
+
+def drop_search_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute(f"DROP INDEX IF EXISTS {POSTGRES_INDEX}")
+
+
+# Querying
+
+def parse_query(query):
+    """List of term groups: each query word with its proclitic-stripped variants"""
+    return [token_variants(token) for token in tokenize(query)]
+
+
+def search_task_ids(query, visible_tasks, limit, offset=0):
+    """
+    Ids of tasks matching every word of `query`, best match first, restricted to
+    the `visible_tasks` queryset (applied as a subquery inside the search statement).
+    """
+    terms = parse_query(query)
+    if not terms:
+        return []
+
+    visible_sql, visible_params = visible_tasks.order_by().values('id').query.sql_with_params()
+
+    if connection.vendor == 'sqlite':
+        # ("בבית"* OR "בית"*) AND ("ספר"*) - quoted so user input can't inject FTS syntax
+        match = ' AND '.join(
+            '(' + ' OR '.join(f'"{variant}"*' for variant in variants) + ')'
+            for variants in terms
+        )
+        # The unary + keeps SQLite from pushing the visibility IN-list into the
+        # FTS lookup (one full-text probe per visible task); MATCH runs first
+        sql = (
+            f"SELECT rowid FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND +rowid IN ({visible_sql}) "
+            # Title matches weigh more than description/label matches
+            f"ORDER BY bm25({FTS_TABLE}, 10.0, 1.0), rowid DESC LIMIT %s OFFSET %s"
+        )
+        params = [match, *visible_params, limit, offset]
+    elif connection.vendor == 'postgresql':
+        tsquery = ' & '.join(
+            '(' + ' | '.join(f"'{variant}':*" for variant in variants) + ')'
+            for variants in terms
+        )
+        sql = (
+            f"SELECT task_id FROM {DOCUMENT_TABLE} "
+            f"WHERE {POSTGRES_VECTOR} @@ to_tsquery('simple', %s) AND task_id IN ({visible_sql}) "
+            f"ORDER BY ts_rank(setweight(to_tsvector('simple', title), 'A') || "
+            f"setweight(to_tsvector('simple', body), 'D'), to_tsquery('simple', %s)) DESC, "
+            f"task_id DESC LIMIT %s OFFSET %s"
+        )
+        params = [tsquery, *visible_params, tsquery, limit, offset]
+    else:
+        documents = TaskSearchDocument.objects.filter(task_id__in=visible_tasks.order_by().values('id'))
+        for variants in terms:
+            condition = None
+            for variant in variants:
+                term = Q(title__contains=variant) | Q(body__contains=variant)
+                condition = term if condition is None else condition | term
+            documents = documents.filter(condition)
+        return list(documents.order_by('-task_id').values_list('task_id', flat=True)[offset:offset + limit])
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
@@ -3,11 +3,14 @@ from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
-from django.conf import settings
-from .models import Task, Project, Label, UserProfile, Team, EmailVerification, Friend, FriendInvitation, Notification, ProjectShare
+from django.db import models
+from .models import Task, Project, Label, UserProfile, Team, EmailVerification, Friend, FriendInvitation, Notification, ProjectShare, EmailOutbox
+from .task_tree import attach_subtask_trees
+from .ranking import is_valid_rank
+from .recurrence import normalize_rule
+from .access import ProjectAccess
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """
@@ -187,21 +190,19 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             TodoFast Team
             """
             
-            # Send email
-            send_mail(
+            # Queue the email; the send_outbox_emails worker delivers it
+            EmailOutbox.enqueue(
                 subject=subject,
                 message=plain_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[user.email],
+                recipient=user.email,
                 html_message=html_message,
-                fail_silently=False,
             )
             
-            print(f"✅ Verification email sent to {user.email}")
+            print(f"✅ Verification email queued for {user.email}")
             print(f"🔗 Verification URL: {verification_url}")
             
         except Exception as e:
-            print(f"❌ Failed to send verification email to {user.email}: {str(e)}")
+            print(f"❌ Failed to queue verification email to {user.email}: {str(e)}")
             # Don't raise exception - user is still created, they can request resend
 
 class UserSerializer(serializers.ModelSerializer):
@@ -244,10 +245,14 @@ class TeamSerializer(serializers.ModelSerializer):
         read_only_fields = ['owner', 'created_at']
     
     def get_project_count(self, obj):
-        return obj.projects.count()
+        count = getattr(obj, 'projects_total', None)
+        if count is None:
+            return obj.projects.count()
+        return count
     
     def get_member_count(self, obj):
-        return obj.members.count()
+        # len() uses prefetched members when present
+        return len(obj.members.all())
 
 
 class FriendSerializer(serializers.ModelSerializer):
@@ -308,26 +313,44 @@ class ProjectSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'color', 'owner', 'members', 'team', 'tasks_count', 'is_team_project', 'is_favorite', 'created_at', 'is_shared', 'shared_members', 'is_owner']
         read_only_fields = ['owner', 'created_at']
     
+    # The *_total annotations and accepted_shares come from
+    # api_views.optimize_project_queryset; fall back to queries otherwise.
     def get_tasks_count(self, obj):
-        return obj.tasks.filter(is_completed=False).count()
+        count = getattr(obj, 'open_tasks_total', None)
+        if count is None:
+            return obj.tasks.filter(is_completed=False).count()
+        return count
     
     def get_is_team_project(self, obj):
-        return obj.team is not None
+        return obj.team_id is not None
     
     def get_is_shared(self, obj):
-        return obj.shares.filter(status='accepted').exists()
+        count = getattr(obj, 'accepted_shares_total', None)
+        if count is None:
+            return obj.shares.filter(status='accepted').exists()
+        return count > 0
 
     def get_shared_members(self, obj):
-        shares = obj.shares.filter(status='accepted')
+        shares = getattr(obj, 'accepted_shares', None)
+        if shares is None:
+            shares = obj.shares.filter(status='accepted').select_related('shared_with')
         members = [share.shared_with for share in shares]
         return UserSerializer(members, many=True, context=self.context).data
 
     def get_is_owner(self, obj):
         request = self.context.get('request')
         if request and request.user:
-            return obj.owner == request.user
+            return obj.owner_id == request.user.id
         return False
 
+class TaskListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # Load the subtask trees of all tasks in a single recursive query
+        tasks = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        attach_subtask_trees(tasks)
+        return super().to_representation(tasks)
+
+
 class TaskSerializer(serializers.ModelSerializer):
     # Map backend fields to frontend expected names with proper formatting
     completed = serializers.BooleanField(source='is_completed')
@@ -350,10 +373,16 @@ class TaskSerializer(serializers.ModelSerializer):
             'id', 'title', 'description', 'due_date', 'due_time', 'priority', 
             'is_completed', 'completed', 'project', 'project_name', 'labels', 
             'owner', 'parent_task', 'subtasks', 'subtasks_count',
-            'completed_subtasks_count', 'has_subtasks', 'is_subtask',
+            'completed_subtasks_count', 'has_subtasks', 'is_subtask', 'rank',
+            'is_recurring', 'recurring_pattern', 'recurrence_parent', 'occurrence_date',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['owner', 'created_at', 'updated_at']
+        read_only_fields = ['owner', 'recurrence_parent', 'occurrence_date', 'created_at', 'updated_at']
+        list_serializer_class = TaskListSerializer
+    
+    def to_representation(self, instance):
+        attach_subtask_trees([instance])
+        return super().to_representation(instance)
     
     def get_due_time(self, obj):
         """Format due_date as YYYY-MM-DD in Israel timezone to avoid off-by-one."""
@@ -364,22 +393,31 @@ class TaskSerializer(serializers.ModelSerializer):
             return local_dt.strftime('%Y-%m-%d')
         return None
     
+    # Children and the *_total attributes are attached by task_tree.attach_subtask_trees;
+    # fall back to per-task queries if no tree was attached.
     def get_subtasks(self, obj):
-        if obj.has_subtasks():
+        if self.get_has_subtasks(obj):
             return TaskSerializer(obj.subtasks.all(), many=True, context=self.context).data
         return []
     
     def get_subtasks_count(self, obj):
-        return obj.get_subtasks_count()
+        count = getattr(obj, 'subtasks_total', None)
+        if count is None:
+            return obj.get_subtasks_count()
+        return count
     
     def get_completed_subtasks_count(self, obj):
-        return obj.get_completed_subtasks_count()
+        count = getattr(obj, 'completed_subtasks_total', None)
+        if count is None:
+            return obj.get_completed_subtasks_count()
+        return count
     
     def get_has_subtasks(self, obj):
-        return obj.has_subtasks()
+        return self.get_subtasks_count(obj) > 0
     
     def get_is_subtask(self, obj):
-        return obj.is_subtask()
+        # Compare the raw FK id to avoid loading the parent row
+        return obj.parent_task_id is not None
 
 class TaskCreateUpdateSerializer(serializers.ModelSerializer):
     # Accept frontend-friendly fields and coerce them to model fields
@@ -396,13 +434,24 @@ class TaskCreateUpdateSerializer(serializers.ModelSerializer):
         model = Task
         fields = [
             'id', 'title', 'description', 'due_date', 'due_time', 'priority', 
-            'is_completed', 'completed', 'project', 'project_name', 'labels', 'parent_task'
+            'is_completed', 'completed', 'project', 'project_name', 'labels', 'parent_task', 'rank',
+            'is_recurring', 'recurring_pattern'
         ]
         read_only_fields = ['id']
         extra_kwargs = {
             'due_date': { 'required': False, 'allow_null': True },
         }
 
+    def validate_rank(self, value):
+        if not is_valid_rank(value):
+            raise serializers.ValidationError('Rank must use 0-9a-z and must not end with 0')
+        return value
+
+    def validate_recurring_pattern(self, value):
+        if value and normalize_rule(value) is None:
+            raise serializers.ValidationError('Use daily, weekly, monthly, yearly or an RRULE (FREQ=...)')
+        return value
+
     def validate(self, attrs):
         """
         Accept simple YYYY-MM-DD strings for due_date (and due_time alias) and
@@ -414,6 +463,11 @@ class TaskCreateUpdateSerializer(serializers.ModelSerializer):
 
         coerced_attrs = dict(attrs)
 
+        is_recurring = attrs.get('is_recurring', getattr(self.instance, 'is_recurring', False))
+        recurring_pattern = attrs.get('recurring_pattern', getattr(self.instance, 'recurring_pattern', ''))
+        if is_recurring and not recurring_pattern:
+            raise serializers.ValidationError({'recurring_pattern': 'A recurring task needs a pattern'})
+
         # Prefer explicit due_time input as alias for a date
         due_time_str = self.initial_data.get('due_time')
         if isinstance(due_time_str, str):
@@ -480,16 +534,14 @@ class TaskCreateUpdateSerializer(serializers.ModelSerializer):
         project_name = validated_data.pop('project_name', None)
         request = self.context.get('request')
         current_user = request.user if request and getattr(request, 'user', None) else None
+        access = None
+        if current_user is not None and getattr(current_user, 'is_authenticated', False):
+            access = ProjectAccess.for_request(request)
         if project_name and not validated_data.get('project'):
-            from .models import Project
-            from django.db.models import Q
             # Allow resolving to a project owned by user OR shared with user
-            if current_user and not getattr(current_user, 'is_anonymous', False):
+            if access is not None:
                 project_obj = Project.objects.filter(
-                    Q(name=project_name) & (
-                        Q(owner=current_user) |
-                        Q(shares__shared_with=current_user, shares__status='accepted')
-                    )
+                    name=project_name, id__in=access.project_ids()
                 ).first()
             else:
                 project_obj = None
@@ -502,21 +554,7 @@ class TaskCreateUpdateSerializer(serializers.ModelSerializer):
             project_obj = validated_data.get('project')
             # If the provided project isn't owned by user OR shared with user, null it (Inbox)
             try:
-                project_owner = getattr(project_obj, 'owner', None)
-                # Check if user is owner OR project is shared with user
-                has_access = False
-                if current_user is not None and project_owner is not None:
-                    if project_owner == current_user:
-                        has_access = True
-                    else:
-                        # Check if project is shared with user
-                        from .models import ProjectShare
-                        has_access = ProjectShare.objects.filter(
-                            project=project_obj,
-                            shared_with=current_user,
-                            status='accepted'
-                        ).exists()
-                
+                has_access = access is not None and access.can_access(project_obj.pk)
                 if not has_access:
                     validated_data['project'] = None
             except Exception:
@@ -529,6 +567,24 @@ class TaskCreateUpdateSerializer(serializers.ModelSerializer):
 
         return validated_data
 
+    def prepare_instance(self, instance=None, **kwargs):
+        """
+        Apply the validated data to a new or existing Task without saving it,
+        for callers that write many tasks with bulk_create/bulk_update.
+        Returns (task, changed field names, labels or None).
+        """
+        validated_data = dict(self.validated_data)
+        validated_data.update(kwargs)
+        labels_data = validated_data.pop('labels', None)
+        validated_data = self._coerce_extra_fields(validated_data)
+
+        if instance is None:
+            instance = Task(**validated_data)
+        else:
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+        return instance, list(validated_data.keys()), labels_data
+
     def create(self, validated_data):
         labels_data = validated_data.pop('labels', [])
         validated_data = self._coerce_extra_fields(validated_data)
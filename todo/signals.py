@@ -0,0 +1,226 @@
+"""
+Model signal handlers for the todo app
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.db import transaction
+from django.dispatch import receiver
+
+from .models import (
+    Task, TaskDeletion, Label, Project, ProjectShare, ProjectMembership, ProjectAccessRevocation, Notification,
+    NotificationCounter,
+)
+from .search import index_tasks
+from .counters import invalidate_task_counts
+from .access import invalidate_project_access
+from .dates import user_today_range
+from .events import project_member_ids, publish, publish_notifications, publish_task_changes
+
+
+@receiver(post_delete, sender=Task)
+def record_task_deletion(sender, instance, **kwargs):
+    """Write a tombstone so delta-sync clients can drop the deleted task"""
+    TaskDeletion.objects.create(
+        task_id=instance.pk,
+        owner_id=instance.owner_id,
+        project_id=instance.project_id
+    )
+
+
+@receiver(post_save, sender=Task)
+def record_task_move(sender, instance, created, raw=False, **kwargs):
+    """
+    A task moved out of a project disappears for that project's members: give them a
+    tombstone. Runs before task_changed resets _original_project_id.
+    """
+    original_project_id = instance._original_project_id
+    if created or raw or original_project_id is None or original_project_id == instance.project_id:
+        return
+    TaskDeletion.objects.create(
+        task_id=instance.pk,
+        owner_id=instance.owner_id,
+        project_id=original_project_id
+    )
+
+
+@receiver(pre_delete, sender=Task)
+def delete_upcoming_occurrences(sender, instance, **kwargs):
+    """
+    Deleting a recurring series also deletes its open occurrences from today
+    (in the owner's timezone) on; completed and overdue ones are kept.
+    """
+    if not instance.is_recurring:
+        return
+    today_start, _ = user_today_range(instance.owner)
+    # A queryset delete still sends post_delete per task (tombstones, counters, events)
+    Task.objects.filter(
+        recurrence_parent=instance,
+        is_completed=False,
+        occurrence_date__gte=today_start
+    ).delete()
+
+
+@receiver(post_init, sender=Task)
+def remember_task_project(sender, instance, **kwargs):
+    # Moving a task between projects changes the counters of both projects' members
+    instance._original_project_id = instance.project_id
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def task_changed(sender, instance, raw=False, **kwargs):
+    """Invalidate counters and push a change event to everyone who sees the task"""
+    invalidate_task_counts(
+        user_ids=[instance.owner_id],
+        project_ids=[instance.project_id, instance._original_project_id]
+    )
+    if not raw:
+        publish_task_changes([instance])
+    instance._original_project_id = instance.project_id
+
+
+@receiver(post_save, sender=ProjectMembership)
+@receiver(post_delete, sender=ProjectMembership)
+def invalidate_counts_for_membership(sender, instance, **kwargs):
+    """Gaining or losing a project changes the user's visible tasks"""
+    invalidate_task_counts(user_ids=[instance.user_id])
+
+
+@receiver(post_save, sender=ProjectMembership)
+@receiver(post_delete, sender=ProjectMembership)
+def invalidate_access_for_membership(sender, instance, **kwargs):
+    """
+    Project and ProjectShare changes reach access through the membership rows
+    they sync below. Bumped on commit so a concurrent request can't re-cache
+    the pre-commit roles under the new version.
+    """
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_project_access([user_id]))
+
+
+@receiver(post_save, sender=ProjectMembership)
+@receiver(post_delete, sender=ProjectMembership)
+def publish_membership_change(sender, instance, **kwargs):
+    """
+    Joining or leaving changes the project lists of the user and the other members.
+    Project saves land here too: sync_owner_membership re-saves the owner row.
+    """
+    publish(
+        project_member_ids([instance.project_id]) | {instance.user_id},
+        'projects_changed',
+        project_id=instance.project_id
+    )
+
+
+@receiver(post_delete, sender=ProjectMembership)
+def record_access_revocation(sender, instance, **kwargs):
+    """Delta-sync clients of a user who lost a project need a full snapshot"""
+    ProjectAccessRevocation.objects.create(user_id=instance.user_id, project_id=instance.project_id)
+
+
+@receiver(post_save, sender=Notification)
+def publish_notification(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        publish_notifications([instance])
+
+
+@receiver(post_init, sender=Notification)
+def remember_notification_read(sender, instance, **kwargs):
+    instance._original_is_read = instance.is_read
+
+
+@receiver(post_save, sender=Notification)
+def count_unread_on_save(sender, instance, created, raw=False, **kwargs):
+    """Keep NotificationCounter in step with saves (queryset updates adjust it themselves)"""
+    if raw:
+        return
+    if created:
+        if not instance.is_read:
+            NotificationCounter.increment({instance.user_id: 1})
+    elif instance.is_read != instance._original_is_read:
+        if instance.is_read:
+            NotificationCounter.decrement(instance.user_id)
+        else:
+            NotificationCounter.increment({instance.user_id: 1})
+    instance._original_is_read = instance.is_read
+
+
+@receiver(post_delete, sender=Notification)
+def count_unread_on_delete(sender, instance, **kwargs):
+    if not instance.is_read:
+        NotificationCounter.decrement(instance.user_id)
+
+
+@receiver(post_save, sender=Task)
+def index_task(sender, instance, raw=False, **kwargs):
+    """Keep the task's full-text search document current"""
+    if not raw:
+        index_tasks([instance.pk])
+
+
+@receiver(m2m_changed, sender=Task.labels.through)
+def index_task_labels(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        index_tasks([instance.pk])
+    elif pk_set:
+        # label.task_set.add(...): pk_set holds task ids
+        index_tasks(pk_set)
+
+
+@receiver(post_save, sender=Label)
+def index_label_tasks(sender, instance, created, raw=False, **kwargs):
+    """Label names are part of the search text of their tasks"""
+    if not created and not raw:
+        index_tasks(instance.task_set.values_list('id', flat=True))
+
+
+@receiver(pre_delete, sender=Label)
+def remember_label_tasks(sender, instance, **kwargs):
+    # The label's task links are gone by post_delete
+    instance._indexed_task_ids = list(instance.task_set.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Label)
+def reindex_label_tasks(sender, instance, **kwargs):
+    index_tasks(getattr(instance, '_indexed_task_ids', []))
+
+
+@receiver(post_save, sender=Project)
+def sync_owner_membership(sender, instance, created, **kwargs):
+    """Keep exactly one owner membership row per project"""
+    if not created:
+        ProjectMembership.objects.filter(
+            project=instance, role='owner'
+        ).exclude(user_id=instance.owner_id).delete()
+    ProjectMembership.objects.update_or_create(
+        user_id=instance.owner_id,
+        project=instance,
+        defaults={'role': 'owner'}
+    )
+
+
+@receiver(post_save, sender=ProjectShare)
+def sync_share_membership(sender, instance, **kwargs):
+    """Grant access on accepted shares, revoke it on pending/declined ones"""
+    if instance.status == 'accepted':
+        ProjectMembership.objects.get_or_create(
+            user_id=instance.shared_with_id,
+            project_id=instance.project_id,
+            defaults={'role': 'shared'}
+        )
+    else:
+        ProjectMembership.objects.filter(
+            user_id=instance.shared_with_id,
+            project_id=instance.project_id,
+            role='shared'
+        ).delete()
+
+
+@receiver(post_delete, sender=ProjectShare)
+def revoke_share_membership(sender, instance, **kwargs):
+    ProjectMembership.objects.filter(
+        user_id=instance.shared_with_id,
+        project_id=instance.project_id,
+        role='shared'
+    ).delete()
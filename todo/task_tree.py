@@ -0,0 +1,104 @@
+"""
+Single-query subtask tree loading with recursive CTEs.
+
+`WITH RECURSIVE` is supported by both SQLite and PostgreSQL, so a task's whole
+subtree (or its ancestor chain) is fetched in one round trip and the nested
+structure is assembled in memory. TaskSerializer reads the assembled children
+through the regular `task.subtasks.all()` prefetch cache.
+"""
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import prefetch_related_objects
+
+from .models import Task
+
+# Guard against corrupted parent cycles
+MAX_TREE_DEPTH = 50
+
+# SQLite limits the number of bound parameters per statement
+ROOT_ID_CHUNK_SIZE = 500
+
+
+def _task_table():
+    return connection.ops.quote_name(Task._meta.db_table)
+
+
+def _ordering_sql():
+    qn = connection.ops.quote_name
+    return f"t.{qn('rank')}, t.{qn('priority')} DESC, t.{qn('due_date')}, t.{qn('created_at')}"
+
+
+def fetch_descendants(root_ids):
+    """All descendants of the given task ids (not the roots themselves), in Task ordering"""
+    root_ids = list(root_ids)
+    descendants = []
+    for i in range(0, len(root_ids), ROOT_ID_CHUNK_SIZE):
+        chunk = root_ids[i:i + ROOT_ID_CHUNK_SIZE]
+        placeholders = ', '.join(['%s'] * len(chunk))
+        sql = f"""
+            WITH RECURSIVE tree(id, depth) AS (
+                SELECT id, 1 FROM {_task_table()} WHERE parent_task_id IN ({placeholders})
+                UNION ALL
+                SELECT child.id, tree.depth + 1
+                FROM {_task_table()} child JOIN tree ON child.parent_task_id = tree.id
+                WHERE tree.depth < %s
+            )
+            SELECT t.* FROM {_task_table()} t JOIN tree ON t.id = tree.id
+            ORDER BY {_ordering_sql()}
+        """
+        descendants.extend(Task.objects.raw(sql, [*chunk, MAX_TREE_DEPTH]))
+    return descendants
+
+
+def fetch_ancestors(task_id):
+    """Ancestor chain of a task, nearest parent first (the task itself excluded)"""
+    sql = f"""
+        WITH RECURSIVE ancestors(id, parent_task_id, depth) AS (
+            SELECT id, parent_task_id, 0 FROM {_task_table()} WHERE id = %s
+            UNION ALL
+            SELECT parent.id, parent.parent_task_id, ancestors.depth + 1
+            FROM {_task_table()} parent JOIN ancestors ON parent.id = ancestors.parent_task_id
+            WHERE ancestors.depth < %s
+        )
+        SELECT t.* FROM {_task_table()} t JOIN ancestors ON t.id = ancestors.id
+        WHERE ancestors.depth > 0
+        ORDER BY ancestors.depth
+    """
+    return list(Task.objects.raw(sql, [task_id, MAX_TREE_DEPTH]))
+
+
+def _set_children(task, children):
+    """Store children the same way prefetch_related('subtasks') would"""
+    queryset = Task.objects.filter(parent_task=task)
+    queryset._result_cache = children
+    queryset._prefetch_done = True
+    if not hasattr(task, '_prefetched_objects_cache'):
+        task._prefetched_objects_cache = {}
+    task._prefetched_objects_cache['subtasks'] = queryset
+    task.subtasks_total = len(children)
+    task.completed_subtasks_total = sum(1 for child in children if child.is_completed)
+    task._subtask_tree_loaded = True
+
+
+def attach_subtask_trees(tasks):
+    """
+    Load the full subtask tree of every task with one recursive query and attach
+    children to each node, plus labels/project/owner of the loaded descendants.
+    Tasks whose trees are already attached are skipped.
+    """
+    roots = [task for task in tasks if not getattr(task, '_subtask_tree_loaded', False)]
+    if not roots:
+        return tasks
+
+    descendants = fetch_descendants(task.pk for task in roots)
+    if descendants:
+        prefetch_related_objects(descendants, 'labels', 'project', 'owner')
+
+    children_by_parent = defaultdict(list)
+    for task in descendants:
+        children_by_parent[task.parent_task_id].append(task)
+
+    for task in [*roots, *descendants]:
+        _set_children(task, children_by_parent.get(task.pk, []))
+    return tasks
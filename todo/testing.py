@@ -0,0 +1,61 @@
+"""
+Test helpers.
+
+query_budget fails a test when the wrapped code runs more SQL queries (or
+takes longer) than allowed; pass a URL name (and the HTTP method, GET by
+default) to use the budget configured in settings.QUERY_BUDGET['VIEWS'], the
+same one QueryBudgetMiddleware logs against:
+
+    @query_budget('task-list')
+    def test_task_list(self):
+        self.client.get('/api/tasks/')
+
+    with query_budget('task-list', method='POST'):
+        self.client.post('/api/tasks/', {'title': 'New'})
+
+    with query_budget(5):
+        self.client.get('/api/friends/')
+"""
+import time
+from contextlib import ContextDecorator
+
+from .middleware import QueryStats, budget_for
+
+
+class query_budget(ContextDecorator):
+
+    def __init__(self, budget, max_ms=None, method='GET'):
+        if isinstance(budget, str):
+            self.label = f'{method} {budget}'
+            self.max_queries, default_ms = budget_for(budget, method)
+            self.max_ms = max_ms if max_ms is not None else default_ms
+        else:
+            self.label = f'{budget} queries'
+            self.max_queries = budget
+            self.max_ms = max_ms
+        self.stats = None
+
+    def __enter__(self):
+        self.stats = QueryStats(record_sql=True).__enter__()
+        self._start = time.perf_counter()
+        return self.stats
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed_ms = (time.perf_counter() - self._start) * 1000
+        self.stats.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return False
+
+        if self.stats.count > self.max_queries:
+            queries = '\n'.join(
+                f'{i}. {sql}' for i, sql in enumerate(self.stats.queries, start=1)
+            )
+            raise AssertionError(
+                f'Query budget exceeded ({self.label}): {self.stats.count} queries, '
+                f'budget {self.max_queries}\n{queries}'
+            )
+        if self.max_ms is not None and elapsed_ms > self.max_ms:
+            raise AssertionError(
+                f'Time budget exceeded ({self.label}): {elapsed_ms:.1f}ms, budget {self.max_ms}ms'
+            )
+        return False
@@ -0,0 +1,798 @@
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+import httplib2
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from googleapiclient.errors import HttpError
+from rest_framework.test import APIClient
+
+from .access import ProjectAccess
+from .calendar_sync import claim_due, sync_user
+from .calendar_views import refresh_calendar_in_background, sync_google_calendar_events
+from .models import (
+    EmailOutbox, Friend, GoogleCalendarEvent, GoogleCalendarToken, Label, Notification, Project, ProjectMembership,
+    ProjectShare, Task, TaskDeletion,
+)
+from .outbox import send_batch
+from .ranking import rank_between
+from .recurrence import materialize_occurrences
+from .testing import query_budget
+
+
+class ListQueryBudgetTests(TestCase):
+    """List endpoints stay within their QUERY_BUDGET however much data there is"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', 'owner@example.com', 'pass')
+        cls.teammate = User.objects.create_user('teammate', 'teammate@example.com', 'pass')
+
+        own_project = Project.objects.create(name='Own', owner=cls.user)
+        shared_project = Project.objects.create(name='Shared', owner=cls.teammate)
+        ProjectShare.objects.create(
+            project=shared_project, shared_by=cls.teammate, shared_with=cls.user, status='accepted'
+        )
+        label = Label.objects.create(name='Label', owner=cls.user)
+
+        for i in range(10):
+            task = Task.objects.create(title=f'Own {i}', owner=cls.user, project=own_project)
+            task.labels.add(label)
+            Task.objects.create(title=f'Subtask {i}', owner=cls.user, parent_task=task)
+            Task.objects.create(title=f'Shared {i}', owner=cls.teammate, project=shared_project)
+            Task.objects.create(title=f'Inbox {i}', owner=cls.user)
+
+        for i in range(5):
+            friend = User.objects.create_user(f'friend{i}', f'friend{i}@example.com', 'pass')
+            Friend.objects.create(user=cls.user, friend=friend, status='accepted')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_task_list(self):
+        with query_budget('task-list'):
+            response = self.client.get('/api/tasks/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_project_list(self):
+        with query_budget('project-list'):
+            response = self.client.get('/api/projects/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_friend_list(self):
+        with query_budget('friend-list'):
+            response = self.client.get('/api/friends/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_task_writes(self):
+        project = Project.objects.get(name='Own')
+        label = Label.objects.get(name='Label')
+        with query_budget('task-list', method='POST'):
+            response = self.client.post('/api/tasks/', {
+                'title': 'New', 'project': project.pk, 'labels': [label.pk], 'due_date': '2026-10-20',
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        task_id = response.json()['id']
+        with query_budget('task-detail', method='PATCH'):
+            self.client.patch(f'/api/tasks/{task_id}/', {'title': 'Renamed'}, format='json')
+        with query_budget('task-toggle', method='POST'):
+            self.client.post(f'/api/tasks/{task_id}/toggle/')
+        with query_budget('task-detail', method='DELETE'):
+            response = self.client.delete(f'/api/tasks/{task_id}/')
+        self.assertEqual(response.status_code, 204)
+
+    def test_project_writes(self):
+        with query_budget('project-list', method='POST'):
+            response = self.client.post('/api/projects/', {'name': 'New project'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        with query_budget('project-detail', method='DELETE'):
+            self.client.delete(f"/api/projects/{response.json()['id']}/")
+
+    @override_settings(QUERY_BUDGET={'ENABLED': True, 'VIEWS': {'task-list': 0, ('task-list', 'POST'): 100}})
+    def test_middleware_budgets_writes_separately(self):
+        with self.assertNoLogs('todo.middleware', level='WARNING'):
+            self.client.post('/api/tasks/', {'title': 'New'}, format='json')
+        with self.assertLogs('todo.middleware', level='WARNING'):
+            self.client.get('/api/tasks/')
+
+    @override_settings(QUERY_BUDGET={'ENABLED': True, 'VIEWS': {'friend-list': 0}})
+    def test_middleware_logs_over_budget_requests(self):
+        with self.assertLogs('todo.middleware', level='WARNING') as logs:
+            self.client.get('/api/friends/')
+        self.assertIn('Over budget: GET /api/friends/ (friend-list)', logs.output[0])
+
+
+class FakeCalendarService:
+    """
+    Stand-in for the Calendar API client returned by build_calendar_service.
+    calendars maps a calendar id to {'events': [...], 'delay': seconds,
+    'error': exception raised by events().list()}.
+    """
+
+    def __init__(self, calendars):
+        self.calendars = calendars
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def __call__(self, credentials):
+        return self
+
+    def calendarList(self):
+        items = [{'id': calendar_id, 'summary': calendar_id} for calendar_id in self.calendars]
+        return mock.Mock(**{'list.return_value.execute.return_value': {'items': items}})
+
+    def events(self):
+        return mock.Mock(**{'list.side_effect': self._list})
+
+    def _list(self, **params):
+        with self.lock:
+            self.requests.append(params)
+        calendar = self.calendars[params['calendarId']]
+
+        def execute():
+            time.sleep(calendar.get('delay', 0))
+            if calendar.get('error'):
+                raise calendar['error']
+            return {
+                'items': [dict(event) for event in calendar.get('events', [])],
+                'nextSyncToken': f"{params['calendarId']}-new-token",
+            }
+        return mock.Mock(**{'execute.side_effect': execute})
+
+
+def http_error(status):
+    return HttpError(httplib2.Response({'status': status}), b'{}')
+
+
+@override_settings(CALENDAR_SYNC_MAX_WORKERS=4)
+class CalendarFetchTests(TestCase):
+    """sync_google_calendar_events fetches calendars concurrently and merges their tokens"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('calendar', 'calendar@example.com', 'pass')
+        self.calendar_token = GoogleCalendarToken.objects.create(
+            user=self.user, access_token='access', refresh_token='refresh',
+            client_id='client', client_secret='secret',
+        )
+
+    def sync(self, calendars, **kwargs):
+        service = FakeCalendarService(calendars)
+        with mock.patch('todo.calendar_views.build_calendar_service', service):
+            result = sync_google_calendar_events(self.user, **kwargs)
+        self.calendar_token.refresh_from_db()
+        return service, result
+
+    def test_wall_time_is_close_to_the_slowest_calendar(self):
+        calendars = {f'cal{i}': {'delay': 0.3, 'events': [{'id': f'e{i}'}]} for i in range(4)}
+        started = time.perf_counter()
+        _, (events, _, _) = self.sync(calendars)
+        self.assertLess(time.perf_counter() - started, 0.6)
+        self.assertEqual([event['id'] for event in events], ['e0', 'e1', 'e2', 'e3'])
+
+    def test_failing_calendar_does_not_affect_the_others(self):
+        calendars = {
+            'work': {'events': [{'id': 'w1'}]},
+            'broken': {'error': http_error(500)},
+            'home': {'events': [{'id': 'h1'}]},
+        }
+        _, (events, sync_tokens, _) = self.sync(calendars)
+        self.assertEqual([event['id'] for event in events], ['w1', 'h1'])
+        self.assertEqual(set(sync_tokens), {'work', 'home'})
+        self.assertEqual(set(self.calendar_token.sync_tokens), {'work', 'home'})
+
+    def test_expired_token_drops_only_that_calendar(self):
+        self.calendar_token.sync_tokens = {'work': 'work-old', 'home': 'home-old', 'other': 'other-old'}
+        self.calendar_token.save()
+        calendars = {
+            'work': {'error': http_error(410)},
+            'home': {'events': [{'id': 'h1'}]},
+            'other': {'error': http_error(500)},
+        }
+        service, _ = self.sync(calendars)
+        self.assertEqual(self.calendar_token.sync_tokens, {'home': 'home-new-token', 'other': 'other-old'})
+        self.assertEqual(
+            {request['calendarId']: request['syncToken'] for request in service.requests},
+            {'work': 'work-old', 'home': 'home-old', 'other': 'other-old'},
+        )
+
+    def test_tokens_are_merged_and_saved_once(self):
+        self.calendar_token.sync_tokens = {'work': 'work-old', 'removed': 'removed-old'}
+        self.calendar_token.save()
+        calendars = {'work': {'events': []}, 'home': {'events': []}, 'shared': {'events': []}}
+        with CaptureQueriesContext(connection) as queries:
+            self.sync(calendars)
+        token_updates = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "todo_googlecalendartoken"')
+        ]
+        self.assertEqual(len(token_updates), 1)
+        self.assertEqual(self.calendar_token.sync_tokens, {
+            'work': 'work-new-token', 'removed': 'removed-old',
+            'home': 'home-new-token', 'shared': 'shared-new-token',
+        })
+
+
+class CalendarRangeTests(TestCase):
+    """Ranges outside the synced window are read through once, then served from the cache"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('range', 'range@example.com', 'pass')
+        now = timezone.now()
+        self.calendar_token = GoogleCalendarToken.objects.create(
+            user=self.user, access_token='access', refresh_token='refresh',
+            client_id='client', client_secret='secret', sync_tokens={'work': 'work-token'},
+            synced_from=now - timedelta(days=30), synced_until=now + timedelta(days=180),
+            last_sync_time=now,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.day = (now - timedelta(days=365)).date()
+        self.service = FakeCalendarService({'work': {'events': [{
+            'id': 'old-meeting', 'summary': 'Old meeting',
+            'start': {'date': self.day.isoformat()}, 'end': {'date': self.day.isoformat()},
+        }]}})
+
+    def get_events(self):
+        with mock.patch('todo.calendar_views.build_calendar_service', self.service):
+            response = self.client.get('/api/calendar/events/', {
+                'start_date': (self.day - timedelta(days=3)).isoformat(),
+                'end_date': (self.day + timedelta(days=3)).isoformat(),
+            })
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_range_is_fetched_once_then_served_from_cache(self):
+        first = self.get_events()
+        self.assertEqual(len(self.service.requests), 1)
+        self.assertIn('timeMin', self.service.requests[0])
+
+        second = self.get_events()
+        self.assertEqual(len(self.service.requests), 1)
+        self.assertEqual([event['id'] for event in first['events']], ['old-meeting'])
+        self.assertEqual(second['events'], first['events'])
+        self.assertFalse(second['refreshing'])
+
+    def test_stale_range_is_refreshed_in_background(self):
+        self.get_events()
+        self.calendar_token.refresh_from_db()
+        for entry in self.calendar_token.fetched_ranges:
+            entry['fetched_at'] = (timezone.now() - timedelta(days=1)).isoformat()
+        self.calendar_token.save()
+
+        with mock.patch('todo.calendar_views.refresh_calendar_in_background', return_value=True) as refresh:
+            response = self.get_events()
+        self.assertTrue(response['refreshing'])
+        refresh.assert_called_once()
+        self.assertEqual(len(self.service.requests), 1)
+
+    def test_events_deleted_from_the_range_are_deactivated(self):
+        start = datetime.combine(self.day, datetime.min.time(), tzinfo=dt_timezone.utc) + timedelta(hours=9)
+        GoogleCalendarEvent.objects.create(
+            user=self.user, google_event_id='deleted', calendar_id='work', calendar_summary='work',
+            title='Deleted', start_time=start, end_time=start + timedelta(hours=1),
+        )
+        response = self.get_events()
+        self.assertEqual([event['id'] for event in response['events']], ['old-meeting'])
+        self.assertFalse(GoogleCalendarEvent.objects.get(google_event_id='deleted').is_active)
+
+    def test_read_through_waits_for_a_running_sync(self):
+        self.assertTrue(GoogleCalendarToken.claim_sync(self.user, timedelta(minutes=5)))
+        response = self.get_events()
+        self.assertEqual(self.service.requests, [])
+        self.assertTrue(response['refreshing'])
+        self.calendar_token.refresh_from_db()
+        self.assertEqual(self.calendar_token.fetched_ranges, [])
+
+        GoogleCalendarToken.release_sync(self.user)
+        self.get_events()
+        self.assertEqual(len(self.service.requests), 1)
+        self.calendar_token.refresh_from_db()
+        self.assertIsNone(self.calendar_token.sync_lease_until)
+
+
+@override_settings(CALENDAR_SYNC_RETRY_SECONDS=60, CALENDAR_SYNC_INTERVAL_SECONDS=900)
+class CalendarWorkerTests(TestCase):
+    """sync_user schedules the next run from the outcome of every calendar"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('worker', 'worker@example.com', 'pass')
+        self.calendar_token = GoogleCalendarToken.objects.create(
+            user=self.user, access_token='access', refresh_token='refresh',
+            client_id='client', client_secret='secret', sync_failures=2,
+        )
+
+    def sync(self, calendars):
+        with mock.patch('todo.calendar_views.build_calendar_service', FakeCalendarService(calendars)):
+            synced = sync_user(GoogleCalendarToken.objects.select_related('user').get(user=self.user))
+        self.calendar_token.refresh_from_db()
+        return synced
+
+    def test_failing_calendar_counts_as_failure(self):
+        started = timezone.now()
+        synced = self.sync({
+            'work': {'events': [{'id': 'w1', 'start': {'date': '2026-01-05'}, 'end': {'date': '2026-01-06'}}]},
+            'limited': {'error': http_error(429)},
+        })
+        self.assertFalse(synced)
+        self.assertEqual(self.calendar_token.sync_failures, 3)
+        self.assertIn('limited', self.calendar_token.last_sync_error)
+        # Third failure in a row: 4 * CALENDAR_SYNC_RETRY_SECONDS plus jitter
+        self.assertLess(self.calendar_token.next_sync_at, started + timedelta(seconds=300))
+        # The calendar that did sync is cached anyway
+        self.assertTrue(GoogleCalendarEvent.objects.filter(user=self.user, google_event_id='w1').exists())
+
+    def test_expired_token_is_not_a_failure(self):
+        self.calendar_token.sync_tokens = {'work': 'work-old'}
+        self.calendar_token.save()
+        synced = self.sync({'work': {'error': http_error(410)}})
+        self.assertTrue(synced)
+        self.assertEqual(self.calendar_token.sync_failures, 0)
+        self.assertEqual(self.calendar_token.sync_tokens, {})
+
+    def test_one_sync_per_user_across_worker_and_view(self):
+        self.assertEqual([token.id for token in claim_due(10)], [self.calendar_token.id])
+        # Claimed by the worker: neither the view nor another worker may start one
+        self.assertFalse(refresh_calendar_in_background(self.user))
+        self.assertEqual(claim_due(10), [])
+
+        self.sync({'work': {'events': []}})
+        self.assertIsNone(self.calendar_token.sync_lease_until)
+        self.assertTrue(GoogleCalendarToken.claim_sync(self.user, timedelta(minutes=5)))
+        self.assertFalse(GoogleCalendarToken.claim_sync(self.user, timedelta(minutes=5)))
+
+    def test_full_download_deactivates_events_deleted_meanwhile(self):
+        now = timezone.now()
+        self.calendar_token.sync_tokens = {'work': 'work-old', 'home': 'home-old'}
+        self.calendar_token.synced_from = now - timedelta(days=30)
+        self.calendar_token.synced_until = now + timedelta(days=180)
+        self.calendar_token.save()
+        for event_id, calendar_id, start in [
+            ('deleted', 'work', now + timedelta(days=2)),
+            ('kept', 'work', now + timedelta(days=3)),
+            ('before-window', 'work', now - timedelta(days=60)),
+            ('other-calendar', 'home', now + timedelta(days=2)),
+        ]:
+            GoogleCalendarEvent.objects.create(
+                user=self.user, google_event_id=event_id, calendar_id=calendar_id, calendar_summary=calendar_id,
+                title=event_id, start_time=start, end_time=start + timedelta(hours=1),
+            )
+        kept = {
+            'id': 'kept',
+            'start': {'dateTime': (now + timedelta(days=3)).isoformat()},
+            'end': {'dateTime': (now + timedelta(days=3, hours=1)).isoformat()},
+        }
+
+        # The expired token is dropped, then the calendar is downloaded in full
+        self.sync({'work': {'error': http_error(410)}, 'home': {'events': []}})
+        self.sync({'work': {'events': [kept]}, 'home': {'events': []}})
+
+        active = set(GoogleCalendarEvent.objects.filter(user=self.user, is_active=True).values_list('google_event_id', flat=True))
+        self.assertEqual(active, {'kept', 'before-window', 'other-calendar'})
+
+    def test_worker_does_not_steal_a_lease_taken_after_its_select(self):
+        values_list = QuerySet.values_list
+
+        def claim_after_select(queryset, *args, **kwargs):
+            ids = list(values_list(queryset, *args, **kwargs))
+            # The calendar view claims the user between the worker's SELECT and UPDATE
+            GoogleCalendarToken.claim_sync(self.user, timedelta(minutes=5))
+            return ids
+
+        with mock.patch.object(QuerySet, 'values_list', claim_after_select):
+            self.assertEqual(claim_due(10), [])
+        self.calendar_token.refresh_from_db()
+        self.assertLess(self.calendar_token.sync_lease_until, timezone.now() + timedelta(minutes=6))
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class OutboxTests(TestCase):
+    """Each email's outcome is saved as soon as it is sent"""
+
+    def setUp(self):
+        for i in range(3):
+            EmailOutbox.enqueue('Subject', 'Body', f'user{i}@example.com')
+
+    def test_crash_mid_batch_keeps_sent_emails_sent(self):
+        from django.core.mail import EmailMultiAlternatives
+
+        original_send = EmailMultiAlternatives.send
+        calls = []
+
+        def send(message, *args, **kwargs):
+            calls.append(message.to)
+            if len(calls) == 2:
+                raise KeyboardInterrupt  # the worker dies here
+            return original_send(message, *args, **kwargs)
+
+        with mock.patch.object(EmailMultiAlternatives, 'send', send), self.assertRaises(KeyboardInterrupt):
+            send_batch()
+        statuses = dict(EmailOutbox.objects.values_list('to_email', 'status'))
+        self.assertEqual(statuses, {
+            'user0@example.com': 'sent', 'user1@example.com': 'pending', 'user2@example.com': 'pending',
+        })
+
+    def test_batch_stops_before_the_lease_runs_out(self):
+        with mock.patch('todo.outbox.CLAIM_LEASE', timedelta(seconds=0)):
+            sent, failed = send_batch()
+        self.assertEqual((sent, failed), (0, 0))
+        self.assertEqual(EmailOutbox.objects.filter(status='pending').count(), 3)
+
+
+class RecurringSeriesTests(TestCase):
+    """Recurring series and their materialized occurrences"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('recurring', 'recurring@example.com', 'pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.series = Task.objects.create(
+            title='Daily', owner=self.user, is_recurring=True, recurring_pattern='daily',
+            due_date=timezone.now() - timedelta(days=3),
+        )
+
+    def test_deleting_a_series_deletes_its_open_upcoming_occurrences(self):
+        materialize_occurrences([self.series], window_days=10)
+        occurrences = Task.objects.filter(recurrence_parent=self.series).order_by('occurrence_date')
+        done = occurrences[1]
+        done.is_completed = True
+        done.save()
+        overdue = Task.objects.create(
+            title='Daily', owner=self.user, recurrence_parent=self.series,
+            occurrence_date=self.series.due_date + timedelta(days=1), due_date=self.series.due_date + timedelta(days=1),
+        )
+        upcoming_ids = set(occurrences.filter(is_completed=False).exclude(pk=overdue.pk).values_list('id', flat=True))
+
+        response = self.client.delete(f'/api/tasks/{self.series.pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(set(Task.objects.filter(owner=self.user).values_list('id', flat=True)), {done.pk, overdue.pk})
+        self.assertTrue(upcoming_ids <= set(TaskDeletion.objects.values_list('task_id', flat=True)))
+
+    def test_completing_an_occurrence_creates_only_the_next_one(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f'/api/tasks/{self.series.pk}/toggle/')
+        self.assertEqual(response.status_code, 200)
+        occurrences = list(Task.objects.filter(recurrence_parent=self.series))
+        self.assertEqual(len(occurrences), 1)
+        # Missed days are skipped: the next occurrence is today's
+        self.assertGreaterEqual(occurrences[0].occurrence_date, timezone.now() - timedelta(days=1))
+        self.assertLess(len(queries), 30)
+
+        self.client.post(f'/api/tasks/{occurrences[0].pk}/toggle/')
+        following = Task.objects.filter(recurrence_parent=self.series).exclude(pk=occurrences[0].pk).get()
+        self.assertEqual(following.occurrence_date, occurrences[0].occurrence_date + timedelta(days=1))
+
+        # Completing it again doesn't duplicate the next occurrence
+        self.client.post(f'/api/tasks/{occurrences[0].pk}/toggle/')
+        self.client.post(f'/api/tasks/{occurrences[0].pk}/toggle/')
+        self.assertEqual(Task.objects.filter(recurrence_parent=self.series).count(), 2)
+
+    def test_recurring_tasks_can_be_created_through_the_api(self):
+        response = self.client.post('/api/tasks/', {
+            'title': 'Weekly', 'due_date': '2026-01-04', 'is_recurring': True, 'recurring_pattern': 'FREQ=WEEKLY;BYDAY=SU',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Task.objects.get(title='Weekly').is_recurring)
+
+        response = self.client.post('/api/tasks/', {
+            'title': 'Broken', 'is_recurring': True, 'recurring_pattern': 'every other day',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class TaskChangesTests(TestCase):
+    """Delta sync through /api/tasks/changes/"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('syncer', 'syncer@example.com', 'pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sync(self, cursor=None):
+        params = {'since': cursor} if cursor else {}
+        response = self.client.get('/api/tasks/changes/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    @override_settings(TASK_SYNC_CURSOR_MARGIN_SECONDS=60)
+    def test_writes_committed_after_the_cursor_was_issued_are_sent(self):
+        first = self.sync()
+        self.assertTrue(first['full_sync'])
+        issued_at = datetime.fromisoformat(first['cursor']) + timedelta(seconds=60)
+
+        # Stamped before the first sync ran but only committed after it
+        late = Task.objects.create(title='Late', owner=self.user)
+        Task.objects.filter(pk=late.pk).update(updated_at=issued_at - timedelta(seconds=1))
+
+        second = self.sync(first['cursor'])
+        self.assertFalse(second['full_sync'])
+        self.assertIn(late.pk, [task['id'] for task in second['tasks']])
+
+    def test_leaving_a_shared_project_forces_a_full_sync(self):
+        owner = User.objects.create_user('sharer', 'sharer@example.com', 'pass')
+        project = Project.objects.create(name='Shared', owner=owner)
+        share = ProjectShare.objects.create(
+            project=project, shared_by=owner, shared_with=self.user, status='accepted', accepted_at=timezone.now()
+        )
+        shared_task = Task.objects.create(title='Shared', owner=owner, project=project)
+        cursor = self.sync()['cursor']
+
+        share.delete()
+        changes = self.sync(cursor)
+        self.assertTrue(changes['full_sync'])
+        self.assertNotIn(shared_task.pk, [task['id'] for task in changes['tasks']])
+
+    def test_tasks_moved_out_of_a_shared_project_are_removed(self):
+        owner = User.objects.create_user('mover', 'mover@example.com', 'pass')
+        shared = Project.objects.create(name='Shared', owner=owner)
+        private = Project.objects.create(name='Private', owner=owner)
+        ProjectShare.objects.create(
+            project=shared, shared_by=owner, shared_with=self.user, status='accepted', accepted_at=timezone.now()
+        )
+        task = Task.objects.create(title='Moving', owner=owner, project=shared)
+        own = Task.objects.create(title='Mine', owner=self.user, project=shared)
+        cursor = self.sync()['cursor']
+
+        task.project = private
+        task.save()
+        own.project = None
+        own.save()
+        changes = self.sync(cursor)
+        self.assertFalse(changes['full_sync'])
+        self.assertEqual(changes['deleted'], [task.pk])
+        # Still visible to its owner: sent as a change, not a removal
+        self.assertIn(own.pk, [t['id'] for t in changes['tasks']])
+
+
+class TaskRankTests(TestCase):
+    """Manual ordering through lexicographic ranks"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('ranker', 'ranker@example.com', 'pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.project = Project.objects.create(name='Ordered', owner=self.user)
+        self.tasks = [Task.objects.create(title=f'Task {i}', owner=self.user, project=self.project) for i in range(3)]
+
+    def ordered_titles(self):
+        return list(Task.objects.filter(project=self.project).order_by('rank').values_list('title', flat=True))
+
+    def test_new_tasks_are_appended(self):
+        self.assertEqual(self.ordered_titles(), ['Task 0', 'Task 1', 'Task 2'])
+
+    def test_move_between_neighbours_and_to_the_ends(self):
+        first, second, third = self.tasks
+        response = self.client.post(f'/api/tasks/{third.pk}/move/', {'previous_id': first.pk, 'next_id': second.pk}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.ordered_titles(), ['Task 0', 'Task 2', 'Task 1'])
+
+        self.client.post(f'/api/tasks/{second.pk}/move/', {'previous_id': None, 'next_id': first.pk}, format='json')
+        self.client.post(f'/api/tasks/{first.pk}/move/', {'previous_id': third.pk, 'next_id': None}, format='json')
+        self.assertEqual(self.ordered_titles(), ['Task 1', 'Task 2', 'Task 0'])
+
+        response = self.client.post(f'/api/tasks/{first.pk}/move/', {'previous_id': third.pk, 'next_id': second.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_ends_of_a_list_stay_short(self):
+        last = first = None
+        for _ in range(50000):
+            last = rank_between(last, None)
+            first = rank_between(None, first or '1')
+        self.assertLessEqual(len(last), 6)
+        self.assertLessEqual(len(first), 6)
+        self.assertLess(first, '1')
+
+
+class TaskCountsTests(TestCase):
+    """Sidebar counters follow task and membership writes"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('counter', 'counter@example.com', 'pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.teammate = User.objects.create_user('counted', 'counted@example.com', 'pass')
+        self.project = Project.objects.create(name='Counted', owner=self.teammate)
+        Task.objects.create(title='Inbox', owner=self.user)
+
+    def counts(self):
+        response = self.client.get('/api/tasks/counts/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_counts_are_not_cached_in_a_per_process_cache(self):
+        self.assertEqual(self.counts()['inbox'], 1)
+        # Bypasses every signal, as a write from another process would
+        Task.objects.bulk_create([Task(title='Elsewhere', owner=self.user, rank='z')])
+        self.assertEqual(self.counts()['inbox'], 2)
+
+    def test_shared_cache_is_invalidated_by_writes(self):
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}
+        }):
+            self.assertEqual(self.counts()['inbox'], 1)
+            with CaptureQueriesContext(connection) as queries:
+                self.counts()
+            self.assertEqual(len(queries), 0)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post('/api/tasks/', {'title': 'New'}, format='json')
+            self.assertEqual(self.counts()['inbox'], 2)
+
+            # Teammate's writes reach the user once the project is shared with them
+            with self.captureOnCommitCallbacks(execute=True):
+                ProjectShare.objects.create(
+                    project=self.project, shared_by=self.teammate, shared_with=self.user, status='accepted'
+                )
+            with self.captureOnCommitCallbacks(execute=True):
+                Task.objects.create(title='Shared', owner=self.teammate, project=self.project)
+            self.assertEqual(self.counts()['projects'], {self.project.pk: 1})
+
+
+class TaskBatchTests(TestCase):
+    """/api/tasks/batch/ applies every operation or none"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('batcher', 'batcher@example.com', 'pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(title='Existing', owner=self.user)
+        self.doomed = Task.objects.create(title='Doomed', owner=self.user)
+        self.foreign = Task.objects.create(title='Foreign', owner=User.objects.create_user('other', 'other@example.com', 'pass'))
+
+    def batch(self, operations):
+        return self.client.post('/api/tasks/batch/', {'operations': operations}, format='json')
+
+    def test_operations_are_applied_together(self):
+        response = self.batch([
+            {'op': 'create', 'data': {'title': 'Created'}},
+            {'op': 'update', 'id': self.task.pk, 'data': {'title': 'Renamed'}},
+            {'op': 'toggle', 'id': self.task.pk},
+            {'op': 'delete', 'id': self.doomed.pk},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['status'] for r in response.data['results']], ['created', 'updated', 'updated', 'deleted'])
+        self.assertEqual(response.data['results'][0]['task']['title'], 'Created')
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.title, self.task.is_completed), ('Renamed', True))
+        self.assertFalse(Task.objects.filter(pk=self.doomed.pk).exists())
+        self.assertTrue(TaskDeletion.objects.filter(task_id=self.doomed.pk).exists())
+        # Bulk writes are indexed for search
+        self.assertEqual(len(self.client.get('/api/tasks/search/', {'q': 'created'}).data['results']), 1)
+
+    def test_invalid_operations_are_reported_and_nothing_is_written(self):
+        response = self.batch([
+            {'op': 'create', 'data': {'title': 'Never'}},
+            {'op': 'toggle', 'id': self.task.pk},
+            {'op': 'update', 'id': self.foreign.pk, 'data': {'title': 'Hijacked'}},
+            {'op': 'explode'},
+            {'op': 'delete', 'id': self.doomed.pk},
+            {'op': 'update', 'id': self.doomed.pk, 'data': {'title': 'Gone'}},
+        ])
+        self.assertEqual(response.status_code, 400)
+        errors = {r['index']: r['errors'] for r in response.data['results'] if 'errors' in r}
+        self.assertEqual(set(errors), {2, 3, 5})
+        self.assertEqual(errors[2], {'id': ['Task not found']})
+        self.assertIn('op', errors[3])
+        self.assertFalse(Task.objects.filter(title='Never').exists())
+        self.assertTrue(Task.objects.filter(pk=self.doomed.pk).exists())
+        self.task.refresh_from_db()
+        self.assertFalse(self.task.is_completed)
+
+    def test_a_failing_write_rolls_back_the_whole_batch(self):
+        with mock.patch('todo.api_views.index_tasks', side_effect=RuntimeError('index down')):
+            with self.assertRaises(RuntimeError), self.assertLogs('django.request', 'ERROR'):
+                self.batch([
+                    {'op': 'create', 'data': {'title': 'Never'}},
+                    {'op': 'toggle', 'id': self.task.pk},
+                    {'op': 'delete', 'id': self.doomed.pk},
+                ])
+        self.assertFalse(Task.objects.filter(title='Never').exists())
+        self.assertTrue(Task.objects.filter(pk=self.doomed.pk).exists())
+        self.task.refresh_from_db()
+        self.assertFalse(self.task.is_completed)
+
+
+class TaskSearchTests(TestCase):
+    """Full-text search over visible tasks, with Hebrew normalization"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('seeker', 'seeker@example.com', 'pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.other = User.objects.create_user('hider', 'hider@example.com', 'pass')
+
+    def search(self, query):
+        response = self.client.get('/api/tasks/search/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [task['title'] for task in response.data['results']]
+
+    def test_hebrew_prefixes_niqqud_and_final_letters(self):
+        Task.objects.create(title='הלכתי לבית הספר', owner=self.user)
+        Task.objects.create(title='שָׁלוֹם לכולם', owner=self.user)
+        self.assertEqual(self.search('בית'), ['הלכתי לבית הספר'])
+        self.assertEqual(self.search('בבית'), ['הלכתי לבית הספר'])
+        self.assertEqual(self.search('ספר הלכתי'), ['הלכתי לבית הספר'])
+        self.assertEqual(self.search('שלום'), ['שָׁלוֹם לכולם'])
+        self.assertEqual(self.search('שלו'), ['שָׁלוֹם לכולם'])
+
+    def test_labels_are_searchable(self):
+        task = Task.objects.create(title='Call', owner=self.user)
+        task.labels.add(Label.objects.create(name='דחוף', owner=self.user))
+        self.assertEqual(self.search('דחוף'), ['Call'])
+
+    def test_only_visible_tasks_are_found(self):
+        project = Project.objects.create(name='Shared', owner=self.other)
+        ProjectShare.objects.create(project=project, shared_by=self.other, shared_with=self.user, status='accepted')
+        Task.objects.create(title='Budget mine', owner=self.user)
+        Task.objects.create(title='Budget shared', owner=self.other, project=project)
+        Task.objects.create(title='Budget private', owner=self.other)
+        self.assertEqual(sorted(self.search('budget')), ['Budget mine', 'Budget shared'])
+
+
+class ProjectSharingTests(TestCase):
+    """Share, accept and leave flows and the ProjectAccess they grant"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('sharer', 'sharer@example.com', 'pass')
+        self.friend = User.objects.create_user('friend', 'friend@example.com', 'pass')
+        self.project = Project.objects.create(name='Trip', owner=self.owner)
+        self.task = Task.objects.create(title='Book flights', owner=self.owner, project=self.project)
+        self.owner_client = APIClient()
+        self.owner_client.force_authenticate(self.owner)
+        self.friend_client = APIClient()
+        self.friend_client.force_authenticate(self.friend)
+
+    def friend_task_ids(self):
+        return [task['id'] for task in self.friend_client.get('/api/tasks/').data]
+
+    def share_and_accept(self):
+        response = self.owner_client.post(f'/api/projects/{self.project.pk}/share/', {'friend_ids': [self.friend.pk]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        notification = Notification.objects.get(user=self.friend, notification_type='project_share')
+        response = self.friend_client.post(f'/api/notifications/{notification.pk}/accept_share/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_pending_share_grants_no_access(self):
+        self.owner_client.post(f'/api/projects/{self.project.pk}/share/', {'friend_ids': [self.friend.pk]}, format='json')
+        self.assertFalse(ProjectAccess(self.friend).can_access(self.project))
+        self.assertEqual(self.friend_client.get(f'/api/projects/{self.project.pk}/').status_code, 404)
+        self.assertNotIn(self.task.pk, self.friend_task_ids())
+
+    def test_accept_grants_shared_access(self):
+        self.share_and_accept()
+        self.assertEqual(ProjectMembership.objects.get(user=self.friend, project=self.project).role, 'shared')
+        access = ProjectAccess(self.friend)
+        self.assertEqual(access.role(self.project), 'shared')
+        self.assertFalse(access.is_owner(self.project))
+        self.assertIn(self.task.pk, self.friend_task_ids())
+        self.assertTrue(Notification.objects.filter(user=self.owner, notification_type='project_accepted').exists())
+
+        # Shared members can't share the project onwards
+        response = self.friend_client.post(f'/api/projects/{self.project.pk}/share/', {'friend_ids': [self.owner.pk]}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_leave_revokes_access(self):
+        self.share_and_accept()
+        response = self.friend_client.post(f'/api/projects/{self.project.pk}/leave/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(ProjectMembership.objects.filter(user=self.friend, project=self.project).exists())
+        self.assertFalse(ProjectAccess(self.friend).can_access(self.project))
+        self.assertNotIn(self.task.pk, self.friend_task_ids())
+        self.assertTrue(Notification.objects.filter(user=self.owner, notification_type='member_left').exists())
+
+        # The owner can't leave their own project
+        response = self.owner_client.post(f'/api/projects/{self.project.pk}/leave/')
+        self.assertEqual(response.status_code, 400)
+
+    def test_ownership_transfer_moves_the_owner_role(self):
+        self.project.owner = self.friend
+        self.project.save()
+        self.assertEqual(ProjectAccess(self.friend).role(self.project), 'owner')
+        self.assertIsNone(ProjectAccess(self.owner).role(self.project))
@@ -6,13 +6,13 @@ from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from django.utils import timezone
 from django.db.models import Q, Count
 from datetime import datetime, timedelta
 import json
 
 from .models import Task, Project, Label, Comment, UserProfile
 from .forms import TaskForm, ProjectForm, LabelForm
+from .dates import get_user_timezone, user_today, user_today_range
 from django.views.generic import TemplateView
 from django.http import HttpResponse
 
@@ -40,20 +40,21 @@ def index(request):
 @login_required
 def today_view(request):
     """Today's tasks view"""
-    today = timezone.now().date()
+    day_start, day_end = user_today_range(request.user)
     
     # Get today's tasks
     today_tasks = Task.objects.filter(
         owner=request.user,
         is_completed=False,
-        due_date__date=today
+        due_date__gte=day_start,
+        due_date__lt=day_end
     ).select_related('project').prefetch_related('labels')
     
     # Get overdue tasks
     overdue_tasks = Task.objects.filter(
         owner=request.user,
         is_completed=False,
-        due_date__date__lt=today
+        due_date__lt=day_start
     ).select_related('project').prefetch_related('labels')
     
     # Get user's projects
@@ -73,20 +74,21 @@ def today_view(request):
 @login_required
 def upcoming_view(request):
     """Upcoming tasks view"""
-    today = timezone.now().date()
-    tomorrow = today + timedelta(days=1)
+    user_tz = get_user_timezone(request.user)
+    tomorrow = user_today(request.user, user_tz) + timedelta(days=1)
+    _, day_end = user_today_range(request.user, user_tz)
     
     # Get upcoming tasks grouped by date
     upcoming_tasks = Task.objects.filter(
         owner=request.user,
         is_completed=False,
-        due_date__date__gt=today
+        due_date__gte=day_end
     ).select_related('project').prefetch_related('labels').order_by('due_date')
     
-    # Group tasks by date
+    # Group tasks by date (local to the user)
     tasks_by_date = {}
     for task in upcoming_tasks:
-        date_key = task.due_date.date()
+        date_key = task.due_date.astimezone(user_tz).date()
         if date_key not in tasks_by_date:
             tasks_by_date[date_key] = []
         tasks_by_date[date_key].append(task)
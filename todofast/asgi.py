@@ -2,6 +2,8 @@
 ASGI config for todofast project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Production runs it with ``uvicorn todofast.asgi:application``; the server-sent
+event stream at /api/events/ (todo.event_views) is only available under ASGI.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
@@ -37,6 +37,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # For serving static files in production
+    'todo.middleware.QueryBudgetMiddleware',  # Query count / latency budgets (QUERY_BUDGET below)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,6 +66,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'todofast.wsgi.application'
+ASGI_APPLICATION = 'todofast.asgi.application'
 
 
 # Database
@@ -223,15 +225,39 @@ EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
 EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+# Seconds before a stalled SMTP connect/send gives up (Django has no default timeout)
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=30, cast=int)
 
 # Default email settings
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='TodoFast <noreply@todofast.com>')
 EMAIL_SUBJECT_PREFIX = '[TodoFast] '
 
+# Email outbox (see todo.outbox): requests queue emails, the send_outbox_emails worker sends them
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+EMAIL_OUTBOX_RETRY_SECONDS = config('EMAIL_OUTBOX_RETRY_SECONDS', default=60, cast=int)
+
 # Google OAuth settings
 GOOGLE_OAUTH2_CLIENT_ID = config('GOOGLE_OAUTH2_CLIENT_ID', default='')
 GOOGLE_OAUTH2_CLIENT_SECRET = config('GOOGLE_OAUTH2_CLIENT_SECRET', default='')
 
+# Google Calendar events are cached in chunks of this many rows per upsert/transaction
+CALENDAR_CACHE_CHUNK_SIZE = config('CALENDAR_CACHE_CHUNK_SIZE', default=500, cast=int)
+# Calendars of one user fetched in parallel during a sync
+CALENDAR_SYNC_MAX_WORKERS = config('CALENDAR_SYNC_MAX_WORKERS', default=4, cast=int)
+# Date range a full calendar sync downloads and the sync tokens then keep fresh
+CALENDAR_SYNC_PAST_DAYS = config('CALENDAR_SYNC_PAST_DAYS', default=30, cast=int)
+CALENDAR_SYNC_FUTURE_DAYS = config('CALENDAR_SYNC_FUTURE_DAYS', default=180, cast=int)
+# /api/calendar/events/ answers from the cache and refreshes it in the background once older than this
+CALENDAR_CACHE_TTL_SECONDS = config('CALENDAR_CACHE_TTL_SECONDS', default=300, cast=int)
+# Lease a calendar view sync holds on the user (GoogleCalendarToken.claim_sync) while it runs
+CALENDAR_SYNC_LOCK_SECONDS = config('CALENDAR_SYNC_LOCK_SECONDS', default=300, cast=int)
+# sync_calendars worker (see todo.calendar_sync): interval between a user's syncs, retry backoff base, users in parallel
+CALENDAR_SYNC_INTERVAL_SECONDS = config('CALENDAR_SYNC_INTERVAL_SECONDS', default=900, cast=int)
+CALENDAR_SYNC_RETRY_SECONDS = config('CALENDAR_SYNC_RETRY_SECONDS', default=60, cast=int)
+CALENDAR_SYNC_WORKER_CONCURRENCY = config('CALENDAR_SYNC_WORKER_CONCURRENCY', default=4, cast=int)
+# Cancelled calendar events stay deactivated this long before cleanup_calendar_events deletes them
+CALENDAR_EVENT_RETENTION_DAYS = config('CALENDAR_EVENT_RETENTION_DAYS', default=30, cast=int)
+
 # Security Settings
 SECURE_BROWSER_XSS_FILTER = config('SECURE_BROWSER_XSS_FILTER', default=True, cast=bool)
 SECURE_CONTENT_TYPE_NOSNIFF = config('SECURE_CONTENT_TYPE_NOSNIFF', default=True, cast=bool)
@@ -273,16 +299,91 @@ CSRF_COOKIE_SAMESITE = 'Lax'  # Allow cross-origin requests from same site
 CSRF_USE_SESSIONS = False  # Use cookie-based CSRF tokens
 CSRF_COOKIE_NAME = 'csrftoken'
 
-# Cache Configuration (using local-memory caching)
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'todofast-cache',
-        'TIMEOUT': 300,  # 5 minutes
-        'OPTIONS': {
-            'MAX_ENTRIES': 1000,
+# Cache Configuration: Redis when REDIS_URL is set (shared by the web process and the
+# workers), otherwise local memory per process. Cross-process invalidation (e.g.
+# project access, see todo.access) needs the shared one.
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'TIMEOUT': 300,  # 5 minutes
         }
     }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'todofast-cache',
+            'TIMEOUT': 300,  # 5 minutes
+            'OPTIONS': {
+                'MAX_ENTRIES': 1000,
+            }
+        }
+    }
+
+# Task delta sync: how long deleted-task tombstones are kept for /api/tasks/changes/
+TASK_DELETION_RETENTION_DAYS = config('TASK_DELETION_RETENTION_DAYS', default=30, cast=int)
+# Task delta sync: the returned cursor lags this far behind now so writes committed late are re-sent
+TASK_SYNC_CURSOR_MARGIN_SECONDS = config('TASK_SYNC_CURSOR_MARGIN_SECONDS', default=60, cast=int)
+
+# Read notifications older than this are deleted by cleanup_notifications
+NOTIFICATION_RETENTION_DAYS = config('NOTIFICATION_RETENTION_DAYS', default=90, cast=int)
+
+# Sidebar counters (/api/tasks/counts/) cache lifetime; task writes invalidate earlier
+TASK_COUNTS_CACHE_TIMEOUT = config('TASK_COUNTS_CACHE_TIMEOUT', default=300, cast=int)
+
+# Cached project ids/roles per user (see todo.access); membership changes invalidate earlier
+PROJECT_ACCESS_CACHE_TIMEOUT = config('PROJECT_ACCESS_CACHE_TIMEOUT', default=600, cast=int)
+
+# Recurring tasks: how far ahead occurrences are materialized (see todo.recurrence)
+RECURRENCE_WINDOW_DAYS = config('RECURRENCE_WINDOW_DAYS', default=60, cast=int)
+
+# Server-sent events (/api/events/, see todo.events). The in-process broker only
+# reaches streams served by the same process; with several ASGI workers use
+# todo.events.CacheBroker on a shared cache.
+EVENT_BROKER = {
+    'BACKEND': config('EVENT_BROKER_BACKEND', default='todo.events.InProcessBroker'),
+    'OPTIONS': {},
+}
+EVENT_STREAM_HEARTBEAT_SECONDS = config('EVENT_STREAM_HEARTBEAT_SECONDS', default=25, cast=int)
+
+# Per-request SQL query / latency budgets (see todo.middleware, todo.testing.query_budget).
+# VIEWS maps a URL name (its reads) or a (URL name, method) pair (a write) to a max
+# query count, or to {'queries': n, 'ms': n}. Writes also invalidate counters, index
+# tasks and publish events, so they get their own, larger budgets.
+QUERY_BUDGET = {
+    'ENABLED': config('QUERY_BUDGET_ENABLED', default=DEBUG, cast=bool),
+    # Server-Timing / X-Query-Count response headers
+    'HEADERS': config('QUERY_BUDGET_HEADERS', default=DEBUG, cast=bool),
+    'DEFAULT_MAX_QUERIES': config('QUERY_BUDGET_DEFAULT_MAX_QUERIES', default=30, cast=int),
+    'MAX_DURATION_MS': config('QUERY_BUDGET_MAX_DURATION_MS', default=1000, cast=int),
+    'VIEWS': {
+        'task-list': 8,
+        'task-detail': 8,
+        'task-changes': 8,
+        'task-counts': 6,
+        'task-search': 8,
+        'project-list': 8,
+        'project-detail': 8,
+        'friend-list': 5,
+        'notification-list': 5,
+        'notification-unread-count': 4,
+        ('task-list', 'POST'): 28,
+        ('task-detail', 'PUT'): 20,
+        ('task-detail', 'PATCH'): 20,
+        ('task-detail', 'DELETE'): 16,
+        ('task-toggle', 'POST'): 30,
+        ('task-toggle', 'PATCH'): 30,
+        ('task-move', 'POST'): 10,
+        # Grows with the number of operations (about 3 queries each)
+        ('task-batch', 'POST'): 100,
+        ('project-list', 'POST'): 16,
+        ('project-detail', 'PUT'): 18,
+        ('project-detail', 'PATCH'): 18,
+        ('project-detail', 'DELETE'): 16,
+    },
 }
 
 # Logging Configuration